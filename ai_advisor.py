@@ -8,8 +8,10 @@ KKEG, vergi ve denetim sorularına yanıt verir.
 
 import os
 import json
+import time
+import sqlite3
 import hashlib
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional, Dict, List
 from pathlib import Path
 
@@ -20,6 +22,119 @@ CACHE_DIR = Path.home() / ".ymm_audit_cache"
 CACHE_DURATION_DAYS = 30
 
 
+class AICache:
+    """
+    SQLite tabanlı AI yanıt önbelleği
+
+    Her yanıt tek satır olarak eklenir, sorgular anahtar üzerinden tekil
+    okunur. Süresi dolan kayıtlar expires_at indeksi ile silinir.
+    WAL modu sayesinde birden fazla gunicorn worker'ı ve masaüstü uygulaması
+    aynı dosyayı eşzamanlı kullanabilir.
+    """
+
+    def __init__(self, db_path: Path = None, ttl_days: int = CACHE_DURATION_DAYS):
+        self.db_path = str(db_path or CACHE_DIR / "ai_cache.db")
+        self.ttl_seconds = ttl_days * 24 * 3600
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        return conn
+
+    def _init_db(self):
+        """Tabloyu oluştur, süresi dolanları sil, eski JSON önbelleği taşı"""
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ai_cache (
+                    key TEXT PRIMARY KEY,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_cache_expires ON ai_cache (expires_at)")
+            conn.execute("DELETE FROM ai_cache WHERE expires_at <= ?", (time.time(),))
+            conn.commit()
+        finally:
+            conn.close()
+        self._migrate_json_cache()
+
+    def _migrate_json_cache(self):
+        """Eski ai_cache.json dosyasını bir kereye mahsus veritabanına aktar"""
+        json_file = Path(self.db_path).with_name("ai_cache.json")
+        if not json_file.exists():
+            return
+        try:
+            with open(json_file, "r", encoding="utf-8") as f:
+                old_cache = json.load(f)
+        except Exception:
+            old_cache = {}
+
+        rows = []
+        now = time.time()
+        for key, value in old_cache.items():
+            try:
+                created = datetime.fromisoformat(value.get("timestamp", "")).timestamp()
+            except (ValueError, AttributeError):
+                continue
+            expires = created + self.ttl_seconds
+            if expires > now and value.get("answer"):
+                rows.append((key, value["answer"], created, expires))
+
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO ai_cache (key, answer, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        try:
+            json_file.rename(json_file.with_suffix(".json.migrated"))
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[str]:
+        """Geçerli yanıtı getir, yoksa None"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT answer FROM ai_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def set(self, key: str, answer: str):
+        """Yanıtı ekle veya güncelle"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO ai_cache (key, answer, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, answer, now, now + self.ttl_seconds)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM ai_cache WHERE expires_at > ?", (time.time(),)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0]
+
+
 class AIAdvisor:
     """
     AI Denetim Danışmanı
@@ -34,7 +149,7 @@ class AIAdvisor:
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.environ.get("GEMINI_API_KEY", DEFAULT_API_KEY)
         self.model = None
-        self.cache = {}
+        self.cache: Optional[AICache] = None
         self.query_count = 0
         self.max_queries_per_session = 20  # Oturum başına maksimum sorgu
         
@@ -43,31 +158,11 @@ class AIAdvisor:
         self._load_cache()
     
     def _load_cache(self):
-        """Önbelleği dosyadan yükle"""
-        cache_file = CACHE_DIR / "ai_cache.json"
+        """Önbellek veritabanını aç (kayıtlar sorgu anında okunur)"""
         try:
-            if cache_file.exists():
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    self.cache = json.load(f)
-                    # Eski kayıtları temizle
-                    self._cleanup_old_cache()
-        except Exception:
-            self.cache = {}
-    
-    def _save_cache(self):
-        """Önbelleği dosyaya kaydet"""
-        cache_file = CACHE_DIR / "ai_cache.json"
-        try:
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
-    
-    def _cleanup_old_cache(self):
-        """Eski önbellek kayıtlarını temizle"""
-        cutoff = (datetime.now() - timedelta(days=CACHE_DURATION_DAYS)).isoformat()
-        self.cache = {k: v for k, v in self.cache.items() 
-                      if v.get("timestamp", "") > cutoff}
+            self.cache = AICache()
+        except sqlite3.Error:
+            self.cache = None
     
     def _get_cache_key(self, question: str, context: str = "") -> str:
         """Soru için benzersiz önbellek anahtarı oluştur"""
@@ -127,11 +222,17 @@ class AIAdvisor:
         # Önbellek kontrolü
         cache_key = self._get_cache_key(question, context)
         
-        if not force_fresh and cache_key in self.cache:
-            cached = self.cache[cache_key]
+        cached_answer = None
+        if not force_fresh and self.cache is not None:
+            try:
+                cached_answer = self.cache.get(cache_key)
+            except sqlite3.Error:
+                cached_answer = None
+        
+        if cached_answer is not None:
             return {
                 "success": True,
-                "answer": cached["answer"],
+                "answer": cached_answer,
                 "from_cache": True,
                 "error": ""
             }
@@ -162,11 +263,11 @@ Türk vergi mevzuatı konusunda uzmansın. Cevaplarını:
             answer = response.text.strip()
             
             # Önbelleğe kaydet
-            self.cache[cache_key] = {
-                "answer": answer,
-                "timestamp": datetime.now().isoformat()
-            }
-            self._save_cache()
+            if self.cache is not None:
+                try:
+                    self.cache.set(cache_key, answer)
+                except sqlite3.Error:
+                    pass
             
             self.query_count += 1
             
@@ -279,7 +380,7 @@ Türk vergi mevzuatı konusunda uzmansın. Cevaplarını:
             "session_queries": self.query_count,
             "max_queries": self.max_queries_per_session,
             "remaining": self.max_queries_per_session - self.query_count,
-            "cache_size": len(self.cache)
+            "cache_size": len(self.cache) if self.cache is not None else 0
         }
     
     def check_product_match(
@@ -5,6 +5,16 @@ Kullanıcı doğrulama ve oturum yönetimi
 
 import hashlib
 import os
+import time
+from threading import Lock
+
+# load_user her istekte çağrılır; kullanıcı kısa süre süreç içinde tutulur.
+# Rol/şifre değişikliği ve silme bu süreçte önbelleği hemen temizler, diğer
+# worker'lar en geç USER_CACHE_TTL saniye sonra günceli görür.
+USER_CACHE_TTL = 30
+
+_user_cache = {}        # str(user_id) -> (son geçerlilik, User)
+_user_cache_lock = Lock()
 
 # Flask-Login için User sınıfı
 class User:
@@ -48,18 +58,40 @@ def authenticate_user(username, password):
     
     if user_data and verify_password(password, user_data['password_hash']):
         update_last_login(user_data['id'])
-        return User(user_data['id'], user_data['username'], user_data['role'])
+        user = User(user_data['id'], user_data['username'], user_data['role'])
+        with _user_cache_lock:
+            _user_cache[str(user.id)] = (time.monotonic() + USER_CACHE_TTL, user)
+        return user
     
     return None
 
 
+def invalidate_user(user_id=None):
+    """Kullanıcıyı (None ise tümünü) önbellekten çıkar"""
+    with _user_cache_lock:
+        if user_id is None:
+            _user_cache.clear()
+        else:
+            _user_cache.pop(str(user_id), None)
+
+
 def load_user(user_id):
-    """Flask-Login için kullanıcı yükle"""
+    """Flask-Login için kullanıcı yükle (kısa süreli önbellekli)"""
     from database import get_user_by_id
     
+    key = str(user_id)
+    now = time.monotonic()
+    cached = _user_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    
     user_data = get_user_by_id(user_id)
     
     if user_data:
-        return User(user_data['id'], user_data['username'], user_data['role'])
+        user = User(user_data['id'], user_data['username'], user_data['role'])
+        with _user_cache_lock:
+            _user_cache[key] = (now + USER_CACHE_TTL, user)
+        return user
     
+    invalidate_user(user_id)
     return None
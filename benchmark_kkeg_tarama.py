@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+KKEG anahtar kelime taraması performans ölçümü
+
+Eski yöntem (her KKEG türü için `kw in desc.lower()` döngüsü, seyahat ve
+binek kontrolleri ayrı ayrı) ile tek geçişli AnahtarKelimeTarayici'yi
+sentetik kebir açıklamaları üzerinde karşılaştırır.
+
+Kullanım:
+    python benchmark_kkeg_tarama.py            # 1.000.000 açıklama
+    python benchmark_kkeg_tarama.py 200000
+"""
+
+import random
+import sys
+import time
+
+from kkeg_detector import KKEG_KEYWORDS, KKEGType, KKEG_KEYWORD_SCANNER, BINEK_KIRA_KEYWORDS
+
+
+KELIMELER = [
+    "FATURA", "ÖDEME", "MAL", "ALIMI", "HİZMET", "BEDELİ", "DANIŞMANLIK", "LTD", "ŞTİ",
+    "KIRTASİYE", "NAKLİYE", "KİRA", "ELEKTRİK", "SU", "DOĞALGAZ", "YAZILIM", "BAKIM",
+    "ONARIM", "MUHASEBE", "SİGORTA", "ANKARA", "İSTANBUL", "İZMİR", "OCAK", "ŞUBAT",
+    # KKEG'e takılabilecek kelimeler (daha seyrek)
+    "OTEL", "KONAKLAMA", "TEMSİL", "AKARYAKIT", "TRAFİK CEZASI", "BİNEK", "RENT A CAR",
+    "BAĞIŞ", "GECİKME FAİZİ", "HEDİYE", "RESTORAN",
+]
+
+
+def sentetik_aciklamalar(adet: int, tohum: int = 42) -> list:
+    """Rastgele kebir açıklamaları üret (4-8 kelime, büyük harf)"""
+    rnd = random.Random(tohum)
+    return [
+        " ".join(rnd.choice(KELIMELER) for _ in range(rnd.randint(4, 8)))
+        for _ in range(adet)
+    ]
+
+
+def eski_tarama(desc: str) -> int:
+    """Önceki KKEGDetector davranışı: tür başına döngü + seyahat + binek"""
+    desc_lower = desc.lower()
+    hits = 0
+    for kkeg_type, keywords in KKEG_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword.lower() in desc_lower:
+                hits += 1
+                break
+    travel_keywords = KKEG_KEYWORDS.get(KKEGType.SEYAHAT_KONAKLAMA, [])
+    any(kw in desc_lower for kw in travel_keywords)
+    for keyword in BINEK_KIRA_KEYWORDS:
+        if keyword in desc_lower:
+            break
+    return hits
+
+
+def yeni_tarama(desc: str) -> int:
+    """Tek geçişli tarayıcı"""
+    hits = KKEG_KEYWORD_SCANNER.tara(desc)
+    return sum(1 for grup in hits if grup in KKEG_KEYWORDS)
+
+
+def olc(ad: str, fonksiyon, aciklamalar: list) -> float:
+    baslangic = time.perf_counter()
+    toplam = 0
+    for desc in aciklamalar:
+        toplam += fonksiyon(desc)
+    sure = time.perf_counter() - baslangic
+    print(f"  {ad:<12} {sure:8.2f} sn  {len(aciklamalar) / sure:12,.0f} açıklama/sn  ({toplam:,} tür eşleşmesi)")
+    return sure
+
+
+def main():
+    adet = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{adet:,} sentetik kebir açıklaması üretiliyor...")
+    aciklamalar = sentetik_aciklamalar(adet)
+
+    print("Ölçüm:")
+    eski = olc("eski döngü", eski_tarama, aciklamalar)
+    yeni = olc("tarayıcı", yeni_tarama, aciklamalar)
+    print(f"Hızlanma: {eski / yeni:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Metin tabanlı PDF fatura ayrıştırma performans ölçümü
+
+Büyük bir PDF'in sayfa metinleri bir kez çıkarılır, ardından değişen
+aşamalar aynı metinler üzerinde karşılaştırılır:
+- Fatura başlangıç tespiti: sayfa başına kalıp listesi + re.search döngüsü
+  ile tek derlenmiş alternation
+- Metin biriktirme: `current_invoice_text += text` ile liste + join
+  (en kötü durum olarak tüm belge tek fatura sayılır)
+- parse_invoice_text: fatura başına ayrıştırma süresi
+
+Kullanım:
+    python benchmark_pdf_metin.py "Gelen Faturalar.pdf"
+    python benchmark_pdf_metin.py "Gelen Faturalar.pdf" 20     # her ölçüm 20 tekrar
+"""
+
+import re
+import sys
+import time
+
+import pdfplumber
+
+from pdf_invoice_reader import _FATURA_BASLANGIC_QR, _parse_invoice_pages
+
+
+ESKI_BASLANGIC_KALIPLARI = [
+    r'Fatura\s*No\s*[:\s]*[A-Z]{2,4}\d{10,}',
+    r'e-Fatura\s*No',
+    r'FATURA\s*NO',
+    r'e-Arşiv\s*Fatura',
+    r'Belge\s*No\s*[:\s]*[A-Z]{2,4}\d{10,}',
+    r'[A-Z]{3}20\d{2}\d{10,}',
+]
+
+
+def eski_baslangic(text: str) -> bool:
+    """Önceki davranış: her sayfada kalıp listesi üzerinde re.search"""
+    for pattern in ESKI_BASLANGIC_KALIPLARI:
+        if re.search(pattern, text, re.IGNORECASE):
+            return True
+    return False
+
+
+def yeni_baslangic(text: str) -> bool:
+    return _FATURA_BASLANGIC_QR.search(text) is not None
+
+
+def eski_biriktir(texts: list) -> int:
+    current_invoice_text = ""
+    for text in texts:
+        current_invoice_text += text + "\n"
+    return len(current_invoice_text)
+
+
+def yeni_biriktir(texts: list) -> int:
+    parts = []
+    for text in texts:
+        parts.append(text)
+    return len("\n".join(parts) + "\n")
+
+
+def olc(ad: str, fonksiyon, girdiler: list, tekrar: int) -> float:
+    baslangic = time.perf_counter()
+    for _ in range(tekrar):
+        for girdi in girdiler:
+            fonksiyon(girdi)
+    sure = time.perf_counter() - baslangic
+    print(f"  {ad:<22} {sure * 1000:10.1f} ms")
+    return sure
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    pdf_path = sys.argv[1]
+    tekrar = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    baslangic = time.perf_counter()
+    with pdfplumber.open(pdf_path) as pdf:
+        texts = [page.extract_text() or "" for page in pdf.pages]
+    print(f"{len(texts)} sayfa, {sum(map(len, texts)):,} karakter; "
+          f"metin çıkarma {time.perf_counter() - baslangic:.2f} sn")
+
+    # Faturalara böl (yeni tespit ile)
+    groups = []
+    for text in texts:
+        if yeni_baslangic(text) and groups:
+            groups.append([text])
+        elif groups:
+            groups[-1].append(text)
+        else:
+            groups.append([text])
+    print(f"{len(groups)} fatura grubu, {tekrar} tekrar")
+
+    print("Fatura başlangıç tespiti:")
+    eski = olc("kalıp listesi", eski_baslangic, texts, tekrar)
+    yeni = olc("tek alternation", yeni_baslangic, texts, tekrar)
+    print(f"  Hızlanma: {eski / yeni:.2f}x")
+
+    print("Metin biriktirme (tüm belge tek fatura):")
+    eski = olc("+= birleştirme", eski_biriktir, [texts], tekrar)
+    yeni = olc("liste + join", yeni_biriktir, [texts], tekrar)
+    print(f"  Hızlanma: {eski / yeni:.2f}x")
+
+    print("Ayrıştırma:")
+    sure = olc("parse_invoice_text", lambda group: _parse_invoice_pages(group, pdf_path, 1), groups, tekrar)
+    print(f"  Fatura başına {sure / (tekrar * len(groups)) * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+PDF QR tarama performans ölçümü
+
+Eski yöntem (her sayfayı 150 → 200 → 300 dpi render edip tüm bitmap'te
+pyzbar) ile gömülü görüntü hızlı yolunu (görüntü nesnesi kendi
+çözünürlüğünde, gerekirse render) gerçek bir e-Arşiv PDF'i üzerinde
+karşılaştırır.
+
+Kullanım:
+    python benchmark_qr_tarama.py "Gelen E-Arşiv Faturalar.pdf"        # ilk 50 sayfa
+    python benchmark_qr_tarama.py "Gelen E-Arşiv Faturalar.pdf" 200
+"""
+
+import sys
+import time
+
+import pdfplumber
+
+import pdf_invoice_reader
+from pdf_invoice_reader import _decode_qr_invoice, extract_qr_from_pdf_page
+
+
+def eski_tarama(page):
+    """Önceki extract_qr_from_pdf_page davranışı: sadece tam sayfa render"""
+    for res in (150, 200, 300):
+        invoice = _decode_qr_invoice(page.to_image(resolution=res).original)
+        if invoice:
+            return invoice
+    return None
+
+
+def olc(ad: str, fonksiyon, pdf_path: str, sayfa_sayisi: int) -> float:
+    okunan = 0
+    with pdfplumber.open(pdf_path) as pdf:
+        pages = pdf.pages[:sayfa_sayisi]
+        baslangic = time.perf_counter()
+        for page in pages:
+            if fonksiyon(page):
+                okunan += 1
+            page.close()
+        sure = time.perf_counter() - baslangic
+    print(f"  {ad:<14} {sure:8.2f} sn  {len(pages) / sure:8.2f} sayfa/sn  ({okunan}/{len(pages)} QR okundu)")
+    return sure
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    if not pdf_invoice_reader.PYZBAR_AVAILABLE:
+        print("pyzbar (zbar) kurulu değil, QR ölçümü yapılamaz")
+        sys.exit(1)
+
+    pdf_path = sys.argv[1]
+    sayfa_sayisi = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print(f"{pdf_path}: ilk {sayfa_sayisi} sayfa")
+    print("Ölçüm:")
+    eski = olc("tam sayfa", eski_tarama, pdf_path, sayfa_sayisi)
+    yeni = olc("gömülü görüntü", extract_qr_from_pdf_page, pdf_path, sayfa_sayisi)
+    print(f"Hızlanma: {eski / yeni:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,14 @@ Beyanname Parser Modülü - KDV ve Muhtasar Beyannamelerini PDF'den Parse Eder
 GİB'den indirilen beyanname PDF'lerini okuyarak yapılandırılmış veri çıkarır.
 """
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, asdict
+from functools import wraps
 from typing import Optional, List, Dict
 import re
 import os
 
+import pdf_tarama_onbellegi
+
 # PDF okuma için pdfplumber kullanılacak
 try:
     import pdfplumber
@@ -18,6 +21,16 @@ except ImportError:
     PDF_AVAILABLE = False
     print("Uyarı: pdfplumber yüklü değil. PDF parse edilemeyecek.")
 
+# Sayfa dizini için hızlı metin katmanı (pdfplumber bağımlılığı)
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+# Ayrıştırma kuralları değiştiğinde artırılır; eski önbellek sonuçları kullanılmaz
+BEYANNAME_SURUMU = 1
+
 
 @dataclass
 class KDVBeyanname:
@@ -66,6 +79,260 @@ class MuhtasarBeyanname:
     employees: List[str] = field(default_factory=list)
 
 
+@dataclass(frozen=True)
+class BeyannameAlani:
+    """
+    Beyanname PDF'inden aranan tek alan
+
+    kaliplar, alan_kalibi() çiftleridir ve öncelik sırasıyla denenir (metnin
+    herhangi bir yerinde eşleşen ilk kalıp kazanır). anahtar, alanın
+    başlayabileceği sayfaları hızlı metin katmanında bulmak içindir; None
+    ise alan her sayfada olabilir.
+    """
+    ad: str
+    kaliplar: tuple
+    anahtar: Optional[re.Pattern] = None
+
+
+def alan_kalibi(desen: str, devam: Optional[str] = None, flags: int = 0) -> tuple:
+    """
+    (kalıp, devam kalıbı) çifti
+
+    devam, metnin sonunda yarım kalmış bir başlangıcı tanır (ör. anahtardan
+    sonra metin sonuna kadar sayı gelmemesi); eşleşirse arama sonraki
+    sayfalarla sürer. None: kalıp sayfa sonunu aşamaz.
+    """
+    return re.compile(desen, flags), (re.compile(devam + r'\Z', flags) if devam else None)
+
+
+def anahtar_kalibi(*ifadeler: str, flags: int = 0) -> re.Pattern:
+    """İfadelerden boşluk farklarına duyarsız anahtar kalıbı"""
+    return re.compile(
+        '|'.join(r'\s*'.join(map(re.escape, ifade.split())) for ifade in ifadeler),
+        flags
+    )
+
+
+def _anahtar_sayfalari(pdf_path: str, alanlar, sayfa_sayisi: int) -> Dict[str, set]:
+    """
+    Her alan için anahtarının geçtiği sayfalar (0 tabanlı)
+
+    pdfium metin katmanı düzen analizi yapmadığından pdfplumber'dan çok daha
+    hızlıdır. Dizin çıkarılamazsa tüm sayfalar aday sayılır.
+    """
+    tum_sayfalar = set(range(sayfa_sayisi))
+    sayfalar = {alan.ad: tum_sayfalar for alan in alanlar}
+    aranan = [alan for alan in alanlar if alan.anahtar is not None]
+    if not aranan or not PDFIUM_AVAILABLE:
+        return sayfalar
+
+    bulunan = {alan.ad: set() for alan in aranan}
+    try:
+        doc = pdfium.PdfDocument(pdf_path)
+        try:
+            if len(doc) != sayfa_sayisi:
+                return sayfalar
+            for i in range(sayfa_sayisi):
+                page = doc[i]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+                for alan in aranan:
+                    if alan.anahtar.search(text):
+                        bulunan[alan.ad].add(i)
+        finally:
+            doc.close()
+    except Exception:
+        return sayfalar
+
+    sayfalar.update(bulunan)
+    return sayfalar
+
+
+def alanlari_ara(pdf_path: str, alanlar, sayfa_isleyici=None) -> Dict[str, re.Match]:
+    """
+    Alanları sayfa sayfa ara, tüm alanlar kesinleşince dur.
+
+    Her alan anahtarının geçtiği sayfada aranır; bir kalıbın başlangıcı
+    sayfa sonunda yarım kalırsa (devam kalıbı) pencere eşleşme bulunana ya
+    da sayfalar bitene kadar sonraki sayfalarla uzatılır. Alan en öncelikli
+    kalıbıyla bulununca ya da yarım başlangıcı kalmayıp anahtarı sonraki
+    sayfalarda geçmeyince kesinleşir; hiçbir açık alanın gerek duymadığı
+    sayfaların metni çıkarılmaz. Anahtar dizini pdfplumber metniyle aynı
+    sayfaları gösterdiği sürece sonuç, tüm sayfa metinleri birleştirilip
+    kalıpların tam metinde arandığı yöntemle aynıdır.
+
+    Args:
+        pdf_path: PDF dosya yolu
+        alanlar: BeyannameAlani listesi
+        sayfa_isleyici: Verilirse tüm sayfalar okunur ve her biri için
+            (page, text) ile çağrılır (ör. Muhtasar çalışan eki)
+
+    Returns:
+        {alan adı: eşleşme}; bulunamayan alanlar yer almaz
+    """
+    bulunan = {}  # alan adı -> (kalıp sırası, eşleşme, eşleşmenin penceresinin ilk sayfası)
+    with pdfplumber.open(pdf_path) as pdf:
+        aday = _anahtar_sayfalari(pdf_path, alanlar, len(pdf.pages))
+        son_sayfa = {ad: max(sayfalar, default=-1) for ad, sayfalar in aday.items()}
+        acik = [alan for alan in alanlar if son_sayfa[alan.ad] >= 0]
+        pencere_basi = {}  # alan adı -> yarım başlangıçlı penceresinin ilk sayfası
+        metinler = {}  # sayfa no -> metin (açık pencereler için)
+
+        for i, page in enumerate(pdf.pages):
+            if not acik and sayfa_isleyici is None:
+                break
+            gerekli = [alan for alan in acik if alan.ad in pencere_basi or i in aday[alan.ad]]
+            if not gerekli and sayfa_isleyici is None:
+                continue
+
+            try:
+                text = page.extract_text() or ""
+                if sayfa_isleyici is not None:
+                    sayfa_isleyici(page, text)
+            finally:
+                # Sayfa nesnelerini bırak; büyük eklerde bellek birikmez
+                page.close()
+            metinler[i] = text + "\n" if text else ""
+
+            for alan in gerekli:
+                ilk = pencere_basi.get(alan.ad, i)
+                pencere = "".join(metinler[n] for n in range(ilk, i + 1))
+                # Eşleşme bu pencerede bulunduysa uzayan pencerede yeniden aranır
+                # (ör. açgözlü [^0-9]* sonraki sayfadaki sayıya kadar uzar)
+                sira, _, eslesme_basi = bulunan.get(alan.ad, (len(alan.kaliplar), None, None))
+                sinir = sira + 1 if eslesme_basi == ilk else sira
+                for sira, (kalip, _) in enumerate(alan.kaliplar[:sinir]):
+                    match = kalip.search(pencere)
+                    if match:
+                        bulunan[alan.ad] = (sira, match, ilk)
+                        sinir = sira + 1
+                        break
+                # Kalıbın başlangıcı sayfa sonunda yarım kaldıysa pencere açık kalır
+                if any(devam is not None and devam.search(pencere) for _, devam in alan.kaliplar[:sinir]):
+                    pencere_basi[alan.ad] = ilk
+                else:
+                    pencere_basi.pop(alan.ad, None)
+
+            acik = [
+                alan for alan in acik
+                if (bulunan.get(alan.ad, (None,))[0] != 0 or alan.ad in pencere_basi)
+                and (alan.ad in pencere_basi or son_sayfa[alan.ad] > i)
+            ]
+            en_eski = min((pencere_basi[alan.ad] for alan in acik if alan.ad in pencere_basi), default=i + 1)
+            for n in [n for n in metinler if n < en_eski]:
+                del metinler[n]
+
+    return {ad: match for ad, (_, match, _) in bulunan.items()}
+
+
+def _beyanname_yukle(sinif, veri: dict):
+    """asdict çıktısından beyanname nesnesi (JSON'da metne dönen int anahtarlar düzeltilir)"""
+    alan_adlari = {f.name for f in fields(sinif)}
+    beyanname = sinif(**{ad: deger for ad, deger in veri.items() if ad in alan_adlari})
+    if isinstance(getattr(beyanname, 'kdv_oranlari', None), dict):
+        beyanname.kdv_oranlari = {int(oran): tutar for oran, tutar in beyanname.kdv_oranlari.items()}
+    return beyanname
+
+
+def beyanname_onbellegi(tur: str, sinif):
+    """
+    Ayrıştırma sonucunu PDF dosya özetiyle pdf_cache.db'de saklayan dekoratör.
+
+    Aynı PDF (ör. YMM denetiminin tekrar çalıştırılması) yeniden
+    ayrıştırılmaz. Başarısız ayrıştırma (None) kaydedilmez; önbellek
+    hatası ayrıştırmayı engellemez. EMP_PDF_CACHE=0 ile kapatılır.
+    """
+    def dekorator(parse):
+        @wraps(parse)
+        def sarmalayici(pdf_path: str):
+            if not pdf_tarama_onbellegi.ENABLED or not os.path.exists(pdf_path):
+                return parse(pdf_path)
+
+            ozet = None
+            try:
+                ozet = pdf_tarama_onbellegi.dosya_ozeti(pdf_path)
+                veri = pdf_tarama_onbellegi.get_beyanname(ozet, tur, BEYANNAME_SURUMU)
+                if veri is not None:
+                    print(f"Beyanname önbellekten yüklendi: {os.path.basename(pdf_path)}")
+                    return _beyanname_yukle(sinif, veri)
+            except Exception as e:
+                print(f"Beyanname önbelleği okunamadı ({pdf_path}): {e}")
+
+            beyanname = parse(pdf_path)
+            if beyanname is not None and ozet:
+                try:
+                    pdf_tarama_onbellegi.save_beyanname(ozet, tur, BEYANNAME_SURUMU, asdict(beyanname))
+                except Exception as e:
+                    print(f"Beyanname önbelleğine yazılamadı ({pdf_path}): {e}")
+            return beyanname
+        return sarmalayici
+    return dekorator
+
+
+# KDV 1: tutar alanları KDVBeyanname alan adlarıyla
+_KDV_ALANLARI = (
+    BeyannameAlani('yil', (alan_kalibi(r'Yıl\s+(\d{4})', r'Yıl\s*'),), anahtar_kalibi('Yıl')),
+    BeyannameAlani('ay', (alan_kalibi(r'Ay\s+(\w+)', r'Ay\s*'),), anahtar_kalibi('Ay')),
+    BeyannameAlani('vkn', (alan_kalibi(r'Vergi Kimlik Numarası\s+(\d{10,11})', r'Vergi Kimlik Numarası\s*'),),
+                   anahtar_kalibi('Vergi Kimlik Numarası')),
+    BeyannameAlani('unvan', (alan_kalibi(r'Soyadı \(Unvanı\)\s+(.+?)(?:\n|Adı)', r'Soyadı \(Unvanı\)\s*'),),
+                   anahtar_kalibi('Soyadı (Unvanı)')),
+    # Hesaplanan Katma Değer Vergisi, yoksa Toplam Katma Değer Vergisi
+    BeyannameAlani('hesaplanan_kdv', (
+        alan_kalibi(r'Hesaplanan Katma Değer Vergisi\s+([\d.,]+)', r'Hesaplanan Katma Değer Vergisi\s*'),
+        alan_kalibi(r'Toplam Katma Değer Vergisi\s+([\d.,]+)', r'Toplam Katma Değer Vergisi\s*'),
+    ), anahtar_kalibi('Hesaplanan Katma Değer Vergisi', 'Toplam Katma Değer Vergisi')),
+    BeyannameAlani('indirilecek_kdv_toplami', (alan_kalibi(r'İndirimler Toplamı\s+([\d.,]+)', r'İndirimler Toplamı\s*'),),
+                   anahtar_kalibi('İndirimler Toplamı')),
+    # Tutar sonraki sayfalarda olabilir: anahtardan sonra hiç sayı yoksa arama sürer
+    BeyannameAlani('onceki_donem_devreden', (
+        alan_kalibi(r'Önceki Dönemden Devreden.*?([\d.,]+)', r'Önceki Dönemden Devreden[^\d.,]*', re.DOTALL),
+    ), anahtar_kalibi('Önceki Dönemden Devreden')),
+    BeyannameAlani('odenecek_kdv', (
+        alan_kalibi(r'(?:Bu Dönemde )?Ödenmesi Gereken Katma Değer Vergisi\s+([\d.,]+)',
+                    r'Ödenmesi Gereken Katma Değer Vergisi\s*'),
+    ), anahtar_kalibi('Ödenmesi Gereken Katma Değer Vergisi')),
+    BeyannameAlani('sonraki_doneme_devreden', (
+        alan_kalibi(r'Sonraki Döneme Devreden Katma Değer Vergisi\s+([\d.,]+)',
+                    r'Sonraki Döneme Devreden Katma Değer Vergisi\s*'),
+    ), anahtar_kalibi('Sonraki Döneme Devreden Katma Değer Vergisi')),
+    BeyannameAlani('teslim_hizmet_toplami', (alan_kalibi(r'Matrah Toplamı\s+([\d.,]+)', r'Matrah Toplamı\s*'),),
+                   anahtar_kalibi('Matrah Toplamı')),
+)
+_KDV_TUTARLARI = ('hesaplanan_kdv', 'indirilecek_kdv_toplami', 'onceki_donem_devreden',
+                  'odenecek_kdv', 'sonraki_doneme_devreden', 'teslim_hizmet_toplami')
+
+# Muhtasar: özet tutarlar ilk sayfalarda, çalışan eki sonraki sayfalarda
+_MUHTASAR_ALANLARI = (
+    BeyannameAlani('donem', (alan_kalibi(r'Dönem[:\s]*(\d{4}[/\-]\d{1,2})', r'Dönem[:\s]*'),),
+                   anahtar_kalibi('Dönem')),
+    BeyannameAlani('ucret_stopaji', (alan_kalibi(r'Ücret[^0-9]*([0-9.,]+)', r'Ücret[^0-9]*', re.IGNORECASE),),
+                   anahtar_kalibi('Ücret', flags=re.IGNORECASE)),
+    BeyannameAlani('serbest_meslek_stopaji', (
+        alan_kalibi(r'Serbest Meslek[^0-9]*([0-9.,]+)', r'Serbest Meslek[^0-9]*', re.IGNORECASE),
+    ), anahtar_kalibi('Serbest Meslek', flags=re.IGNORECASE)),
+    BeyannameAlani('kira_stopaji', (alan_kalibi(r'Kira[^0-9]*([0-9.,]+)', r'Kira[^0-9]*', re.IGNORECASE),),
+                   anahtar_kalibi('Kira', flags=re.IGNORECASE)),
+    BeyannameAlani('toplam_stopaj', (
+        alan_kalibi(r'Toplam Vergi[\s:]*([0-9.,]+)', r'Toplam Vergi[\s:]*', re.IGNORECASE),
+    ), anahtar_kalibi('Toplam Vergi', flags=re.IGNORECASE)),
+    BeyannameAlani('damga_vergisi', (
+        alan_kalibi(r'Damga Vergisi[\s:]*([0-9.,]+)', r'Damga Vergisi[\s:]*', re.IGNORECASE),
+    ), anahtar_kalibi('Damga Vergisi', flags=re.IGNORECASE)),
+)
+_MUHTASAR_TUTARLARI = ('ucret_stopaji', 'serbest_meslek_stopaji', 'kira_stopaji',
+                       'toplam_stopaj', 'damga_vergisi')
+
+# Çalışan listesi: "12345678901 AHMET YILMAZ" veya "AHMET YILMAZ 12345678901"
+_CALISAN_KALIPLARI = (
+    re.compile(r'(\d{11})\s+([A-ZÇĞİÖŞÜ][A-ZÇĞİÖŞÜa-zçğıöşü]+\s+[A-ZÇĞİÖŞÜ][A-ZÇĞİÖŞÜa-zçğıöşü]+)'),  # TC + Ad Soyad
+    re.compile(r'([A-ZÇĞİÖŞÜ]{2,})\s+([A-ZÇĞİÖŞÜ]{2,})\s+\d{11}'),  # Ad Soyad + TC
+)
+
+
+@beyanname_onbellegi('kdv1', KDVBeyanname)
 def parse_kdv_beyanname_pdf(pdf_path: str) -> Optional[KDVBeyanname]:
     """
     KDV Beyannamesi PDF'ini parse et.
@@ -87,75 +354,51 @@ def parse_kdv_beyanname_pdf(pdf_path: str) -> Optional[KDVBeyanname]:
     beyanname = KDVBeyanname()
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text += text + "\n"
-            
-            # Dönem çıkar (örn: "Yıl 2025" + "Ay Ekim")
-            yil_match = re.search(r'Yıl\s+(\d{4})', full_text)
-            ay_match = re.search(r'Ay\s+(\w+)', full_text)
-            if yil_match and ay_match:
-                beyanname.donem = f"{ay_match.group(1)} {yil_match.group(1)}"
-            
-            # VKN çıkar
-            vkn_match = re.search(r'Vergi Kimlik Numarası\s+(\d{10,11})', full_text)
-            if vkn_match:
-                beyanname.vkn = vkn_match.group(1)
-            
-            # Unvan çıkar
-            unvan_match = re.search(r'Soyadı \(Unvanı\)\s+(.+?)(?:\n|Adı)', full_text)
-            if unvan_match:
-                beyanname.unvan = unvan_match.group(1).strip()
-            
-            # Hesaplanan KDV (Toplam Katma Değer Vergisi veya Hesaplanan Katma Değer Vergisi)
-            patterns_hesaplanan = [
-                r'Hesaplanan Katma Değer Vergisi\s+([\d.,]+)',
-                r'Toplam Katma Değer Vergisi\s+([\d.,]+)',
-            ]
-            for pattern in patterns_hesaplanan:
-                match = re.search(pattern, full_text)
-                if match:
-                    beyanname.hesaplanan_kdv = _parse_turkish_number(match.group(1))
-                    break
-            
-            # İndirimler Toplamı
-            indirim_match = re.search(r'İndirimler Toplamı\s+([\d.,]+)', full_text)
-            if indirim_match:
-                beyanname.indirilecek_kdv_toplami = _parse_turkish_number(indirim_match.group(1))
-            
-            # Önceki Dönemden Devreden
-            devreden_match = re.search(r'Önceki Dönemden Devreden.*?([\d.,]+)', full_text, re.DOTALL)
-            if devreden_match:
-                beyanname.onceki_donem_devreden = _parse_turkish_number(devreden_match.group(1))
-            
-            # Ödenecek KDV
-            odenecek_match = re.search(r'(?:Bu Dönemde )?Ödenmesi Gereken Katma Değer Vergisi\s+([\d.,]+)', full_text)
-            if odenecek_match:
-                beyanname.odenecek_kdv = _parse_turkish_number(odenecek_match.group(1))
-            
-            # Sonraki Döneme Devreden
-            sonraki_match = re.search(r'Sonraki Döneme Devreden Katma Değer Vergisi\s+([\d.,]+)', full_text)
-            if sonraki_match:
-                beyanname.sonraki_doneme_devreden = _parse_turkish_number(sonraki_match.group(1))
-            
-            # Matrah toplamı
-            matrah_match = re.search(r'Matrah Toplamı\s+([\d.,]+)', full_text)
-            if matrah_match:
-                beyanname.teslim_hizmet_toplami = _parse_turkish_number(matrah_match.group(1))
-            
-            return beyanname
+        eslesme = alanlari_ara(pdf_path, _KDV_ALANLARI)
+        
+        # Dönem (örn: "Yıl 2025" + "Ay Ekim")
+        if 'yil' in eslesme and 'ay' in eslesme:
+            beyanname.donem = f"{eslesme['ay'].group(1)} {eslesme['yil'].group(1)}"
+        
+        if 'vkn' in eslesme:
+            beyanname.vkn = eslesme['vkn'].group(1)
+        
+        if 'unvan' in eslesme:
+            beyanname.unvan = eslesme['unvan'].group(1).strip()
+        
+        for alan in _KDV_TUTARLARI:
+            if alan in eslesme:
+                setattr(beyanname, alan, _parse_turkish_number(eslesme[alan].group(1)))
+        
+        return beyanname
             
     except Exception as e:
         print(f"KDV beyanname parse hatası: {e}")
         return None
 
 
+def _tablo_isimleri(tables, employees_found: set):
+    """Tablo hücrelerinden ad soyad görünümlü değerleri topla"""
+    for table in tables:
+        for row in table:
+            if row:
+                for cell in row:
+                    if cell and isinstance(cell, str):
+                        # Sadece harf içeren ve 2+ kelime olan hücreleri al
+                        words = cell.strip().split()
+                        if len(words) >= 2 and all(w.isalpha() or w in 'ÇĞİÖŞÜçğıöşü' for w in ''.join(words)):
+                            name = ' '.join(words).upper()
+                            if 6 < len(name) < 50:
+                                employees_found.add(name)
+
+
+@beyanname_onbellegi('muhtasar', MuhtasarBeyanname)
 def parse_muhtasar_beyanname_pdf(pdf_path: str) -> Optional[MuhtasarBeyanname]:
     """
     Muhtasar Beyannamesi PDF'ini parse et.
+    
+    Çalışan eki sayfa sayfa işlenir: her sayfanın metni ve tabloları aynı
+    okumadan çıkarılır, sayfa hemen bırakılır.
     """
     if not PDF_AVAILABLE:
         print("pdfplumber yüklü değil.")
@@ -166,86 +409,38 @@ def parse_muhtasar_beyanname_pdf(pdf_path: str) -> Optional[MuhtasarBeyanname]:
         return None
     
     beyanname = MuhtasarBeyanname()
+    employees_found = set()
+    
+    def calisanlari_topla(page, text):
+        # Çalışan isimlerini çek (Muhtasar listesinden)
+        for pattern in _CALISAN_KALIPLARI:
+            for match in pattern.findall(text):
+                # TC + Ad formatı
+                if match[0].isdigit():
+                    name = match[1].strip()
+                else:
+                    name = f"{match[0]} {match[1]}".strip()
+                if name and len(name) > 4:
+                    employees_found.add(name.upper())
+        
+        # PDF tablolarından da dene (çizgisiz sayfada tablo bulunmaz)
+        if page.edges:
+            _tablo_isimleri(page.extract_tables(), employees_found)
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text += text + "\n"
-            
-            # Dönem
-            donem_match = re.search(r'Dönem[:\s]*(\d{4}[/\-]\d{1,2})', full_text)
-            if donem_match:
-                beyanname.donem = donem_match.group(1)
-            
-            # Ücret stopajı (Gelir Vergisi Kesintisi - Ücret)
-            ucret_match = re.search(r'Ücret[^0-9]*([0-9.,]+)', full_text, re.IGNORECASE)
-            if ucret_match:
-                beyanname.ucret_stopaji = _parse_turkish_number(ucret_match.group(1))
-            
-            # Serbest meslek stopajı
-            serbest_match = re.search(r'Serbest Meslek[^0-9]*([0-9.,]+)', full_text, re.IGNORECASE)
-            if serbest_match:
-                beyanname.serbest_meslek_stopaji = _parse_turkish_number(serbest_match.group(1))
-            
-            # Kira stopajı
-            kira_match = re.search(r'Kira[^0-9]*([0-9.,]+)', full_text, re.IGNORECASE)
-            if kira_match:
-                beyanname.kira_stopaji = _parse_turkish_number(kira_match.group(1))
-            
-            # Toplam
-            toplam_match = re.search(r'Toplam Vergi[\s:]*([0-9.,]+)', full_text, re.IGNORECASE)
-            if toplam_match:
-                beyanname.toplam_stopaj = _parse_turkish_number(toplam_match.group(1))
-            
-            # Damga Vergisi
-            damga_match = re.search(r'Damga Vergisi[\s:]*([0-9.,]+)', full_text, re.IGNORECASE)
-            if damga_match:
-                beyanname.damga_vergisi = _parse_turkish_number(damga_match.group(1))
-            
-            # Çalışan isimlerini çek (Muhtasar listesinden)
-            # TC Kimlik No + Ad Soyad formatı aranıyor
-            # Örnek: "12345678901 AHMET YILMAZ"
-            employee_patterns = [
-                r'(\d{11})\s+([A-ZÇĞİÖŞÜ][A-ZÇĞİÖŞÜa-zçğıöşü]+\s+[A-ZÇĞİÖŞÜ][A-ZÇĞİÖŞÜa-zçğıöşü]+)',  # TC + Ad Soyad
-                r'([A-ZÇĞİÖŞÜ]{2,})\s+([A-ZÇĞİÖŞÜ]{2,})\s+\d{11}',  # Ad Soyad + TC
-            ]
-            
-            employees_found = set()
-            for pattern in employee_patterns:
-                matches = re.findall(pattern, full_text)
-                for match in matches:
-                    if isinstance(match, tuple):
-                        # TC + Ad formatı
-                        if match[0].isdigit():
-                            name = match[1].strip()
-                        else:
-                            name = f"{match[0]} {match[1]}".strip()
-                        if name and len(name) > 4:
-                            employees_found.add(name.upper())
-            
-            # PDF tablolarından da dene
-            for page in pdf.pages:
-                tables = page.extract_tables()
-                if tables:
-                    for table in tables:
-                        for row in table:
-                            if row:
-                                for cell in row:
-                                    if cell and isinstance(cell, str):
-                                        # Sadece harf içeren ve 2+ kelime olan hücreleri al
-                                        words = cell.strip().split()
-                                        if len(words) >= 2 and all(w.isalpha() or w in 'ÇĞİÖŞÜçğıöşü' for w in ''.join(words)):
-                                            name = ' '.join(words).upper()
-                                            if 6 < len(name) < 50:
-                                                employees_found.add(name)
-            
-            beyanname.employees = list(employees_found)
-            print(f"Muhtasardan {len(beyanname.employees)} çalışan bulundu")
-            
-            return beyanname
+        eslesme = alanlari_ara(pdf_path, _MUHTASAR_ALANLARI, sayfa_isleyici=calisanlari_topla)
+        
+        if 'donem' in eslesme:
+            beyanname.donem = eslesme['donem'].group(1)
+        
+        for alan in _MUHTASAR_TUTARLARI:
+            if alan in eslesme:
+                setattr(beyanname, alan, _parse_turkish_number(eslesme[alan].group(1)))
+        
+        beyanname.employees = list(employees_found)
+        print(f"Muhtasardan {len(beyanname.employees)} çalışan bulundu")
+        
+        return beyanname
             
     except Exception as e:
         print(f"Muhtasar parse hatası: {e}")
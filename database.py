@@ -4,20 +4,65 @@ SQLite veritabanı ve kullanıcı yönetimi
 """
 
 import os
+import json
 import sqlite3
+import threading
 from datetime import datetime
 
 # Veritabanı dosyası
 DB_PATH = os.path.join(os.path.dirname(__file__), 'users.db')
 
+# Bağlantı başına önbelleğe alınan hazır (prepared) sorgu sayısı
+CACHED_STATEMENTS = 256
 
-def get_db_connection():
-    """Veritabanı bağlantısı oluştur"""
-    conn = sqlite3.connect(DB_PATH)
+# Her thread'in açık tuttuğu bağlantı (worker süreci başına küçük bir havuz)
+_pool = threading.local()
+
+
+class _PooledConnection:
+    """
+    Havuzdaki bağlantının vekili
+
+    close() bağlantıyı kapatmaz, thread'e geri bırakır; böylece mevcut
+    `conn = get_db_connection() ... conn.close()` kullanımı değişmeden kalır.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        # Yarım kalan (commit edilmemiş) işlem sonraki kullanıcıya taşınmasın
+        if self._conn.in_transaction:
+            self._conn.rollback()
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30, cached_statements=CACHED_STATEMENTS)
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA busy_timeout = 30000')
+    # WAL: okuyucular yazıcıyı beklemez (birden fazla gunicorn worker'ı)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
     return conn
 
 
+def get_db_connection():
+    """Thread'in havuzdaki veritabanı bağlantısını getir (yoksa aç)"""
+    key = (os.getpid(), DB_PATH)
+    conn = getattr(_pool, 'conn', None)
+    # fork sonrası üst süreçten kalan bağlantı kullanılmaz
+    if conn is None or _pool.key != key:
+        conn = _connect()
+        _pool.conn = conn
+        _pool.key = key
+    elif conn.in_transaction:
+        conn.rollback()
+    return _PooledConnection(conn)
+
+
 def init_db():
     """Veritabanını başlat ve tabloları oluştur"""
     conn = get_db_connection()
@@ -38,10 +83,64 @@ def init_db():
     conn.commit()
     conn.close()
     
+    init_uploads_table()
+    
     # Default admin kullanıcısı oluştur
     create_default_admin()
 
 
+def init_uploads_table():
+    """Yüklenen dosya kayıt tablosunu oluştur (tüm worker'lar paylaşır)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS uploads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size INTEGER DEFAULT 0,
+            sha256 TEXT,
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_uploads_user ON uploads (user_id, id)')
+    
+    # Eski tabloya sha256 kolonu ekle
+    columns = [row['name'] for row in cursor.execute('PRAGMA table_info(uploads)').fetchall()]
+    if 'sha256' not in columns:
+        cursor.execute('ALTER TABLE uploads ADD COLUMN sha256 TEXT')
+    
+    # Parçalı (chunked) yükleme oturumları
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            part_path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            received INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Web düzenleyicide yapılan değişiklikler (veri setinin üzerine uygulanır)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS editor_edits (
+            user_id INTEGER NOT NULL,
+            dataset TEXT NOT NULL,
+            invoice_id INTEGER NOT NULL,
+            fields TEXT NOT NULL DEFAULT '{}',
+            deleted INTEGER DEFAULT 0,
+            added INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, dataset, invoice_id)
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+
 def create_default_admin():
     """Default admin kullanıcısı oluştur"""
     from auth import hash_password
@@ -63,6 +162,12 @@ def create_default_admin():
     conn.close()
 
 
+def invalidate_user_cache(user_id):
+    """Rol/şifre değişince veya silinince oturum önbelleğinden çıkar"""
+    from auth import invalidate_user
+    invalidate_user(user_id)
+
+
 def get_user_by_id(user_id):
     """ID ile kullanıcı getir"""
     conn = get_db_connection()
@@ -124,6 +229,7 @@ def update_user_password(user_id, new_password):
     cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
     conn.commit()
     conn.close()
+    invalidate_user_cache(user_id)
     return True
 
 
@@ -134,6 +240,7 @@ def update_user_role(user_id, new_role):
     cursor.execute('UPDATE users SET role = ? WHERE id = ?', (new_role, user_id))
     conn.commit()
     conn.close()
+    invalidate_user_cache(user_id)
     return True
 
 
@@ -144,6 +251,7 @@ def delete_user(user_id):
     cursor.execute('DELETE FROM users WHERE id = ?', (user_id,))
     conn.commit()
     conn.close()
+    invalidate_user_cache(user_id)
     return True
 
 
@@ -154,3 +262,177 @@ def update_last_login(user_id):
     cursor.execute('UPDATE users SET last_login = ? WHERE id = ?', (datetime.now(), user_id))
     conn.commit()
     conn.close()
+
+
+# ================== UPLOAD KAYITLARI ==================
+
+def add_upload(user_id, name, path, size, sha256=None):
+    """Kullanıcının yüklediği dosyayı kaydet"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        'INSERT INTO uploads (user_id, name, path, size, sha256, uploaded_at) VALUES (?, ?, ?, ?, ?, ?)',
+        (user_id, name, path, size, sha256, datetime.now())
+    )
+    conn.commit()
+    upload_id = cursor.lastrowid
+    conn.close()
+    return upload_id
+
+
+def get_user_uploads(user_id):
+    """Kullanıcının yüklediği dosyaları yükleme sırasıyla getir"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM uploads WHERE user_id = ? ORDER BY id', (user_id,))
+    uploads = cursor.fetchall()
+    conn.close()
+    return uploads
+
+
+def delete_user_uploads(user_id):
+    """Kullanıcının dosya kayıtlarını sil, silinen dosya yollarını döndür"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT path FROM uploads WHERE user_id = ?', (user_id,))
+    paths = [row['path'] for row in cursor.fetchall()]
+    cursor.execute('DELETE FROM uploads WHERE user_id = ?', (user_id,))
+    conn.commit()
+    conn.close()
+    return paths
+
+
+def create_upload_session(session_id, user_id, name, part_path, size):
+    """Parçalı yükleme oturumu başlat"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        'INSERT INTO upload_sessions (id, user_id, name, part_path, size, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+        (session_id, user_id, name, part_path, size, datetime.now())
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_upload_session(session_id, user_id):
+    """Kullanıcıya ait yükleme oturumunu getir"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM upload_sessions WHERE id = ? AND user_id = ?', (session_id, user_id))
+    upload_session = cursor.fetchone()
+    conn.close()
+    return upload_session
+
+
+def update_upload_session_received(session_id, received):
+    """Diske yazılmış bayt sayısını güncelle"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('UPDATE upload_sessions SET received = ? WHERE id = ?', (received, session_id))
+    conn.commit()
+    conn.close()
+
+
+def delete_upload_sessions(user_id, session_id=None):
+    """Yükleme oturum(lar)ını sil"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if session_id is None:
+        cursor.execute('DELETE FROM upload_sessions WHERE user_id = ?', (user_id,))
+    else:
+        cursor.execute('DELETE FROM upload_sessions WHERE id = ? AND user_id = ?', (session_id, user_id))
+    conn.commit()
+    conn.close()
+
+
+# ================== DÜZENLEYİCİ DEĞİŞİKLİKLERİ ==================
+
+def get_editor_edits(user_id, dataset):
+    """Düzenleyici değişikliklerini {invoice_id: {'fields', 'deleted', 'added'}} olarak getir"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        'SELECT invoice_id, fields, deleted, added FROM editor_edits WHERE user_id = ? AND dataset = ?',
+        (user_id, dataset)
+    )
+    edits = {
+        row['invoice_id']: {
+            'fields': json.loads(row['fields']),
+            'deleted': bool(row['deleted']),
+            'added': bool(row['added'])
+        }
+        for row in cursor.fetchall()
+    }
+    conn.close()
+    return edits
+
+
+def update_editor_fields(user_id, dataset, invoice_id, fields):
+    """Faturanın değişen alanlarını mevcut değişikliklerle birleştirerek kaydet"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    # Aynı faturaya eşzamanlı iki düzenleme birbirini ezmesin
+    cursor.execute('BEGIN IMMEDIATE')
+    cursor.execute(
+        'SELECT fields FROM editor_edits WHERE user_id = ? AND dataset = ? AND invoice_id = ?',
+        (user_id, dataset, invoice_id)
+    )
+    row = cursor.fetchone()
+    merged = json.loads(row['fields']) if row else {}
+    merged.update(fields)
+    if row:
+        cursor.execute(
+            'UPDATE editor_edits SET fields = ?, updated_at = ? WHERE user_id = ? AND dataset = ? AND invoice_id = ?',
+            (json.dumps(merged, ensure_ascii=False), datetime.now(), user_id, dataset, invoice_id)
+        )
+    else:
+        cursor.execute(
+            'INSERT INTO editor_edits (user_id, dataset, invoice_id, fields, updated_at) VALUES (?, ?, ?, ?, ?)',
+            (user_id, dataset, invoice_id, json.dumps(merged, ensure_ascii=False), datetime.now())
+        )
+    conn.commit()
+    conn.close()
+
+
+def add_editor_invoice(user_id, dataset, invoice, first_id):
+    """Elle eklenen faturayı kaydet, verilen id'yi döndür (first_id: veri setindeki fatura sayısı)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    cursor.execute(
+        'SELECT MAX(invoice_id) FROM editor_edits WHERE user_id = ? AND dataset = ?',
+        (user_id, dataset)
+    )
+    last_id = cursor.fetchone()[0]
+    invoice_id = max(first_id, (last_id + 1) if last_id is not None else first_id)
+    cursor.execute(
+        'INSERT INTO editor_edits (user_id, dataset, invoice_id, fields, added, updated_at) VALUES (?, ?, ?, ?, 1, ?)',
+        (user_id, dataset, invoice_id, json.dumps(invoice, ensure_ascii=False), datetime.now())
+    )
+    conn.commit()
+    conn.close()
+    return invoice_id
+
+
+def set_editor_deleted(user_id, dataset, invoice_ids, deleted=True):
+    """Faturaları silindi / geri alındı olarak işaretle"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    for invoice_id in invoice_ids:
+        cursor.execute(
+            '''INSERT INTO editor_edits (user_id, dataset, invoice_id, deleted, updated_at) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (user_id, dataset, invoice_id) DO UPDATE SET deleted = excluded.deleted,
+               updated_at = excluded.updated_at''',
+            (user_id, dataset, invoice_id, int(deleted), datetime.now())
+        )
+    conn.commit()
+    conn.close()
+
+
+def clear_editor_edits(user_id, dataset):
+    """Veri seti yeniden oluşturulunca eski değişiklikleri sil"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM editor_edits WHERE user_id = ? AND dataset = ?', (user_id, dataset))
+    conn.commit()
+    conn.close()
@@ -6,6 +6,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
+import multiprocessing
 import webbrowser
 import queue
 import compare_invoices
@@ -649,6 +650,10 @@ class EMutabakatApp:
         try:
             all_invoices = []
             
+            # PDF'ler tek worker havuzunda birlikte taranır
+            pdf_files = [f for f in alis_files if os.path.exists(f) and f.lower().endswith('.pdf')]
+            pdf_results = pdf_invoice_reader.smart_extract_invoices_from_pdfs(pdf_files) if pdf_files else {}
+            
             for fpath in alis_files:
                 if os.path.exists(fpath):
                     if fpath.lower().endswith('.zip'):
@@ -659,7 +664,7 @@ class EMutabakatApp:
                         if inv_data:
                             all_invoices.append(inv_data)
                     elif fpath.lower().endswith('.pdf'):
-                        inv_list = pdf_invoice_reader.smart_extract_invoices_from_pdf(fpath)
+                        inv_list = pdf_results.get(fpath)
                         if inv_list:
                             all_invoices.extend(inv_list)
             
@@ -1030,13 +1035,20 @@ class EMutabakatApp:
                 except Exception as e:
                     self.log(f"  HATA: {e}")
             
-            for pdf_path in pdf_files:
-                self.log(f"Yükleniyor (PDF): {os.path.basename(pdf_path)}")
+            if pdf_files:
+                # Tüm PDF'ler tek worker havuzunda, küçükler önce
+                self.log(f"Yükleniyor (PDF): {len(pdf_files)} dosya birlikte taranıyor")
+                
+                def on_pdf_result(pdf_path, inv_list, error):
+                    if error:
+                        self.log(f"  {os.path.basename(pdf_path)}: HATA: {error}")
+                    elif inv_list:
+                        self.log(f"  {os.path.basename(pdf_path)} -> {len(inv_list)} fatura bulundu")
+                
                 try:
-                    inv_list = pdf_invoice_reader.smart_extract_invoices_from_pdf(pdf_path)
-                    if inv_list:
+                    results = pdf_invoice_reader.smart_extract_invoices_from_pdfs(pdf_files, on_result=on_pdf_result)
+                    for inv_list in results.values():
                         all_invoices.extend(inv_list)
-                        self.log(f"  -> {len(inv_list)} fatura bulundu")
                 except Exception as e:
                     self.log(f"  HATA: {e}")
             
@@ -1130,6 +1142,8 @@ class EMutabakatApp:
             messagebox.showerror("Hata", f"Satış listesi oluşturulamadı:\n{str(e)}")
 
 if __name__ == "__main__":
+    # PDF tarama süreçleri (spawn) paketlenmiş exe'de de çalışsın
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = EMutabakatApp(root)
     root.mainloop()
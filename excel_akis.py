@@ -0,0 +1,142 @@
+"""
+e-Mutabakat Pro - Akışlı Excel Yazımı
+Büyük KDV / satış / GİB listeleri için openpyxl write-only modu.
+
+- Satırlar openpyxl'in geçici dosyasına yazılır; bellek kullanımı satır
+  sayısından bağımsızdır
+- Stiller her hücreye ayrı nesne olarak değil, çalışma kitabına bir kez
+  eklenen adlandırılmış stiller (NamedStyle) olarak verilir
+- stream_workbook() Excel dosyasını üretilirken parça parça döndürür
+  (HTTP yanıtına doğrudan akıtmak için)
+"""
+
+import queue
+import threading
+
+try:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import NamedStyle, Border, Side
+    from openpyxl.utils import get_column_letter
+    from openpyxl.worksheet.cell_range import CellRange
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+# HTTP yanıtına gönderilen parça boyutu
+CHUNK_SIZE = 256 * 1024
+
+# Yazıcı ile okuyucu arasında bekleyen en fazla parça (geri basınç)
+QUEUE_SIZE = 8
+
+
+def thin_border():
+    """İnce kenarlık (tüm listelerde ortak)"""
+    side = Side(style='thin')
+    return Border(left=side, right=side, top=side, bottom=side)
+
+
+def new_workbook(styles):
+    """
+    Write-only çalışma kitabı oluştur ve stilleri ekle
+
+    Args:
+        styles: {stil adı: {'font', 'fill', 'alignment', 'border', 'number_format'}}
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    for name, attrs in styles.items():
+        wb.add_named_style(NamedStyle(name=name, **attrs))
+    return wb
+
+
+def cell(ws, value, style=None):
+    """Stilli hücre (ws.append() listesinde kullanılır)"""
+    c = WriteOnlyCell(ws, value=value)
+    if style:
+        c.style = style
+    return c
+
+
+def set_column_widths(ws, widths):
+    """Kolon genişlikleri (ilk satırdan önce çağrılmalı)"""
+    for i, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+
+
+def merge(ws, ref):
+    """Hücre birleştir (write-only sayfada merge_cells yoktur)"""
+    ws.merged_cells.add(CellRange(ref))
+
+
+class _Done:
+    """Kuyruk sonu işareti"""
+
+
+class _QueueWriter:
+    """wb.save() için yazılabilir dosya; dolan parçaları kuyruğa koyar"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.buffer = bytearray()
+        self.reader_closed = False
+        self.aborted = False
+
+    def write(self, data):
+        # İptalden sonra zipfile'ın kapanışta yaptığı yazmalar yok sayılır
+        if self.aborted:
+            return len(data)
+        self.buffer += data
+        if len(self.buffer) >= CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self.buffer and not self.aborted:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
+
+    def put(self, item):
+        # İstemci bağlantıyı kapattıysa yazmayı durdur
+        while True:
+            if self.reader_closed:
+                self.aborted = True
+                raise OSError('Excel akışı istemci tarafından kapatıldı')
+            try:
+                self.chunks.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+
+def stream_workbook(write_func, *args):
+    """
+    write_func(*args, stream) ile üretilen Excel dosyasını parça parça döndür
+
+    Yazım ayrı bir thread'de yapılır; okuyucu geride kalırsa yazıcı bekler,
+    bellekte en fazla QUEUE_SIZE parça tutulur.
+    """
+    chunks = queue.Queue(maxsize=QUEUE_SIZE)
+    writer = _QueueWriter(chunks)
+
+    def run():
+        try:
+            write_func(*args, writer)
+            writer.flush()
+            writer.put(_Done)
+        except Exception as e:
+            try:
+                writer.put(e)
+            except OSError:
+                pass
+
+    threading.Thread(target=run, name='emp-excel-stream', daemon=True).start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _Done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        writer.reader_closed = True
@@ -10,52 +10,74 @@ from datetime import datetime
 
 try:
     import openpyxl
-    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+    from openpyxl.styles import Font, Alignment, PatternFill
     OPENPYXL_AVAILABLE = True
 except ImportError:
     OPENPYXL_AVAILABLE = False
 
+import excel_akis
+
+TUTAR_FORMATI = '#,##0.00 ₺'
+
 
 def _get_styles():
-    """Ortak Excel stilleri"""
-    header_font = Font(bold=True, size=10, color="FFFFFF")
-    header_fill = PatternFill(start_color="2E74B5", end_color="2E74B5", fill_type="solid")
-    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    
-    title_font = Font(bold=True, size=14, color="2E74B5")
-    title_alignment = Alignment(horizontal='center', vertical='center')
-    
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
+    """Ortak Excel stilleri (çalışma kitabına bir kez eklenen adlandırılmış stiller)"""
+    thin_border = excel_akis.thin_border()
     number_alignment = Alignment(horizontal='right', vertical='center')
     
     return {
-        'header_font': header_font,
-        'header_fill': header_fill,
-        'header_alignment': header_alignment,
-        'title_font': title_font,
-        'title_alignment': title_alignment,
-        'thin_border': thin_border,
-        'number_alignment': number_alignment
+        'gib_baslik': {
+            'font': Font(bold=True, size=14, color="2E74B5"),
+            'alignment': Alignment(horizontal='center', vertical='center')
+        },
+        'gib_tarih': {'font': Font(italic=True, size=9, color="666666")},
+        'gib_kolon': {
+            'font': Font(bold=True, size=10, color="FFFFFF"),
+            'fill': PatternFill(start_color="2E74B5", end_color="2E74B5", fill_type="solid"),
+            'alignment': Alignment(horizontal='center', vertical='center', wrap_text=True),
+            'border': thin_border
+        },
+        'gib_hucre': {'border': thin_border},
+        'gib_tutar': {'border': thin_border, 'number_format': TUTAR_FORMATI, 'alignment': number_alignment},
+        'gib_oran': {'border': thin_border, 'number_format': '0', 'alignment': number_alignment},
+        'gib_miktar': {'border': thin_border, 'number_format': '#,##0.00', 'alignment': number_alignment},
+        'gib_toplam_etiket': {'font': Font(bold=True)},
+        'gib_toplam': {'font': Font(bold=True), 'number_format': TUTAR_FORMATI, 'border': thin_border},
+        'gib_ozet': {'font': Font(bold=True, color="2E74B5")}
     }
 
 
+def _start_sheet(wb, title, sheet_title, headers, col_widths):
+    """Başlık, oluşturma tarihi ve kolon başlıklarını yaz (satır 1-4)"""
+    ws = wb.create_sheet(sheet_title)
+    excel_akis.set_column_widths(ws, col_widths)
+    excel_akis.merge(ws, f"A1:{openpyxl.utils.get_column_letter(len(headers))}1")
+    
+    ws.append([excel_akis.cell(ws, title, 'gib_baslik')])
+    ws.append([excel_akis.cell(ws, f"Oluşturma Tarihi: {datetime.now().strftime('%d.%m.%Y %H:%M')}", 'gib_tarih')])
+    ws.append([])
+    ws.append([excel_akis.cell(ws, header, 'gib_kolon') for header in headers])
+    return ws
+
+
+def _finish(wb, output_stream):
+    wb.save(output_stream)
+    if hasattr(output_stream, 'seek'):
+        output_stream.seek(0)
+    return output_stream
+
+
 def generate_gib_ozet_excel(invoices, output_stream=None):
     """
     GİB Özet Liste Excel dosyası oluştur.
     Her fatura = 1 satır.
     
     Args:
-        invoices: Fatura listesi (dict listesi)
-        output_stream: Opsiyonel BytesIO stream. None ise yeni oluşturulur.
+        invoices: Fatura listesi veya tek geçişte okunan iterable
+        output_stream: Opsiyonel yazılabilir stream. None ise yeni BytesIO oluşturulur.
         
     Returns:
-        BytesIO: Excel dosyası içeren stream
+        Excel dosyasının yazıldığı stream
     """
     if not OPENPYXL_AVAILABLE:
         raise ImportError("openpyxl kütüphanesi gerekli: pip install openpyxl")
@@ -63,24 +85,8 @@ def generate_gib_ozet_excel(invoices, output_stream=None):
     if output_stream is None:
         output_stream = io.BytesIO()
     
-    # Silinen faturaları filtrele
-    active_invoices = [inv for inv in invoices if not inv.get('_deleted', False)]
-    
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "GİB Özet Liste"
-    
-    styles = _get_styles()
-    
-    # Başlık satırı
-    ws.merge_cells('A1:I1')
-    ws['A1'] = "GİB İNDİRİLECEK KDV LİSTESİ - ÖZET"
-    ws['A1'].font = styles['title_font']
-    ws['A1'].alignment = styles['title_alignment']
-    
-    # Tarih bilgisi
-    ws['A2'] = f"Oluşturma Tarihi: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-    ws['A2'].font = Font(italic=True, size=9, color="666666")
+    wb = excel_akis.new_workbook(_get_styles())
+    cell = excel_akis.cell
     
     # Kolon başlıkları (Satır 4)
     headers = [
@@ -94,86 +100,60 @@ def generate_gib_ozet_excel(invoices, output_stream=None):
         "İndirilecek KDV",
         "Belge Türü"
     ]
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=4, column=col, value=header)
-        cell.font = styles['header_font']
-        cell.fill = styles['header_fill']
-        cell.alignment = styles['header_alignment']
-        cell.border = styles['thin_border']
-    
-    # Kolon genişlikleri
     col_widths = [15, 22, 15, 40, 22, 12, 18, 18, 12]
-    for i, width in enumerate(col_widths, 1):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(i)].width = width
+    ws = _start_sheet(wb, "GİB İNDİRİLECEK KDV LİSTESİ - ÖZET", "GİB Özet Liste", headers, col_widths)
     
     # Veri satırları
     total_kdv_haric = 0
     total_kdv = 0
     total_indirilen = 0
+    fatura_sayisi = 0
     
-    for row_idx, inv in enumerate(active_invoices, 5):
+    for inv in invoices:
+        # Silinen faturaları atla
+        if inv.get('_deleted', False):
+            continue
+        
         # KDV oranı hesapla
         kdv_haric = float(inv.get('kdv_haric_tutar', 0) or 0)
         kdv = float(inv.get('kdv', 0) or 0)
         kdv_orani = round((kdv / kdv_haric * 100), 0) if kdv_haric > 0 else 0
+        indirilen = float(inv.get('toplam_indirilen_kdv', 0) or 0)
         
         fatura_no = f"{inv.get('seri', '')}{inv.get('sira_no', '')}"
         
-        row_data = [
-            inv.get('tarih', ''),
-            fatura_no,
-            inv.get('satici_vkn', ''),
-            inv.get('satici_unvan', ''),
-            kdv_haric,
-            kdv_orani,
-            kdv,
-            float(inv.get('toplam_indirilen_kdv', 0) or 0),
-            "E-FATURA"
-        ]
-        
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = styles['thin_border']
-            
-            # Sayısal kolonlar için format
-            if col_idx in [5, 7, 8]:  # Tutar kolonları
-                cell.number_format = '#,##0.00 ₺'
-                cell.alignment = styles['number_alignment']
-            elif col_idx == 6:  # KDV oranı
-                cell.number_format = '0'
-                cell.alignment = styles['number_alignment']
+        ws.append([
+            cell(ws, inv.get('tarih', ''), 'gib_hucre'),
+            cell(ws, fatura_no, 'gib_hucre'),
+            cell(ws, inv.get('satici_vkn', ''), 'gib_hucre'),
+            cell(ws, inv.get('satici_unvan', ''), 'gib_hucre'),
+            cell(ws, kdv_haric, 'gib_tutar'),
+            cell(ws, kdv_orani, 'gib_oran'),
+            cell(ws, kdv, 'gib_tutar'),
+            cell(ws, indirilen, 'gib_tutar'),
+            cell(ws, "E-FATURA", 'gib_hucre')
+        ])
         
         total_kdv_haric += kdv_haric
         total_kdv += kdv
-        total_indirilen += float(inv.get('toplam_indirilen_kdv', 0) or 0)
+        total_indirilen += indirilen
+        fatura_sayisi += 1
     
     # Toplam satırı
-    total_row = len(active_invoices) + 5
-    ws.cell(row=total_row, column=4, value="TOPLAM").font = Font(bold=True)
-    
-    total_cells = [
-        (5, total_kdv_haric),
-        (7, total_kdv),
-        (8, total_indirilen)
-    ]
-    
-    for col, value in total_cells:
-        cell = ws.cell(row=total_row, column=col, value=value)
-        cell.font = Font(bold=True)
-        cell.number_format = '#,##0.00 ₺'
-        cell.border = styles['thin_border']
+    ws.append([
+        None, None, None,
+        cell(ws, "TOPLAM", 'gib_toplam_etiket'),
+        cell(ws, total_kdv_haric, 'gib_toplam'),
+        None,
+        cell(ws, total_kdv, 'gib_toplam'),
+        cell(ws, total_indirilen, 'gib_toplam')
+    ])
     
     # Özet bilgi
-    summary_row = total_row + 2
-    ws.cell(row=summary_row, column=1, value=f"Toplam Fatura Sayısı: {len(active_invoices)}")
-    ws.cell(row=summary_row, column=1).font = Font(bold=True, color="2E74B5")
-    
-    # Kaydet
-    wb.save(output_stream)
-    output_stream.seek(0)
+    ws.append([])
+    ws.append([cell(ws, f"Toplam Fatura Sayısı: {fatura_sayisi}", 'gib_ozet')])
     
-    return output_stream
+    return _finish(wb, output_stream)
 
 
 def generate_gib_kalemli_excel(invoices, output_stream=None):
@@ -182,11 +162,11 @@ def generate_gib_kalemli_excel(invoices, output_stream=None):
     Her kalem = 1 satır.
     
     Args:
-        invoices: Fatura listesi (dict listesi)
-        output_stream: Opsiyonel BytesIO stream. None ise yeni oluşturulur.
+        invoices: Fatura listesi veya tek geçişte okunan iterable
+        output_stream: Opsiyonel yazılabilir stream. None ise yeni BytesIO oluşturulur.
         
     Returns:
-        BytesIO: Excel dosyası içeren stream
+        Excel dosyasının yazıldığı stream
     """
     if not OPENPYXL_AVAILABLE:
         raise ImportError("openpyxl kütüphanesi gerekli: pip install openpyxl")
@@ -194,24 +174,8 @@ def generate_gib_kalemli_excel(invoices, output_stream=None):
     if output_stream is None:
         output_stream = io.BytesIO()
     
-    # Silinen faturaları filtrele
-    active_invoices = [inv for inv in invoices if not inv.get('_deleted', False)]
-    
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "GİB Kalem Bazlı"
-    
-    styles = _get_styles()
-    
-    # Başlık satırı
-    ws.merge_cells('A1:K1')
-    ws['A1'] = "GİB İNDİRİLECEK KDV LİSTESİ - KALEM BAZLI"
-    ws['A1'].font = styles['title_font']
-    ws['A1'].alignment = styles['title_alignment']
-    
-    # Tarih bilgisi
-    ws['A2'] = f"Oluşturma Tarihi: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-    ws['A2'].font = Font(italic=True, size=9, color="666666")
+    wb = excel_akis.new_workbook(_get_styles())
+    cell = excel_akis.cell
     
     # Kolon başlıkları (Satır 4)
     headers = [
@@ -227,26 +191,21 @@ def generate_gib_kalemli_excel(invoices, output_stream=None):
         "KDV Oranı (%)",
         "Satır KDV Tutarı"
     ]
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=4, column=col, value=header)
-        cell.font = styles['header_font']
-        cell.fill = styles['header_fill']
-        cell.alignment = styles['header_alignment']
-        cell.border = styles['thin_border']
-    
-    # Kolon genişlikleri
     col_widths = [22, 12, 15, 15, 40, 10, 8, 15, 15, 12, 15]
-    for i, width in enumerate(col_widths, 1):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(i)].width = width
+    ws = _start_sheet(wb, "GİB İNDİRİLECEK KDV LİSTESİ - KALEM BAZLI", "GİB Kalem Bazlı", headers, col_widths)
     
     # Veri satırları
-    current_row = 5
     total_tutar = 0
     total_kdv = 0
     kalem_sayisi = 0
+    fatura_sayisi = 0
     
-    for inv in active_invoices:
+    for inv in invoices:
+        # Silinen faturaları atla
+        if inv.get('_deleted', False):
+            continue
+        fatura_sayisi += 1
+        
         fatura_no = f"{inv.get('seri', '')}{inv.get('sira_no', '')}"
         fatura_tarihi = inv.get('tarih', '')
         satici_vkn = inv.get('satici_vkn', '')
@@ -255,97 +214,62 @@ def generate_gib_kalemli_excel(invoices, output_stream=None):
         
         # Eğer kalem yoksa, fatura özet bilgisiyle tek satır oluştur
         if not kalemler:
-            row_data = [
-                fatura_no,
-                fatura_tarihi,
-                satici_vkn,
-                "",  # Kod
-                inv.get('mal_cinsi', 'MAL/HİZMET'),  # Açıklama
-                inv.get('miktar', '1'),  # Miktar
-                "AD",  # Birim
-                float(inv.get('kdv_haric_tutar', 0) or 0),  # Birim fiyat
-                float(inv.get('kdv_haric_tutar', 0) or 0),  # Satır tutarı
-                20,  # KDV oranı
-                float(inv.get('kdv', 0) or 0)  # KDV tutarı
-            ]
-            
-            for col_idx, value in enumerate(row_data, 1):
-                cell = ws.cell(row=current_row, column=col_idx, value=value)
-                cell.border = styles['thin_border']
-                
-                if col_idx in [8, 9, 11]:  # Tutar kolonları
-                    cell.number_format = '#,##0.00 ₺'
-                    cell.alignment = styles['number_alignment']
-                elif col_idx == 10:  # KDV oranı
-                    cell.number_format = '0'
-                    cell.alignment = styles['number_alignment']
+            kdv_haric = float(inv.get('kdv_haric_tutar', 0) or 0)
+            kdv = float(inv.get('kdv', 0) or 0)
+            ws.append([
+                cell(ws, fatura_no, 'gib_hucre'),
+                cell(ws, fatura_tarihi, 'gib_hucre'),
+                cell(ws, satici_vkn, 'gib_hucre'),
+                cell(ws, "", 'gib_hucre'),  # Kod
+                cell(ws, inv.get('mal_cinsi', 'MAL/HİZMET'), 'gib_hucre'),  # Açıklama
+                cell(ws, inv.get('miktar', '1'), 'gib_hucre'),  # Miktar
+                cell(ws, "AD", 'gib_hucre'),  # Birim
+                cell(ws, kdv_haric, 'gib_tutar'),  # Birim fiyat
+                cell(ws, kdv_haric, 'gib_tutar'),  # Satır tutarı
+                cell(ws, 20, 'gib_oran'),  # KDV oranı
+                cell(ws, kdv, 'gib_tutar')  # KDV tutarı
+            ])
             
-            total_tutar += float(inv.get('kdv_haric_tutar', 0) or 0)
-            total_kdv += float(inv.get('kdv', 0) or 0)
+            total_tutar += kdv_haric
+            total_kdv += kdv
             kalem_sayisi += 1
-            current_row += 1
         else:
             # Her kalem için ayrı satır
             for kalem in kalemler:
-                row_data = [
-                    fatura_no,
-                    fatura_tarihi,
-                    satici_vkn,
-                    kalem.get('urun_kodu', ''),
-                    kalem.get('urun_adi', ''),
-                    kalem.get('miktar', 1),
-                    kalem.get('birim', 'AD'),
-                    float(kalem.get('birim_fiyat', 0) or 0),
-                    float(kalem.get('tutar', 0) or 0),
-                    kalem.get('kdv_orani', 20),
-                    float(kalem.get('kdv_tutari', 0) or 0)
-                ]
+                tutar = float(kalem.get('tutar', 0) or 0)
+                kdv_tutari = float(kalem.get('kdv_tutari', 0) or 0)
+                ws.append([
+                    cell(ws, fatura_no, 'gib_hucre'),
+                    cell(ws, fatura_tarihi, 'gib_hucre'),
+                    cell(ws, satici_vkn, 'gib_hucre'),
+                    cell(ws, kalem.get('urun_kodu', ''), 'gib_hucre'),
+                    cell(ws, kalem.get('urun_adi', ''), 'gib_hucre'),
+                    cell(ws, kalem.get('miktar', 1), 'gib_miktar'),
+                    cell(ws, kalem.get('birim', 'AD'), 'gib_hucre'),
+                    cell(ws, float(kalem.get('birim_fiyat', 0) or 0), 'gib_tutar'),
+                    cell(ws, tutar, 'gib_tutar'),
+                    cell(ws, kalem.get('kdv_orani', 20), 'gib_oran'),
+                    cell(ws, kdv_tutari, 'gib_tutar')
+                ])
                 
-                for col_idx, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=current_row, column=col_idx, value=value)
-                    cell.border = styles['thin_border']
-                    
-                    if col_idx in [8, 9, 11]:  # Tutar kolonları
-                        cell.number_format = '#,##0.00 ₺'
-                        cell.alignment = styles['number_alignment']
-                    elif col_idx == 6:  # Miktar
-                        cell.number_format = '#,##0.00'
-                        cell.alignment = styles['number_alignment']
-                    elif col_idx == 10:  # KDV oranı
-                        cell.number_format = '0'
-                        cell.alignment = styles['number_alignment']
-                
-                total_tutar += float(kalem.get('tutar', 0) or 0)
-                total_kdv += float(kalem.get('kdv_tutari', 0) or 0)
+                total_tutar += tutar
+                total_kdv += kdv_tutari
                 kalem_sayisi += 1
-                current_row += 1
     
     # Toplam satırı
-    total_row = current_row
-    ws.cell(row=total_row, column=8, value="TOPLAM").font = Font(bold=True)
-    
-    total_cells = [
-        (9, total_tutar),
-        (11, total_kdv)
-    ]
-    
-    for col, value in total_cells:
-        cell = ws.cell(row=total_row, column=col, value=value)
-        cell.font = Font(bold=True)
-        cell.number_format = '#,##0.00 ₺'
-        cell.border = styles['thin_border']
+    ws.append([
+        None, None, None, None, None, None, None,
+        cell(ws, "TOPLAM", 'gib_toplam_etiket'),
+        cell(ws, total_tutar, 'gib_toplam'),
+        None,
+        cell(ws, total_kdv, 'gib_toplam')
+    ])
     
     # Özet bilgi
-    summary_row = total_row + 2
-    ws.cell(row=summary_row, column=1, 
-            value=f"Toplam Fatura: {len(active_invoices)} | Toplam Kalem: {kalem_sayisi}")
-    ws.cell(row=summary_row, column=1).font = Font(bold=True, color="2E74B5")
+    ws.append([])
+    ws.append([cell(ws, f"Toplam Fatura: {fatura_sayisi} | Toplam Kalem: {kalem_sayisi}", 'gib_ozet')])
     
-    # Kaydet
-    wb.save(output_stream)
-    output_stream.seek(0)
-    
-    return output_stream
+    return _finish(wb, output_stream)
 
 
 # Test
@@ -0,0 +1,98 @@
+"""
+e-Mutabakat Pro - Ayrıştırılmış Fatura Önbelleği
+Yüklenen her dosya bir kez ayrıştırılır; Excel, web düzenleyici, satış
+listesi ve GİB çıktıları aynı sonuçtan üretilir.
+
+- Anahtar: (dosya SHA-256, ayrıştırıcı türü)
+- Kayıtlar dosyanın bulunduğu upload klasöründe (.snapshots/) JSON olarak
+  tutulur; ZIP ayrıştırılırken oluşan xml_files/gib_html dosyalarıyla
+  birlikte yaşar ve kullanıcı dosyaları temizlenince birlikte silinir
+"""
+
+import os
+import re
+import json
+import tempfile
+
+# Ayrıştırıcı çıktısı değişirse artırılır (eski kayıtlar yok sayılır)
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_DIRNAME = '.snapshots'
+
+# Alış faturaları (kdv_iade_listesi / pdf_invoice_reader)
+KIND_ALIS = 'alis'
+
+
+def satis_kind(own_vkn):
+    """Satış faturası ayrıştırması VKN'ye bağlıdır, türe dahil edilir"""
+    return 'satis-' + re.sub(r'[^0-9A-Za-z]', '', own_vkn or '')
+
+
+def _snapshot_path(file_info, kind):
+    sha256 = file_info.get('sha256')
+    if not sha256:
+        return None
+    folder = os.path.join(os.path.dirname(file_info['path']), SNAPSHOT_DIRNAME)
+    return os.path.join(folder, f"{sha256}.{kind}.json")
+
+
+def load_snapshot(file_info, kind):
+    """
+    Dosyanın ayrıştırılmış faturalarını getir
+
+    Returns: fatura listesi veya None (kayıt yoksa / eskiyse)
+    """
+    path = _snapshot_path(file_info, kind)
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != SNAPSHOT_VERSION:
+        return None
+    return data.get('invoices')
+
+
+def save_snapshot(file_info, kind, invoices):
+    """
+    Ayrıştırılmış faturaları kaydet
+
+    JSON'a birebir çevrilemeyen veri (tarih nesnesi vb.) kaydedilmez;
+    önbellekten dönen sonuç her zaman ayrıştırıcının çıktısıyla aynıdır.
+    """
+    path = _snapshot_path(file_info, kind)
+    if not path:
+        return False
+    try:
+        payload = json.dumps({'version': SNAPSHOT_VERSION, 'invoices': invoices}, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return False
+
+    folder = os.path.dirname(path)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        # Yarım yazılmış dosyayı başka worker okumasın: geçici dosya + rename
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except OSError:
+        return False
+    return True
+
+
+def load_upload_set(files, kind):
+    """
+    Yükleme setinin tamamı önbellekteyse birleşik fatura listesini döndür
+
+    Returns: fatura listesi veya None (herhangi bir dosya ayrıştırılmamışsa)
+    """
+    all_invoices = []
+    for file_info in files:
+        invoices = load_snapshot(file_info, kind)
+        if invoices is None:
+            return None
+        all_invoices.extend(invoices)
+    return all_invoices
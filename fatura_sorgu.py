@@ -0,0 +1,237 @@
+"""
+e-Mutabakat Pro - Fatura Sorgulama
+Web düzenleyicinin fatura listesini sunucu tarafında sayfalar, sıralar,
+filtreler ve arar.
+
+- Veri seti (ayrıştırılmış faturalar) bir kez JSON olarak yazılır; her
+  faturaya sıra numarası `id` olarak verilir
+- Kullanıcı düzenlemeleri (alan değişikliği, silme, ekleme) veritabanında
+  ayrı tutulur ve sorgu sırasında veri setinin üzerine uygulanır
+- Sayfa görüntüsü gibi ağır alanlar veri setine yazılmaz, ayrı URL'den sunulur
+"""
+
+import os
+import json
+import tempfile
+from threading import Lock
+
+from metin_arama import tr_casefold
+
+# Sayı olarak sıralanan/toplanan alanlar
+SAYISAL_ALANLAR = frozenset({
+    'kdv_haric_tutar', 'kdv', 'tevkifat_kdv', 'iki_nolu_kdv',
+    'toplam_indirilen_kdv', 'kdv_orani'
+})
+
+# Özet kartlarında gösterilen toplamlar
+TOPLAM_ALANLARI = ('kdv_haric_tutar', 'kdv', 'tevkifat_kdv', 'iki_nolu_kdv', 'toplam_indirilen_kdv')
+
+# Arama kutusunun baktığı alanlar
+ARAMA_ALANLARI = (
+    'tarih', 'seri', 'sira_no', 'fatura_no', 'satici_unvan', 'satici_vkn',
+    'alici_unvan', 'alici_vkn', 'mal_cinsi', 'miktar', 'kdv_donemi', 'ggb_tescil_no'
+)
+
+# Veri setine yazılmayan alanlar
+AGIR_ALANLAR = frozenset({'page_image'})
+
+VARSAYILAN_SAYFA_BOYUTU = 100
+MAX_SAYFA_BOYUTU = 500
+
+# Süreç içi önbellek: yol -> (mtime, satırlar, arama metinleri)
+_dataset_cache = {}
+_cache_lock = Lock()
+
+
+def to_number(value):
+    """Düzenleyiciden gelen değeri sayıya çevir ("1.234,56" dahil)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or '').strip()
+    if not text:
+        return 0.0
+    if ',' in text:
+        text = text.replace('.', '').replace(',', '.')
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+def _search_text(row):
+    return tr_casefold(' '.join(str(row.get(alan) or '') for alan in ARAMA_ALANLARI))
+
+
+def save_dataset(path, invoices):
+    """Faturaları id vererek veri seti dosyasına yaz, satır sayısını döndür"""
+    rows = []
+    for idx, inv in enumerate(invoices):
+        row = {key: value for key, value in inv.items() if key not in AGIR_ALANLAR}
+        row['id'] = idx
+        rows.append(row)
+
+    folder = os.path.dirname(path) or '.'
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(rows, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+def load_dataset(path):
+    """
+    Veri setini oku (dosya değişmediyse süreç içi önbellekten)
+
+    Returns: (satırlar, arama metinleri) veya None
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    with _cache_lock:
+        cached = _dataset_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    search = [_search_text(row) for row in rows]
+
+    with _cache_lock:
+        _dataset_cache[path] = (mtime, rows, search)
+    return rows, search
+
+
+class FaturaGorunumu:
+    """
+    Veri seti + kullanıcı düzenlemeleri
+
+    edits: {id: {'fields': {...}, 'deleted': bool, 'added': bool}}
+    Eklenen faturalar 'fields' içinde tam fatura olarak tutulur.
+    """
+
+    def __init__(self, rows, search, edits):
+        self.rows = rows
+        self.search = search
+        self.edits = edits or {}
+
+    def iter_rows(self, include_deleted=False):
+        """(satır, arama metni, silindi mi) üret; düzenlenen satırlar kopyalanır"""
+        edits = self.edits
+        for row, text in zip(self.rows, self.search):
+            edit = edits.get(row['id'])
+            if edit is None:
+                yield row, text, False
+                continue
+            if edit['deleted'] and not include_deleted:
+                continue
+            merged = dict(row)
+            merged.update(edit['fields'])
+            yield merged, _search_text(merged), edit['deleted']
+
+        added = sorted((inv_id, edit) for inv_id, edit in edits.items() if edit['added'])
+        for inv_id, edit in added:
+            if edit['deleted'] and not include_deleted:
+                continue
+            merged = dict(edit['fields'])
+            merged['id'] = inv_id
+            yield merged, _search_text(merged), edit['deleted']
+
+    def active(self):
+        """Silinmemiş faturalar (dışa aktarım için)"""
+        for row, _, _ in self.iter_rows():
+            yield row
+
+    def get(self, inv_id):
+        """Tek fatura (düzenlemeler uygulanmış) veya None"""
+        edit = self.edits.get(inv_id)
+        if edit is not None and edit['added']:
+            merged = dict(edit['fields'])
+            merged['id'] = inv_id
+            return merged
+        if not 0 <= inv_id < len(self.rows):
+            return None
+        row = self.rows[inv_id]
+        if edit is None:
+            return row
+        merged = dict(row)
+        merged.update(edit['fields'])
+        return merged
+
+    def with_diff(self, changes=None, deleted=(), restored=()):
+        """
+        İstemcinin henüz kaydedilmemiş farkı (id bazlı) uygulanmış yeni görünüm
+
+        Veri seti kopyalanmaz; sadece farkta geçen id'lerin düzenleme kaydı
+        yenilenir. Bilinmeyen id'ler yok sayılır. Fark kalıcı olarak kaydedilmez.
+        """
+        edits = dict(self.edits)
+
+        def edit_for(inv_id):
+            edit = edits.get(inv_id)
+            if edit is None:
+                edit = {'fields': {}, 'deleted': False, 'added': False}
+            else:
+                edit = {'fields': dict(edit['fields']), 'deleted': edit['deleted'], 'added': edit['added']}
+            edits[inv_id] = edit
+            return edit
+
+        for inv_id, fields in (changes or {}).items():
+            if self.get(inv_id) is None:
+                continue
+            edit_for(inv_id)['fields'].update(
+                (key, value) for key, value in fields.items()
+                if key != 'id' and key not in AGIR_ALANLAR
+            )
+        for inv_id, flag in [(i, True) for i in deleted] + [(i, False) for i in restored]:
+            if self.get(inv_id) is not None:
+                edit_for(inv_id)['deleted'] = flag
+
+        return FaturaGorunumu(self.rows, self.search, edits)
+
+    def query(self, page=1, per_page=VARSAYILAN_SAYFA_BOYUTU, sort=None, order='asc', q=''):
+        """
+        Arama + sıralama + sayfalama
+
+        Toplamlar aramadan bağımsız olarak tüm aktif faturalar üzerinden hesaplanır
+        (özet kartları). per_page=0 ise sadece toplamlar döner.
+        """
+        per_page = max(0, min(int(per_page), MAX_SAYFA_BOYUTU))
+        needle = tr_casefold(q.strip()) if q else ''
+
+        totals = {alan: 0.0 for alan in TOPLAM_ALANLARI}
+        count = 0
+        matched = []
+        for row, text, _ in self.iter_rows():
+            count += 1
+            for alan in TOPLAM_ALANLARI:
+                totals[alan] += to_number(row.get(alan))
+            if per_page and (not needle or needle in text):
+                matched.append(row)
+        totals = {alan: round(value, 2) for alan, value in totals.items()}
+        totals['count'] = count
+
+        if per_page and sort:
+            if sort in SAYISAL_ALANLAR:
+                key = lambda r: to_number(r.get(sort))
+            elif sort == 'fatura_no':
+                key = lambda r: tr_casefold(str(r.get('seri') or '') + str(r.get('sira_no') or ''))
+            else:
+                key = lambda r: tr_casefold(str(r.get(sort) or ''))
+            matched.sort(key=key, reverse=(order == 'desc'))
+
+        total = len(matched)
+        pages = max(1, -(-total // per_page)) if per_page else 1
+        page = max(1, min(int(page), pages))
+        start = (page - 1) * per_page
+
+        return {
+            'rows': matched[start:start + per_page] if per_page else [],
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': pages,
+            'totals': totals
+        }
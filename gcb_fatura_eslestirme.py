@@ -11,11 +11,15 @@ Gümrük Çıkış Beyannameleri ile Satış Faturalarını Eşleştir
 
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime
+from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
+from collections import deque
 import json
 import os
 import re
 
+from metin_arama import FaturaNoIndeksi
+
 
 @dataclass
 class GumrukBeyannamesi:
@@ -162,51 +166,85 @@ class GCBFaturaEslestirici:
             "ozet": {}
         }
         
+        # Faturaları bir kez normalize et: numara indeksi + tutara göre sıralı indeks
+        fatura_nolari = [f.get('seri', '') + f.get('sira_no', '') for f in satis_faturalari]
+        no_indeksi = FaturaNoIndeksi()
+        for i, fatura_no in enumerate(fatura_nolari):
+            normal = self._fatura_no_normalize(fatura_no)
+            if normal not in no_indeksi:  # aynı numarada ilk fatura geçerli
+                no_indeksi.add(normal, i)
+        
+        tutar_sirali = sorted(
+            (float(f.get('kdv_haric_tutar', 0)), i) for i, f in enumerate(satis_faturalari)
+        )
+        tutarlar = [t for t, _ in tutar_sirali]
+        fatura_tarihleri = [self._parse_tarih(f.get('tarih', '')) for f in satis_faturalari]
+        
         eslestirilen_faturalar = set()
+        gcb_eslesmeleri: Dict[int, GCBEslestirmeSonucu] = {}
         
-        for gcb in self.gcbler:
-            eslesme_bulundu = False
-            
-            for fatura in satis_faturalari:
-                fatura_no = fatura.get('seri', '') + fatura.get('sira_no', '')
-                
-                # 1. GÇB içinde fatura numarası var mı?
-                if gcb.fatura_no and self._fatura_no_esles(gcb.fatura_no, fatura_no):
-                    eslesme = self._eslestirme_olustur(gcb, fatura)
-                    sonuc["eslestirilen"].append(eslesme)
-                    eslestirilen_faturalar.add(fatura_no)
-                    gcb.eslestirildi = True
-                    gcb.eslestirilen_faturalar.append(fatura_no)
-                    eslesme_bulundu = True
-                    
-                    # Tutar kontrolü
-                    if eslesme.tutar_farki_yuzde > self.TUTAR_TOLERANS_YUZDE:
-                        sonuc["tutar_uyumsuz"].append(eslesme)
-                    break
+        # 1. GÇB içinde fatura numarası var mı? (hash + Aho-Corasick)
+        for g_idx, gcb in enumerate(self.gcbler):
+            if not gcb.fatura_no:
+                continue
+            normal = self._fatura_no_normalize(gcb.fatura_no)
+            fatura_idx = no_indeksi.find_related(normal) if normal else None
+            if fatura_idx is None:
+                continue
             
-            # 2. Fatura numarası yoksa tutar ve tarih ile eşleştir
-            if not eslesme_bulundu:
-                for fatura in satis_faturalari:
-                    fatura_no = fatura.get('seri', '') + fatura.get('sira_no', '')
-                    if fatura_no in eslestirilen_faturalar:
-                        continue
-                    
-                    fatura_tutari = float(fatura.get('kdv_haric_tutar', 0))
-                    
-                    # Tutar yakın mı?
-                    if self._tutar_yakin_mi(gcb.tl_tutari, fatura_tutari):
-                        # Tarih uygun mu?
-                        if self._tarih_uygun_mu(gcb.beyanname_tarihi, fatura.get('tarih', '')):
-                            eslesme = self._eslestirme_olustur(gcb, fatura)
-                            eslesme.eslestirme_tipi = "tutar_tarih"
-                            sonuc["eslestirilen"].append(eslesme)
-                            eslestirilen_faturalar.add(fatura_no)
-                            gcb.eslestirildi = True
-                            gcb.eslestirilen_faturalar.append(fatura_no)
-                            eslesme_bulundu = True
-                            break
+            fatura = satis_faturalari[fatura_idx]
+            fatura_no = fatura_nolari[fatura_idx]
+            eslesme = self._eslestirme_olustur(gcb, fatura)
+            gcb_eslesmeleri[g_idx] = eslesme
+            eslestirilen_faturalar.add(fatura_no)
+            gcb.eslestirildi = True
+            gcb.eslestirilen_faturalar.append(fatura_no)
             
-            if not eslesme_bulundu:
+            # Tutar kontrolü
+            if eslesme.tutar_farki_yuzde > self.TUTAR_TOLERANS_YUZDE:
+                sonuc["tutar_uyumsuz"].append(eslesme)
+        
+        # 2. Fatura numarası yoksa tutar ve tarih ile eşleştir
+        # Her GÇB için aday faturalar ikili arama ile tutar penceresinden alınır
+        adaylar: Dict[int, List[Tuple[str, int]]] = {}
+        for g_idx, gcb in enumerate(self.gcbler):
+            if g_idx in gcb_eslesmeleri:
+                continue
+            gcb_dt = self._parse_tarih(gcb.beyanname_tarihi)
+            alt, ust = self._tutar_penceresi(gcb.tl_tutari)
+            sirali = []
+            for k in range(bisect_left(tutarlar, alt), bisect_right(tutarlar, ust)):
+                fatura_tutari, f_idx = tutar_sirali[k]
+                fatura_no = fatura_nolari[f_idx]
+                if fatura_no in eslestirilen_faturalar:
+                    continue
+                if not self._tutar_yakin_mi(gcb.tl_tutari, fatura_tutari):
+                    continue
+                fatura_dt = fatura_tarihleri[f_idx]
+                # GÇB, faturadan önce olamaz (max 30 gün erken olabilir)
+                if gcb_dt and fatura_dt and gcb_dt < fatura_dt - timedelta(days=30):
+                    continue
+                sirali.append((abs(gcb.tl_tutari - fatura_tutari), f_idx, fatura_no))
+            if sirali:
+                # En yakın tutar önce denenir
+                sirali.sort()
+                adaylar[g_idx] = [(fatura_no, f_idx) for _, f_idx, fatura_no in sirali]
+        
+        for g_idx, f_idx in self._birebir_atama(adaylar).items():
+            gcb = self.gcbler[g_idx]
+            fatura = satis_faturalari[f_idx]
+            fatura_no = fatura_nolari[f_idx]
+            eslesme = self._eslestirme_olustur(gcb, fatura)
+            eslesme.eslestirme_tipi = "tutar_tarih"
+            gcb_eslesmeleri[g_idx] = eslesme
+            eslestirilen_faturalar.add(fatura_no)
+            gcb.eslestirildi = True
+            gcb.eslestirilen_faturalar.append(fatura_no)
+        
+        for g_idx, gcb in enumerate(self.gcbler):
+            if g_idx in gcb_eslesmeleri:
+                sonuc["eslestirilen"].append(gcb_eslesmeleri[g_idx])
+            else:
                 sonuc["eslestirmeyen_gcb"].append({
                     "gcb_no": gcb.beyanname_no,
                     "gcb_tarihi": gcb.beyanname_tarihi,
@@ -215,8 +253,7 @@ class GCBFaturaEslestirici:
                 })
         
         # Eşleşmeyen faturaları bul
-        for fatura in satis_faturalari:
-            fatura_no = fatura.get('seri', '') + fatura.get('sira_no', '')
+        for fatura, fatura_no in zip(satis_faturalari, fatura_nolari):
             if fatura_no not in eslestirilen_faturalar:
                 # Sadece ihracat faturalarını kontrol et
                 alici_ulke = fatura.get('alici_ulke', 'TR')
@@ -244,14 +281,101 @@ class GCBFaturaEslestirici:
         self._kaydet()
         return sonuc
     
+    def _fatura_no_normalize(self, fatura_no: str) -> str:
+        """Fatura numarasını karşılaştırma için normalize et"""
+        return re.sub(r'[^A-Z0-9]', '', fatura_no.upper())
+    
     def _fatura_no_esles(self, gcb_fatura: str, fatura_no: str) -> bool:
         """Fatura numaralarını karşılaştır"""
-        # Normalize et
-        g = re.sub(r'[^A-Z0-9]', '', gcb_fatura.upper())
-        f = re.sub(r'[^A-Z0-9]', '', fatura_no.upper())
+        g = self._fatura_no_normalize(gcb_fatura)
+        f = self._fatura_no_normalize(fatura_no)
         
         return g == f or g in f or f in g
     
+    def _tutar_penceresi(self, gcb_tutar: float) -> Tuple[float, float]:
+        """_tutar_yakin_mi ile uyumlu olabilecek fatura tutarı aralığı"""
+        oran = self.TUTAR_TOLERANS_YUZDE / 100
+        alt = gcb_tutar - max(self.TUTAR_TOLERANS_TL, gcb_tutar * oran)
+        ust = max(gcb_tutar + self.TUTAR_TOLERANS_TL, gcb_tutar / (1 - oran))
+        # Kayan nokta payı - kesin kontrol _tutar_yakin_mi ile yapılır
+        return alt - 0.01, ust + 0.01
+    
+    def _birebir_atama(self, adaylar: Dict[int, List[Tuple[str, int]]]) -> Dict[int, int]:
+        """
+        GÇB -> fatura bire bir atama (Hopcroft-Karp)
+        
+        Her GÇB önce boştaki en yakın tutarlı adayı alır; kalan GÇB'ler için
+        en kısa artırma yolları aşama aşama bulunur ve önceki GÇB'ler başka
+        adaylarına kaydırılır. Böylece eşleşen GÇB sayısı en çoğa çıkar;
+        süre O(E·√V) (E: aday sayısı, V: GÇB + fatura). Adaylar yine en
+        yakın tutardan başlayarak denenir. Aynı numaralı faturalar tek
+        fatura sayılır.
+        
+        Returns: {gcb_idx: fatura_idx}
+        """
+        sahip: Dict[str, Tuple[int, int]] = {}  # fatura_no -> (gcb_idx, fatura_idx)
+        
+        for g_idx in adaylar:
+            # Hızlı yol: boştaki ilk aday
+            for fatura_no, f_idx in adaylar[g_idx]:
+                if fatura_no not in sahip:
+                    sahip[fatura_no] = (g_idx, f_idx)
+                    break
+        
+        while True:
+            # BFS: boştaki GÇB'lerden boş faturaya en kısa yolların katmanları
+            eslesen = {g for g, _ in sahip.values()}
+            bostakiler = [g for g in adaylar if g not in eslesen]
+            mesafe: Dict[int, Optional[int]] = {g: 0 for g in bostakiler}
+            kuyruk = deque(bostakiler)
+            sinir = None
+            while kuyruk:
+                g = kuyruk.popleft()
+                if sinir is not None and mesafe[g] >= sinir:
+                    continue
+                for fatura_no, _ in adaylar[g]:
+                    mevcut = sahip.get(fatura_no)
+                    if mevcut is None:
+                        if sinir is None:
+                            sinir = mesafe[g] + 1
+                    elif mevcut[0] not in mesafe:
+                        mesafe[mevcut[0]] = mesafe[g] + 1
+                        kuyruk.append(mevcut[0])
+            if sinir is None:
+                break
+            
+            for g_idx in bostakiler:
+                self._artirma_yolu(g_idx, adaylar, sahip, mesafe)
+        
+        return {g_idx: f_idx for g_idx, f_idx in sahip.values()}
+    
+    @staticmethod
+    def _artirma_yolu(g_idx: int, adaylar: Dict[int, List[Tuple[str, int]]],
+                      sahip: Dict[str, Tuple[int, int]], mesafe: Dict[int, Optional[int]]) -> bool:
+        """Katmanlar boyunca artırma yolu ara (özyinelemesiz DFS - uzun zincirlerde yığın taşmasın)"""
+        yigin = [(g_idx, iter(adaylar[g_idx]))]
+        yol: List[Tuple[int, str, int]] = []
+        while yigin:
+            g, aday_iter = yigin[-1]
+            for fatura_no, f_idx in aday_iter:
+                mevcut = sahip.get(fatura_no)
+                if mevcut is None:
+                    yol.append((g, fatura_no, f_idx))
+                    for yol_g, yol_no, yol_f in yol:
+                        sahip[yol_no] = (yol_g, yol_f)
+                    return True
+                if mesafe.get(mevcut[0]) == mesafe[g] + 1:
+                    yol.append((g, fatura_no, f_idx))
+                    yigin.append((mevcut[0], iter(adaylar[mevcut[0]])))
+                    break
+            else:
+                # Çıkmaz: bu aşamada bu GÇB bir daha denenmez
+                mesafe[g] = None
+                yigin.pop()
+                if yol:
+                    yol.pop()
+        return False
+    
     def _tutar_yakin_mi(self, gcb_tutar: float, fatura_tutar: float) -> bool:
         """Tutarlar yakın mı kontrol et"""
         if gcb_tutar == 0 or fatura_tutar == 0:
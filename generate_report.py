@@ -6,6 +6,8 @@ import base64
 import zipfile
 import io
 
+from metin_arama import AnahtarKelimeTarayici
+
 # Import GIB viewer for XSLT transformation
 try:
     from gib_viewer import transform_invoice_to_html
@@ -180,18 +182,51 @@ def get_gib_html_for_invoice(invoice_no: str, zip_paths: list = None, output_dir
     return None
 
 
+# KKEG risk kuralları (sıra önemli - ilk eşleşen kural döner)
+KKEG_RISK_RULES = {
+    'YÜKSEK - Ceza/Tazminat': ['ceza', 'para cezası', 'trafik cez', 'vergi cez', 'sgk ceza', 'tazminat', 'gecikme zammı'],
+    'YÜKSEK - Kişisel Gider': ['kişisel', 'özel', 'ev kirası', 'konut', 'şahsi', 'eş', 'çocuk'],
+    'ORTA - Seyahat/Konaklama': ['otel', 'konaklama', 'uçak', 'bilet', 'thy', 'pegasus', 'taksi', 'transfer', 'hilton', 'marriott', 'wyndham'],
+    'ORTA - Temsil/Ağırlama': ['yemek', 'restoran', 'lokanta', 'hediye', 'temsil', 'ağırlama', 'ikram', 'cafe', 'kahve'],
+    'DÜŞÜK - Bağış': ['bağış', 'yardım', 'hayır', 'dernek', 'vakıf'],
+    'DÜŞÜK - Araç Gideri': ['akaryakıt', 'benzin', 'mazot', 'otopark', 'hgs', 'ogs', 'köprü', 'shell', 'opet', 'bp', 'petrol']
+}
+
+# Tüm kurallar için tek geçişli tarayıcı (modül yüklenirken bir kez derlenir)
+KKEG_RISK_SCANNER = AnahtarKelimeTarayici(KKEG_RISK_RULES)
+
+
 # KKEG Risk Tespit Fonksiyonu
 def detect_kkeg_risk(description: str, acc_code: str = "", invoice_data: dict = None) -> tuple:
     """
     Açıklama, hesap kodu ve fatura içeriğinden KKEG riski tespit et.
     Returns: (risk_level, risk_reason) veya (None, None)
     """
-    # Tüm metinleri birleştir
+    # KKEG sadece GİDER/MALİYET hesaplarında olabilir
+    # 600/601/602 = SATIŞ (HASILAT) hesapları - bunlar gider değil!
+    # 620-689 = Maliyet hesapları (SMM, Üretim, Finansman, Olağandışı)
+    # 7xx = Dönem giderleri (760 Pazarlama, 770 Genel Yönetim, 780 Finansman)
+    
+    is_expense_account = False
+    if acc_code:
+        if acc_code.startswith('7'):
+            # Tüm 7xx hesaplar gider
+            is_expense_account = True
+        elif acc_code.startswith('6'):
+            # 6xx'de sadece 620+ hesapları gider (600/601/602 satış - hariç)
+            if not acc_code.startswith(('600', '601', '602', '603')):
+                is_expense_account = True
+    
+    # Eğer gider/maliyet hesabı değilse KKEG riski yok
+    if not is_expense_account:
+        return (None, None)
+    
+    # Tüm metinleri topla
     texts_to_check = []
     
     # Yevmiye açıklaması
     if description:
-        texts_to_check.append(description.lower())
+        texts_to_check.append(description)
     
     # Fatura içeriği
     if invoice_data:
@@ -199,53 +234,25 @@ def detect_kkeg_risk(description: str, acc_code: str = "", invoice_data: dict =
         items = invoice_data.get('Items', [])
         for item in items:
             if item.get('Name'):
-                texts_to_check.append(str(item.get('Name', '')).lower())
+                texts_to_check.append(str(item.get('Name', '')))
             if item.get('Description'):
-                texts_to_check.append(str(item.get('Description', '')).lower())
+                texts_to_check.append(str(item.get('Description', '')))
         
         # Fatura notları
         notes = invoice_data.get('Notes', [])
         for note in notes:
             if note:
-                texts_to_check.append(str(note).lower())
+                texts_to_check.append(str(note))
         
         # Gönderen ismi (bazen fatura kaynağı bilgi verir)
         sender = invoice_data.get('Sender', {})
         if sender.get('Name'):
-            texts_to_check.append(str(sender.get('Name', '')).lower())
-    
-    combined_text = ' '.join(texts_to_check)
-    
-    kkeg_rules = {
-        'YÜKSEK - Ceza/Tazminat': ['ceza', 'para cezası', 'trafik cez', 'vergi cez', 'sgk ceza', 'tazminat', 'gecikme zammı'],
-        'YÜKSEK - Kişisel Gider': ['kişisel', 'özel', 'ev kirası', 'konut', 'şahsi', 'eş', 'çocuk'],
-        'ORTA - Seyahat/Konaklama': ['otel', 'konaklama', 'uçak', 'bilet', 'thy', 'pegasus', 'taksi', 'transfer', 'hilton', 'marriott', 'wyndham'],
-        'ORTA - Temsil/Ağırlama': ['yemek', 'restoran', 'lokanta', 'hediye', 'temsil', 'ağırlama', 'ikram', 'cafe', 'kahve'],
-        'DÜŞÜK - Bağış': ['bağış', 'yardım', 'hayır', 'dernek', 'vakıf'],
-        'DÜŞÜK - Araç Gideri': ['akaryakıt', 'benzin', 'mazot', 'otopark', 'hgs', 'ogs', 'köprü', 'shell', 'opet', 'bp', 'petrol']
-    }
-    
-    # KKEG sadece GİDER/MALİYET hesaplarında olabilir
-    # 600/601/602 = SATIŞ (HASILAT) hesapları - bunlar gider değil!
-    # 620-689 = Maliyet hesapları (SMM, Üretim, Finansman, Olağandışı)
-    # 7xx = Dönem giderleri (760 Pazarlama, 770 Genel Yönetim, 780 Finansman)
-    
-    is_expense_account = False
-    if acc_code:
-        if acc_code.startswith('7'):
-            # Tüm 7xx hesaplar gider
-            is_expense_account = True
-        elif acc_code.startswith('6'):
-            # 6xx'de sadece 620+ hesapları gider (600/601/602 satış - hariç)
-            if not acc_code.startswith(('600', '601', '602', '603')):
-                is_expense_account = True
-    
-    # Eğer gider/maliyet hesabı değilse KKEG riski yok
-    if not is_expense_account:
-        return (None, None)
+            texts_to_check.append(str(sender.get('Name', '')))
     
-    for risk_reason, keywords in kkeg_rules.items():
-        if any(kw in combined_text for kw in keywords):
+    # Tek geçişte tüm kurallar taranır, ilk sıradaki eşleşen kural döner
+    hits = KKEG_RISK_SCANNER.tara(*texts_to_check)
+    for risk_reason in KKEG_RISK_RULES:
+        if risk_reason in hits:
             return (risk_reason.split(' - ')[0], risk_reason.split(' - ')[1])
     
     # Gider/maliyet hesabı ama anahtar kelime yok
@@ -5,6 +5,10 @@ Supports automatic XSLT selection based on document type and metadata extraction
 """
 
 import os
+import json
+import hashlib
+import tempfile
+import threading
 from lxml import etree
 from typing import Dict, Optional, Tuple
 from pathlib import Path
@@ -167,6 +171,118 @@ def extract_metadata(xml_doc: etree._Element) -> Dict[str, any]:
     return metadata
 
 
+# Derlenmiş XSLT'ler thread başına tutulur (lxml XSLT nesneleri thread'ler arasında paylaşılmaz)
+_xslt_local = threading.local()
+
+
+def get_xslt_transform(xslt_path: str) -> etree.XSLT:
+    """
+    XSLT'yi derle ve sakla; dosya değişmedikçe tekrar derlenmez.
+    """
+    cache = getattr(_xslt_local, 'cache', None)
+    if cache is None:
+        cache = _xslt_local.cache = {}
+    mtime = os.path.getmtime(xslt_path)
+    cached = cache.get(xslt_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    transform = etree.XSLT(etree.parse(xslt_path))
+    cache[xslt_path] = (mtime, transform)
+    return transform
+
+
+def xslt_fingerprint() -> str:
+    """
+    Şablon dosyalarının (ad, mtime) özeti; şablon güncellenince önbellek anahtarı değişir.
+    """
+    parts = []
+    for path in (XSLT_INVOICE, XSLT_DESPATCH, XSLT_RECEIPT, XSLT_MUSTAHSIL, XSLT_SIMPLE):
+        try:
+            parts.append(f"{os.path.basename(path)}:{os.path.getmtime(path)}")
+        except OSError:
+            parts.append(f"{os.path.basename(path)}:-")
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:8]
+
+
+def cache_key(xml_sha256: str) -> str:
+    """
+    XML içerik özetinden önbellek anahtarı / ETag üret.
+    """
+    return f"{xml_sha256[:32]}-{xslt_fingerprint()}"
+
+
+def get_invoice_metadata(xml_bytes: bytes) -> Dict:
+    """
+    Sadece metadata çıkar (XSLT dönüşümü yapılmaz).
+    """
+    return extract_metadata(etree.fromstring(xml_bytes))
+
+
+def _read_cache(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cache(path: str, content: str) -> None:
+    folder = os.path.dirname(path)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[WARNING] GIB önbelleğe yazılamadı: {e}")
+
+
+def render_invoice_cached(xml_path: str, cache_dir: str, key: str) -> str:
+    """
+    XML faturasının HTML görüntüsünü önbellekten getir, yoksa dönüştürüp kaydet.
+    
+    Args:
+        xml_path: XML dosya yolu
+        cache_dir: Önbellek klasörü
+        key: cache_key() ile üretilmiş anahtar
+        
+    Returns:
+        HTML string (dönüşüm hatası önbelleğe yazılmaz, exception fırlatılır)
+    """
+    html_path = os.path.join(cache_dir, f"{key}.html")
+    html_output = _read_cache(html_path)
+    if html_output is not None:
+        return html_output
+    
+    with open(xml_path, 'rb') as f:
+        xml_doc = etree.fromstring(f.read())
+    transform = get_xslt_transform(select_xslt_template(xml_doc))
+    html_output = str(transform(xml_doc))
+    
+    _write_cache(html_path, html_output)
+    return html_output
+
+
+def metadata_cached(xml_path: str, cache_dir: str, key: str) -> Dict:
+    """
+    XML faturasının metadata'sını önbellekten getir, yoksa çıkarıp kaydet (XSLT yok).
+    """
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+    cached = _read_cache(meta_path)
+    if cached is not None:
+        try:
+            return json.loads(cached)
+        except ValueError:
+            pass
+    
+    with open(xml_path, 'rb') as f:
+        metadata = get_invoice_metadata(f.read())
+    
+    _write_cache(meta_path, json.dumps(metadata, ensure_ascii=False))
+    return metadata
+
+
 def transform_invoice_to_html(xml_content: str, xslt_path: str = None) -> Tuple[str, Dict]:
     """
     Transform an invoice XML to HTML using the GIB XSLT stylesheet.
@@ -190,9 +306,8 @@ def transform_invoice_to_html(xml_content: str, xslt_path: str = None) -> Tuple[
             xslt_path = select_xslt_template(xml_doc)
             print(f"[INFO] Using XSLT: {Path(xslt_path).name}")
         
-        # Parse XSLT
-        xslt_doc = etree.parse(xslt_path)
-        transform = etree.XSLT(xslt_doc)
+        # Parse XSLT (derlenmiş şablon tekrar kullanılır)
+        transform = get_xslt_transform(xslt_path)
         
         # Apply transformation
         result = transform(xml_doc)
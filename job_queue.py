@@ -0,0 +1,315 @@
+"""
+e-Mutabakat Pro - Arka Plan İş Kuyruğu
+Uzun süren fatura işleme (ZIP/XML/PDF) işlerini HTTP isteği dışında çalıştırır
+
+- İş durumu, ilerleme ve log satırları SQLite'ta (jobs.db) tutulur;
+  tüm gunicorn worker'ları aynı durumu görür
+- İşler, işi kabul eden worker'daki yerel thread havuzunda çalışır
+- İptal isteği veritabanına yazılır, iş bir sonraki kontrol noktasında durur
+- Çalışan iş heartbeat ile tazelenir; bitmiş işin durumu bir daha değişmez
+"""
+
+import os
+import json
+import uuid
+import time
+import sqlite3
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread
+
+# Veritabanı dosyası
+JOBS_DB_PATH = os.path.join(os.path.dirname(__file__), 'jobs.db')
+
+# Worker başına eşzamanlı iş sayısı
+MAX_WORKERS = int(os.environ.get('EMP_JOB_WORKERS', '2'))
+
+# Bu süre boyunca updated_at'i ilerlemeyen "running" iş yarıda kalmış sayılır
+STALE_SECONDS = 600
+
+# Çalışan iş, ilerleme yazmasa da bu aralıkla updated_at'i tazeler
+HEARTBEAT_SECONDS = 60
+
+# Bitmiş işlerin saklanma süresi
+RETENTION_SECONDS = 24 * 3600
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+_executor = None
+_executor_lock = Lock()
+
+
+class JobCancelled(Exception):
+    """Kullanıcı işi iptal etti"""
+
+
+def _connect():
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA busy_timeout = 30000')
+    return conn
+
+
+def init_jobs_db():
+    """İş tablolarını oluştur, eski işleri temizle"""
+    conn = _connect()
+    try:
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                user_id TEXT,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress_done INTEGER DEFAULT 0,
+                progress_total INTEGER DEFAULT 0,
+                current_item TEXT DEFAULT '',
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS job_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                line TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_job_logs_job ON job_logs (job_id, id)')
+
+        cutoff = time.time() - RETENTION_SECONDS
+        conn.execute('DELETE FROM job_logs WHERE job_id IN (SELECT id FROM jobs WHERE updated_at < ?)', (cutoff,))
+        conn.execute('DELETE FROM jobs WHERE updated_at < ?', (cutoff,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='emp-job')
+        return _executor
+
+
+class JobContext:
+    """
+    Çalışan işe verilen yardımcı
+
+    İş fonksiyonu log(), progress() ve check_cancelled() ile durumunu bildirir.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._last_cancel_check = 0.0
+        self._cancelled = False
+
+    def log(self, line):
+        """Log satırı ekle (istemci /jobs/<id> ile artımlı okur)"""
+        now = time.time()
+        conn = _connect()
+        try:
+            conn.execute('INSERT INTO job_logs (job_id, line, created_at) VALUES (?, ?, ?)',
+                         (self.job_id, str(line), now))
+            conn.execute('UPDATE jobs SET updated_at = ? WHERE id = ?', (now, self.job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def progress(self, done, total, current_item=None):
+        """İlerlemeyi güncelle ve iptal isteğini kontrol et"""
+        conn = _connect()
+        try:
+            if current_item is None:
+                conn.execute('UPDATE jobs SET progress_done = ?, progress_total = ?, updated_at = ? WHERE id = ?',
+                             (done, total, time.time(), self.job_id))
+            else:
+                conn.execute('''UPDATE jobs SET progress_done = ?, progress_total = ?, current_item = ?,
+                                updated_at = ? WHERE id = ?''',
+                             (done, total, str(current_item), time.time(), self.job_id))
+            conn.commit()
+        finally:
+            conn.close()
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        """İptal istendiyse JobCancelled fırlat (en fazla saniyede bir DB okur)"""
+        if self._cancelled:
+            raise JobCancelled()
+        now = time.time()
+        if now - self._last_cancel_check < 1.0:
+            return
+        self._last_cancel_check = now
+        conn = _connect()
+        try:
+            row = conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (self.job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row and row['cancel_requested']:
+            self._cancelled = True
+            raise JobCancelled()
+
+    def page_callback(self, label):
+        """pdf_invoice_reader progress_callback(current, total) için sarmalayıcı"""
+        def callback(current, total):
+            self.progress(current, total, f"{label} - sayfa {current}/{total}")
+        return callback
+
+
+def _set_status(job_id, status, **fields):
+    """
+    Durumu güncelle; bitmiş (done/failed/cancelled) iş değiştirilmez
+
+    Returns: güncellendiyse True
+    """
+    assignments = ['status = ?', 'updated_at = ?']
+    values = [status, time.time()]
+    for key, value in fields.items():
+        assignments.append(f'{key} = ?')
+        values.append(value)
+    values.append(job_id)
+    values.extend(FINISHED_STATUSES)
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ? "
+            f"AND status NOT IN ({', '.join('?' * len(FINISHED_STATUSES))})",
+            values
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+
+def _heartbeat(job_id, stop):
+    """İş sürdükçe updated_at'i tazele (uzun adımlar yarıda kalmış sayılmasın)"""
+    while not stop.wait(HEARTBEAT_SECONDS):
+        try:
+            conn = _connect()
+            try:
+                conn.execute('UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ?',
+                             (time.time(), job_id, STATUS_RUNNING))
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[JOB HEARTBEAT] {job_id}: {e}")
+
+
+def _run_job(job_id, func, args, kwargs):
+    ctx = JobContext(job_id)
+    stop = Event()
+    try:
+        ctx.check_cancelled()
+        if not _set_status(job_id, STATUS_RUNNING, started_at=time.time()):
+            return
+        Thread(target=_heartbeat, args=(job_id, stop), daemon=True,
+               name=f'emp-job-heartbeat-{job_id[:8]}').start()
+        result = func(ctx, *args, **kwargs)
+        _set_status(job_id, STATUS_DONE, finished_at=time.time(),
+                    result=json.dumps(result, ensure_ascii=False, default=str))
+    except JobCancelled:
+        ctx.log('⛔ İş iptal edildi')
+        _set_status(job_id, STATUS_CANCELLED, finished_at=time.time())
+    except Exception as e:
+        print(f"[JOB ERROR] {job_id}: {e}")
+        print(traceback.format_exc())
+        _set_status(job_id, STATUS_FAILED, finished_at=time.time(), error=str(e))
+    finally:
+        stop.set()
+
+
+def submit_job(user_id, kind, func, *args, **kwargs):
+    """
+    Yeni iş oluştur ve arka planda çalıştır
+
+    func(ctx, *args, **kwargs) bir JobContext alır ve JSON'a çevrilebilir
+    sonuç döndürür.
+
+    Returns: job_id
+    """
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute('''INSERT INTO jobs (id, user_id, kind, status, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)''',
+                     (job_id, str(user_id), kind, STATUS_QUEUED, now, now))
+        conn.commit()
+    finally:
+        conn.close()
+
+    _get_executor().submit(_run_job, job_id, func, args, kwargs)
+    return job_id
+
+
+def get_job(job_id, since_log_id=0):
+    """
+    İş durumunu ve since_log_id'den sonraki log satırlarını getir
+
+    Returns: dict veya None
+    """
+    conn = _connect()
+    try:
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        status = row['status']
+        error = row['error']
+        if status == STATUS_RUNNING and time.time() - row['updated_at'] > STALE_SECONDS:
+            # İşi çalıştıran worker yeniden başlamış olabilir
+            status = STATUS_FAILED
+            error = 'İş yarıda kaldı (sunucu yeniden başlatılmış olabilir)'
+            conn.execute('UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?',
+                         (status, error, time.time(), job_id))
+            conn.commit()
+
+        logs = conn.execute('SELECT id, line FROM job_logs WHERE job_id = ? AND id > ? ORDER BY id',
+                            (job_id, since_log_id)).fetchall()
+    finally:
+        conn.close()
+
+    return {
+        'id': row['id'],
+        'user_id': row['user_id'],
+        'kind': row['kind'],
+        'status': status,
+        'finished': status in FINISHED_STATUSES,
+        'progress': {
+            'done': row['progress_done'],
+            'total': row['progress_total'],
+            'current': row['current_item'] or ''
+        },
+        'cancel_requested': bool(row['cancel_requested']),
+        'logs': [log['line'] for log in logs],
+        'last_log_id': logs[-1]['id'] if logs else since_log_id,
+        'result': json.loads(row['result']) if row['result'] else None,
+        'error': error
+    }
+
+
+def cancel_job(job_id):
+    """İptal iste; kuyruktaki iş hemen, çalışan iş ilk kontrol noktasında durur"""
+    conn = _connect()
+    try:
+        conn.execute('UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ?',
+                     (time.time(), job_id))
+        conn.execute('UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?',
+                     (STATUS_CANCELLED, time.time(), job_id, STATUS_QUEUED))
+        conn.commit()
+    finally:
+        conn.close()
@@ -8,6 +8,8 @@ import re
 from dataclasses import dataclass
 from typing import Optional
 
+from beyanname_parser import PDF_AVAILABLE, BeyannameAlani, alan_kalibi, alanlari_ara, beyanname_onbellegi
+
 
 @dataclass
 class KDV2Beyanname:
@@ -29,6 +31,27 @@ class KDV2Beyanname:
     dagitim_net: float = 0.0  # Dağıtım net tutarı
 
 
+# Alanlar öncelik sırasıyla; dönem ve VKN için anahtar yok (ilk sayfada bulunur).
+# Kalıplar satır içinde kaldığından sayfa sonunu aşmaz (devam kalıbı yok).
+_KDV2_ALANLARI = (
+    BeyannameAlani('donem', (alan_kalibi(r'(\d{2})/(\d{4})'),)),
+    BeyannameAlani('vergi_no', (alan_kalibi(r'(\d{10,11})'),)),
+    # Sorumlu sıfatıyla beyan
+    BeyannameAlani('sorumlu_matrah', (
+        alan_kalibi(r'[Ss]orumlu.*?[Mm]atrah.*?([\d.,]+)'),
+        alan_kalibi(r'[Tt]evkifat.*?[Mm]atrah.*?([\d.,]+)'),
+        alan_kalibi(r'[Hh]izmet.*?[Mm]atrah.*?([\d.,]+)'),
+    ), re.compile(r'[Ss]orumlu|[Tt]evkifat|[Hh]izmet')),
+    BeyannameAlani('hesaplanan_kdv', (
+        alan_kalibi(r'[Hh]esaplanan.*?KDV.*?([\d.,]+)'),
+        alan_kalibi(r'KDV.*?[Tt]utar.*?([\d.,]+)'),
+    ), re.compile(r'[Hh]esaplanan|KDV')),
+    BeyannameAlani('odenecek_kdv', (alan_kalibi(r'[Öö]denecek.*?KDV.*?([\d.,]+)'),),
+                   re.compile(r'[Öö]denecek')),
+)
+
+
+@beyanname_onbellegi('kdv2', KDV2Beyanname)
 def parse_kdv2_beyanname_pdf(pdf_path: str) -> Optional[KDV2Beyanname]:
     """
     KDV 2 beyanname PDF'ini parse et
@@ -39,63 +62,28 @@ def parse_kdv2_beyanname_pdf(pdf_path: str) -> Optional[KDV2Beyanname]:
     Returns:
         KDV2Beyanname objesi veya None
     """
+    if not PDF_AVAILABLE:
+        print("pdfplumber modülü yüklü değil")
+        return None
+    
     try:
-        import pdfplumber
-        
         beyanname = KDV2Beyanname()
+        eslesme = alanlari_ara(pdf_path, _KDV2_ALANLARI)
+        
+        # Dönem
+        if 'donem' in eslesme:
+            beyanname.donem = f"{eslesme['donem'].group(1)}/{eslesme['donem'].group(2)}"
+        
+        # VKN/TCKN
+        if 'vergi_no' in eslesme:
+            beyanname.vergi_no = eslesme['vergi_no'].group(1)
         
-        with pdfplumber.open(pdf_path) as pdf:
-            full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text() or ""
-                full_text += text + "\n"
-            
-            # Dönem
-            donem_match = re.search(r'(\d{2})/(\d{4})', full_text)
-            if donem_match:
-                beyanname.donem = f"{donem_match.group(1)}/{donem_match.group(2)}"
-            
-            # VKN/TCKN
-            vkn_match = re.search(r'(\d{10,11})', full_text)
-            if vkn_match:
-                beyanname.vergi_no = vkn_match.group(1)
-            
-            # Matrah değerleri
-            # Sorumlu sıfatıyla beyan
-            sorumlu_patterns = [
-                r'[Ss]orumlu.*?[Mm]atrah.*?([\d.,]+)',
-                r'[Tt]evkifat.*?[Mm]atrah.*?([\d.,]+)',
-                r'[Hh]izmet.*?[Mm]atrah.*?([\d.,]+)',
-            ]
-            
-            for pattern in sorumlu_patterns:
-                match = re.search(pattern, full_text)
-                if match:
-                    beyanname.sorumlu_matrah = _parse_amount(match.group(1))
-                    break
-            
-            # Hesaplanan KDV
-            kdv_patterns = [
-                r'[Hh]esaplanan.*?KDV.*?([\d.,]+)',
-                r'KDV.*?[Tt]utar.*?([\d.,]+)',
-            ]
-            
-            for pattern in kdv_patterns:
-                match = re.search(pattern, full_text)
-                if match:
-                    beyanname.hesaplanan_kdv = _parse_amount(match.group(1))
-                    break
-            
-            # Ödenecek KDV
-            odenecek_match = re.search(r'[Öö]denecek.*?KDV.*?([\d.,]+)', full_text)
-            if odenecek_match:
-                beyanname.odenecek_kdv = _parse_amount(odenecek_match.group(1))
+        for alan in ('sorumlu_matrah', 'hesaplanan_kdv', 'odenecek_kdv'):
+            if alan in eslesme:
+                setattr(beyanname, alan, _parse_amount(eslesme[alan].group(1)))
         
         return beyanname
         
-    except ImportError:
-        print("pdfplumber modülü yüklü değil")
-        return None
     except Exception as e:
         print(f"KDV 2 parse hatası: {e}")
         return None
@@ -22,12 +22,13 @@ except ImportError:
     XLWT_AVAILABLE = False
 
 try:
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+    from openpyxl.styles import Font, Alignment, PatternFill
     OPENPYXL_AVAILABLE = True
 except ImportError:
     OPENPYXL_AVAILABLE = False
 
+import excel_akis
+
 # XML Namespaces
 NS = {
     'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
@@ -568,30 +569,40 @@ def load_invoice_from_xml(xml_path, period_filter=None):
 def generate_kdv_listesi_excel(invoices, output_path):
     """
     İndirilecek KDV Listesi Excel dosyası oluştur.
+    
+    Satırlar write-only çalışma kitabına akıtılır; invoices tek geçişte okunur,
+    output_path dosya yolu veya yazılabilir stream olabilir.
     """
     if not OPENPYXL_AVAILABLE:
         raise ImportError("openpyxl kütüphanesi gerekli: pip install openpyxl")
     
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "İndirilecek KDV Listesi"
-    
-    # Header row styling
-    header_font = Font(bold=True, size=10)
-    header_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    thin_border = excel_akis.thin_border()
+    wb = excel_akis.new_workbook({
+        'kdv_baslik': {
+            'font': Font(bold=True, size=14),
+            'alignment': Alignment(horizontal='center')
+        },
+        'kdv_kolon': {
+            'font': Font(bold=True, size=10),
+            'fill': PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid"),
+            'alignment': Alignment(horizontal='center', vertical='center', wrap_text=True),
+            'border': thin_border
+        },
+        'kdv_hucre': {'border': thin_border},
+        'kdv_tutar': {'border': thin_border, 'number_format': '#,##0.00'},
+        'kdv_toplam_etiket': {'font': Font(bold=True)},
+        'kdv_toplam': {'number_format': '#,##0.00'}
+    })
+    ws = wb.create_sheet("İndirilecek KDV Listesi")
+    cell = excel_akis.cell
+    
+    # Column widths
+    col_widths = [8, 15, 10, 20, 40, 15, 50, 25, 20, 15, 20, 15, 15, 20, 15]
+    excel_akis.set_column_widths(ws, col_widths)
     
     # Title row
-    ws.merge_cells('A1:O1')
-    ws['A1'] = "İNDİRİLECEK KDV LİSTESİ"
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = Alignment(horizontal='center')
+    excel_akis.merge(ws, 'A1:O1')
+    ws.append([cell(ws, "İNDİRİLECEK KDV LİSTESİ", 'kdv_baslik')])
     
     # Empty row
     ws.append([])
@@ -614,73 +625,52 @@ def generate_kdv_listesi_excel(invoices, output_path):
         "GGB Tescil No'su (Alış İthalat İse)",
         "Belgenin İndirim Hakkının Kullanıldığı KDV Dönemi"
     ]
-    
-    ws.append(headers)
-    
-    # Style headers
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-    
-    # Column widths
-    col_widths = [8, 15, 10, 20, 40, 15, 50, 25, 20, 15, 20, 15, 15, 20, 15]
-    for i, width in enumerate(col_widths, 1):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(i)].width = width
+    ws.append([cell(ws, header, 'kdv_kolon') for header in headers])
     
     # Data rows
     total_kdv_haric = 0
     total_kdv = 0
     total_indirilen = 0
+    count = 0
     
     for idx, inv in enumerate(invoices, 1):
-        row = [
-            idx,
-            inv['tarih'],
-            inv['seri'],
-            inv['sira_no'],
-            inv['satici_unvan'],
-            inv['satici_vkn'],
-            inv['mal_cinsi'],
-            inv['miktar'],
-            inv['kdv_haric_tutar'],
-            inv['kdv'],
-            inv['tevkifat_kdv'],
-            inv['iki_nolu_kdv'],
-            inv['toplam_indirilen_kdv'],
-            inv['ggb_tescil_no'],
-            inv['kdv_donemi']
-        ]
-        ws.append(row)
-        
-        # Style data cells
-        for col in range(1, 16):
-            cell = ws.cell(row=idx+3, column=col)
-            cell.border = thin_border
-            if col in [9, 10, 11, 12, 13]:  # Numeric columns
-                cell.number_format = '#,##0.00'
+        ws.append([
+            cell(ws, idx, 'kdv_hucre'),
+            cell(ws, inv['tarih'], 'kdv_hucre'),
+            cell(ws, inv['seri'], 'kdv_hucre'),
+            cell(ws, inv['sira_no'], 'kdv_hucre'),
+            cell(ws, inv['satici_unvan'], 'kdv_hucre'),
+            cell(ws, inv['satici_vkn'], 'kdv_hucre'),
+            cell(ws, inv['mal_cinsi'], 'kdv_hucre'),
+            cell(ws, inv['miktar'], 'kdv_hucre'),
+            cell(ws, inv['kdv_haric_tutar'], 'kdv_tutar'),  # Numeric columns
+            cell(ws, inv['kdv'], 'kdv_tutar'),
+            cell(ws, inv['tevkifat_kdv'], 'kdv_tutar'),
+            cell(ws, inv['iki_nolu_kdv'], 'kdv_tutar'),
+            cell(ws, inv['toplam_indirilen_kdv'], 'kdv_tutar'),
+            cell(ws, inv['ggb_tescil_no'], 'kdv_hucre'),
+            cell(ws, inv['kdv_donemi'], 'kdv_hucre')
+        ])
         
         total_kdv_haric += inv['kdv_haric_tutar']
         total_kdv += inv['kdv']
         total_indirilen += inv['toplam_indirilen_kdv']
+        count = idx
     
     # Totals row
-    total_row = len(invoices) + 4
-    ws.cell(row=total_row, column=8, value="TOPLAM")
-    ws.cell(row=total_row, column=8).font = Font(bold=True)
-    ws.cell(row=total_row, column=9, value=total_kdv_haric)
-    ws.cell(row=total_row, column=9).number_format = '#,##0.00'
-    ws.cell(row=total_row, column=10, value=total_kdv)
-    ws.cell(row=total_row, column=10).number_format = '#,##0.00'
-    ws.cell(row=total_row, column=13, value=total_indirilen)
-    ws.cell(row=total_row, column=13).number_format = '#,##0.00'
+    ws.append([
+        None, None, None, None, None, None, None,
+        cell(ws, "TOPLAM", 'kdv_toplam_etiket'),
+        cell(ws, total_kdv_haric, 'kdv_toplam'),
+        cell(ws, total_kdv, 'kdv_toplam'),
+        None, None,
+        cell(ws, total_indirilen, 'kdv_toplam')
+    ])
     
     # Save
     wb.save(output_path)
     print(f"KDV listesi oluşturuldu: {output_path}")
-    print(f"Toplam fatura: {len(invoices)}")
+    print(f"Toplam fatura: {count}")
     print(f"Toplam KDV Hariç: {total_kdv_haric:,.2f} TL")
     print(f"Toplam KDV: {total_kdv:,.2f} TL")
     
@@ -3,23 +3,22 @@ KDV İade Listesi Web Raporu Oluşturucu
 İnteraktif düzenleme, GIB önizleme ve Excel export özellikli HTML rapor.
 """
 
-import json
 import os
 import base64
-import io
 from datetime import datetime
 
+from web_editor_store import INVOICE_STORE_JS, PAGER_CSS, store_init_js
+from fatura_sorgu import VARSAYILAN_SAYFA_BOYUTU as PAGE_SIZE
+
 # PDF sayfa görüntüsü için
-try:
-    import pdfplumber
-    PDFPLUMBER_AVAILABLE = True
-except ImportError:
-    PDFPLUMBER_AVAILABLE = False
+import sayfa_goruntu
 
 
-def get_pdf_page_image_base64(pdf_path, page_num, resolution=150):
+def render_pdf_page_png(pdf_path, page_num, resolution=150):
     """
-    PDF sayfasını base64 PNG görüntüsüne çevir.
+    PDF sayfasını PNG olarak render et.
+    
+    Aynı PDF'in sayfaları için dosya tekrar açılmaz (sayfa_goruntu).
     
     Args:
         pdf_path: PDF dosya yolu
@@ -27,33 +26,43 @@ def get_pdf_page_image_base64(pdf_path, page_num, resolution=150):
         resolution: Görüntü çözünürlüğü
         
     Returns:
-        str: Base64 encoded PNG veya None
+        bytes: PNG verisi veya None
     """
-    if not PDFPLUMBER_AVAILABLE:
-        return None
-    
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            if page_num <= 0 or page_num > len(pdf.pages):
-                return None
-            
-            page = pdf.pages[page_num - 1]
-            img = page.to_image(resolution=resolution)
-            
-            # PNG olarak buffer'a kaydet
-            buffer = io.BytesIO()
-            img.original.save(buffer, format='PNG')
-            buffer.seek(0)
-            
-            # Base64'e çevir
-            img_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-            return img_base64
+        image = sayfa_goruntu.render_page(pdf_path, page_num, resolution)
+        if image is None:
+            return None
+        return sayfa_goruntu.encode_image(image, 'png')
     except Exception as e:
         print(f"PDF sayfa görüntüsü oluşturulamadı: {e}")
         return None
 
 
-def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
+def get_pdf_page_image_base64(pdf_path, page_num, resolution=150):
+    """
+    PDF sayfasını base64 PNG görüntüsüne çevir.
+    
+    Returns:
+        str: Base64 encoded PNG veya None
+    """
+    png = render_pdf_page_png(pdf_path, page_num, resolution)
+    if png is None:
+        return None
+    return base64.b64encode(png).decode('utf-8')
+
+
+def split_pdf_source(inv):
+    """Faturanın PDF yolunu ve sayfa numarasını döndür (PDF değilse None)"""
+    source_path = inv.get('source_path', '')
+    if not source_path or '.pdf' not in source_path.lower():
+        return None
+    if '#page' in source_path:
+        pdf_path, page = source_path.split('#page', 1)
+        return pdf_path, int(page)
+    return source_path, inv.get('page_num', 1)
+
+
+def generate_kdv_web_report(invoices, output_path, gib_html_dir=None, api_url=None):
     """
     KDV iade listesi için interaktif web raporu oluştur.
     
@@ -61,33 +70,28 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
         invoices: Fatura verilerinin listesi
         output_path: HTML dosya yolu
         gib_html_dir: GIB HTML dosyalarının bulunduğu dizin (opsiyonel)
+        api_url: Verilirse faturalar HTML'e gömülmez; sayfa sayfa bu API'den
+                 okunur, sayfa görüntüleri URL ile istenir (web uygulaması)
     """
     
-    # PDF sayfalarını base64 görüntüye çevir
-    pdf_cache = {}  # PDF dosyalarını cache'le
-    for inv in invoices:
-        source_path = inv.get('source_path', '')
-        if source_path and '.pdf' in source_path.lower():
-            # PDF yolu ve sayfa numarasını ayıkla
-            if '#page' in source_path:
-                pdf_path = source_path.split('#page')[0]
-                page_num = int(source_path.split('#page')[1])
-            else:
-                pdf_path = source_path
-                page_num = inv.get('page_num', 1)
+    if api_url:
+        store_js = store_init_js(api_url=api_url, dataset=os.path.basename(api_url))
+    else:
+        # PDF sayfalarını base64 görüntüye çevir
+        pdf_cache = {}  # PDF dosyalarını cache'le
+        for inv in invoices:
+            pdf_source = split_pdf_source(inv)
+            if not pdf_source:
+                continue
             
             # Görüntüyü oluştur (cache'den veya yeni)
-            cache_key = f"{pdf_path}#{page_num}"
-            if cache_key not in pdf_cache:
-                img_base64 = get_pdf_page_image_base64(pdf_path, page_num, resolution=200)
-                pdf_cache[cache_key] = img_base64
+            if pdf_source not in pdf_cache:
+                pdf_cache[pdf_source] = get_pdf_page_image_base64(*pdf_source, resolution=200)
             
-            inv['page_image'] = pdf_cache.get(cache_key, '')
-    
-    # JSON formatında veriyi hazırla
-    invoice_data = json.dumps(invoices, ensure_ascii=False, indent=2)
+            inv['page_image'] = pdf_cache.get(pdf_source) or ''
+        
+        store_js = store_init_js(invoices)
 
-    
     html_content = f'''<!DOCTYPE html>
 <html lang="tr">
 <head>
@@ -395,6 +399,7 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
         .btn-warning {{ background: #f39c12; color: white; }}
         .btn-warning:hover {{ background: #e67e22; }}
         
+{PAGER_CSS}
         @media print {{
             .header-buttons, .actions, .toolbar, .sidebar-panel, .detail-row {{ display: none; }}
             .header {{ background: #2E74B5 !important; -webkit-print-color-adjust: exact; }}
@@ -458,20 +463,20 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
                     <tr>
                         <th><input type="checkbox" id="selectAll" onclick="toggleSelectAll()"></th>
                         <th>Sıra</th>
-                        <th>Tarih</th>
+                        <th data-sort="tarih">Tarih</th>
                         <th>Seri</th>
-                        <th>Sıra No</th>
-                        <th>Satıcı Ünvanı</th>
-                        <th>VKN/TCKN</th>
-                        <th>Mal/Hizmet Cinsi</th>
+                        <th data-sort="fatura_no">Sıra No</th>
+                        <th data-sort="satici_unvan">Satıcı Ünvanı</th>
+                        <th data-sort="satici_vkn">VKN/TCKN</th>
+                        <th data-sort="mal_cinsi">Mal/Hizmet Cinsi</th>
                         <th>Miktar</th>
-                        <th class="num">KDV Hariç</th>
-                        <th class="num">KDV</th>
+                        <th class="num" data-sort="kdv_haric_tutar">KDV Hariç</th>
+                        <th class="num" data-sort="kdv">KDV</th>
                         <th class="num">Tevkifatsız KDV</th>
                         <th class="num">2 No KDV</th>
-                        <th class="num">İndirilen KDV</th>
+                        <th class="num" data-sort="toplam_indirilen_kdv">İndirilen KDV</th>
                         <th>GGB No</th>
-                        <th>Dönem</th>
+                        <th data-sort="kdv_donemi">Dönem</th>
                         <th>İşlemler</th>
                     </tr>
                 </thead>
@@ -479,6 +484,7 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
                 </tbody>
             </table>
         </div>
+        <div class="pager" id="pager"></div>
     </div>
     
     <!-- Invoice Preview Sidebar Panel -->
@@ -609,36 +615,55 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
     </div>
 
     <script>
-        // Initial data
-        let invoices = {invoice_data};
+{INVOICE_STORE_JS}
+        // Veri kaynağı: gömülü liste (masaüstü) veya sunucu API'si (web)
+        {store_js}
+        const view = {{ page: 1, per_page: {PAGE_SIZE}, sort: null, order: 'asc', q: '' }};
+        let pageRows = {{}};
         let deletedRows = [];
         let selectedRows = new Set();
+        let filterTimer = null;
         
         // Initialize
         document.addEventListener('DOMContentLoaded', function() {{
+            bindSortHeaders(sortBy);
             renderTable();
-            updateStats();
         }});
         
-        function renderTable() {{
+        async function renderTable() {{
+            let result;
+            try {{
+                result = await store.query(view);
+            }} catch (e) {{
+                alert('Faturalar yüklenemedi: ' + e.message);
+                return;
+            }}
+            view.page = result.page;
+            pageRows = {{}};
+            selectedRows.clear();
+            document.getElementById('selectedCount').textContent = 0;
+            document.getElementById('selectAll').checked = false;
+            
             const tbody = document.getElementById('tableBody');
             tbody.innerHTML = '';
+            const offset = (result.page - 1) * result.per_page;
             
-            invoices.forEach((inv, idx) => {{
-                if (inv._deleted) return; // Skip deleted
+            result.rows.forEach((inv, i) => {{
+                const id = inv.id;
+                pageRows[id] = inv;
                 
                 const tr = document.createElement('tr');
-                tr.dataset.idx = idx;
+                tr.dataset.id = id;
                 
                 tr.innerHTML = `
                     <td><input type="checkbox" class="row-select" onchange="updateSelection()"></td>
-                    <td>${{idx + 1}}</td>
+                    <td>${{offset + i + 1}}</td>
                     <td contenteditable="true" class="editable" data-field="tarih">${{inv.tarih || ''}}</td>
                     <td></td>
                     <td contenteditable="true" class="editable" data-field="fatura_no">${{(inv.seri || '') + (inv.sira_no || '')}}</td>
                     <td contenteditable="true" class="editable" data-field="satici_unvan">${{inv.satici_unvan || ''}}</td>
                     <td contenteditable="true" class="editable" data-field="satici_vkn">${{inv.satici_vkn || ''}}</td>
-                    <td contenteditable="true" class="editable" data-field="mal_cinsi" title="${{inv.mal_cinsi || ''}}">${{truncate(inv.mal_cinsi, 30)}}</td>
+                    <td contenteditable="true" class="editable long-text" data-field="mal_cinsi">${{inv.mal_cinsi || ''}}</td>
                     <td contenteditable="true" class="editable" data-field="miktar">${{inv.miktar || ''}}</td>
                     <td contenteditable="true" class="editable num" data-field="kdv_haric_tutar">${{formatNumber(inv.kdv_haric_tutar)}}</td>
                     <td contenteditable="true" class="editable num" data-field="kdv">${{formatNumber(inv.kdv)}}</td>
@@ -648,25 +673,34 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
                     <td contenteditable="true" class="editable" data-field="ggb_tescil_no">${{inv.ggb_tescil_no || ''}}</td>
                     <td contenteditable="true" class="editable" data-field="kdv_donemi">${{inv.kdv_donemi || ''}}</td>
                     <td class="actions">
-                        <button class="btn btn-info btn-sm" onclick="showInvoice(${{idx}})">Fatura</button>
-                        <button class="btn btn-warning btn-sm" onclick="toggleDetail(${{idx}})">Detay</button>
-                        <button class="btn btn-danger btn-sm" onclick="deleteRow(${{idx}})">Sil</button>
+                        <button class="btn btn-info btn-sm" onclick="showInvoice(${{id}})">Fatura</button>
+                        <button class="btn btn-warning btn-sm" onclick="toggleDetail(${{id}})">Detay</button>
+                        <button class="btn btn-danger btn-sm" onclick="deleteRow(${{id}})">Sil</button>
                     </td>
                 `;
                 
                 // Add blur event for saving edits
                 tr.querySelectorAll('.editable').forEach(cell => {{
-                    cell.addEventListener('blur', function() {{
+                    cell.addEventListener('focus', function() {{
+                        this.dataset.before = this.textContent.trim();
+                    }});
+                    cell.addEventListener('blur', async function() {{
                         const field = this.dataset.field;
                         let value = this.textContent.trim();
+                        if (value === this.dataset.before) return;
                         
                         // Convert numeric fields
                         if (['kdv_haric_tutar', 'kdv', 'tevkifat_kdv', 'iki_nolu_kdv', 'toplam_indirilen_kdv'].includes(field)) {{
-                            value = parseFloat(value.replace(/[^0-9,.-]/g, '').replace(',', '.')) || 0;
+                            value = parseAmount(value);
                         }}
                         
-                        invoices[idx][field] = value;
-                        updateStats();
+                        inv[field] = value;
+                        try {{
+                            await store.update(id, {{ [field]: value }});
+                            updateStats();
+                        }} catch (e) {{
+                            alert('Değişiklik kaydedilemedi: ' + e.message);
+                        }}
                     }});
                 }});
                 
@@ -675,10 +709,30 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
                 // Detay satırı ekle
                 const detailRow = document.createElement('tr');
                 detailRow.className = 'detail-row';
-                detailRow.id = `detail-${{idx}}`;
-                detailRow.innerHTML = `<td colspan="17">${{renderDetailContent(inv, idx)}}</td>`;
+                detailRow.id = `detail-${{id}}`;
+                detailRow.innerHTML = `<td colspan="17">${{renderDetailContent(inv, id)}}</td>`;
                 tbody.appendChild(detailRow);
             }});
+            
+            renderPager(result, goToPage);
+            markSortHeader(view.sort, view.order);
+            showStats(result.totals);
+        }}
+        
+        function goToPage(page) {{
+            view.page = page;
+            renderTable();
+        }}
+        
+        function sortBy(field) {{
+            if (view.sort === field) {{
+                view.order = view.order === 'asc' ? 'desc' : 'asc';
+            }} else {{
+                view.sort = field;
+                view.order = 'asc';
+            }}
+            view.page = 1;
+            renderTable();
         }}
         
         // Detay içeriğini oluştur (GİB formatında kalem tablosu)
@@ -753,37 +807,34 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
             }}
         }}
         
-        function truncate(str, len) {{
-            if (!str) return '';
-            return str.length > len ? str.substring(0, len) + '...' : str;
-        }}
-        
         function formatNumber(num) {{
             if (num === undefined || num === null) return '0,00';
             return parseFloat(num).toLocaleString('tr-TR', {{minimumFractionDigits: 2, maximumFractionDigits: 2}});
         }}
         
-        function updateStats() {{
-            const active = invoices.filter(i => !i._deleted);
-            document.getElementById('totalCount').textContent = active.length;
-            document.getElementById('totalTaxExcl').textContent = formatNumber(active.reduce((s, i) => s + (parseFloat(i.kdv_haric_tutar) || 0), 0)) + ' ₺';
-            document.getElementById('totalTax').textContent = formatNumber(active.reduce((s, i) => s + (parseFloat(i.kdv) || 0), 0)) + ' ₺';
-            document.getElementById('totalDeducted').textContent = formatNumber(active.reduce((s, i) => s + (parseFloat(i.toplam_indirilen_kdv) || 0), 0)) + ' ₺';
+        function showStats(totals) {{
+            document.getElementById('totalCount').textContent = totals.count;
+            document.getElementById('totalTaxExcl').textContent = formatNumber(totals.kdv_haric_tutar) + ' ₺';
+            document.getElementById('totalTax').textContent = formatNumber(totals.kdv) + ' ₺';
+            document.getElementById('totalDeducted').textContent = formatNumber(totals.toplam_indirilen_kdv) + ' ₺';
         }}
         
-        function deleteRow(idx) {{
-            invoices[idx]._deleted = true;
-            deletedRows.push(idx);
+        async function updateStats() {{
+            const result = await store.query({{ page: 1, per_page: 0 }});
+            showStats(result.totals);
+        }}
+        
+        async function deleteRow(id) {{
+            await store.setDeleted([id], true);
+            deletedRows.push(id);
             renderTable();
-            updateStats();
         }}
         
-        function undoDelete() {{
+        async function undoDelete() {{
             if (deletedRows.length > 0) {{
-                const idx = deletedRows.pop();
-                invoices[idx]._deleted = false;
+                const id = deletedRows.pop();
+                await store.setDeleted([id], false);
                 renderTable();
-                updateStats();
             }}
         }}
         
@@ -792,7 +843,7 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
             document.getElementById('qrPasteModal').classList.add('show');
         }}
         
-        function parseQRData() {{
+        async function parseQRData() {{
             const jsonText = document.getElementById('qrJsonData').value.trim();
             
             if (!jsonText) {{
@@ -860,9 +911,8 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
                     fatura_tipi: tip
                 }};
                 
-                invoices.push(newInvoice);
+                await store.add(newInvoice);
                 renderTable();
-                updateStats();
                 
                 document.getElementById('qrPasteModal').classList.remove('show');
                 alert('Fatura başarıyla eklendi!\\n\\nFatura No: ' + faturaNo + '\\nKDV: ' + kdv.toLocaleString('tr-TR') + ' ₺');
@@ -881,34 +931,34 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
         function updateSelection() {{
             selectedRows.clear();
             document.querySelectorAll('.row-select:checked').forEach(cb => {{
-                selectedRows.add(parseInt(cb.closest('tr').dataset.idx));
+                selectedRows.add(parseInt(cb.closest('tr').dataset.id));
             }});
             document.getElementById('selectedCount').textContent = selectedRows.size;
         }}
         
-        function deleteSelected() {{
+        async function deleteSelected() {{
             if (selectedRows.size === 0) return;
             if (!confirm(selectedRows.size + ' fatura silinecek. Emin misiniz?')) return;
             
-            selectedRows.forEach(idx => {{
-                invoices[idx]._deleted = true;
-                deletedRows.push(idx);
-            }});
+            const ids = Array.from(selectedRows);
+            await store.setDeleted(ids, true);
+            ids.forEach(id => deletedRows.push(id));
             selectedRows.clear();
             renderTable();
-            updateStats();
         }}
         
+        // Arama sunucuya/veri katmanına gider; yazarken her tuşta sorgu atılmaz
         function filterTable(query) {{
-            query = query.toLowerCase();
-            document.querySelectorAll('#tableBody tr').forEach(tr => {{
-                const text = tr.textContent.toLowerCase();
-                tr.style.display = text.includes(query) ? '' : 'none';
-            }});
+            clearTimeout(filterTimer);
+            filterTimer = setTimeout(() => {{
+                view.q = query;
+                view.page = 1;
+                renderTable();
+            }}, 250);
         }}
         
-         function showInvoice(idx) {{
-            const inv = invoices[idx];
+         function showInvoice(id) {{
+            const inv = pageRows[id];
             const invNo = (inv.seri || '') + (inv.sira_no || '');
             const sidebarBody = document.getElementById('sidebarBody');
             
@@ -917,7 +967,8 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
                 let filePath = inv.source_path;
                 
                 // PDF dosyası için yan panelde iframe ile göster
-                if (filePath.toLowerCase().includes('.pdf')) {{
+                // (sunucu sayfa görüntüsü verebiliyorsa tüm PDF yerine sadece o sayfa gösterilir)
+                if (filePath.toLowerCase().includes('.pdf') && !inv.page_image_url) {{
                     let pageNum = inv.page_num || 1;
                     if (filePath.includes('#page')) {{
                         const parts = filePath.split('#page');
@@ -964,7 +1015,7 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
             // Bu yüzden direkt olarak inline preview gösteriyoruz
             
             // PDF faturası için sayfa görüntüsü varsa yan panelde göster
-            if (inv.page_image) {{
+            if (inv.page_image_url || inv.page_image) {{
                 const sidebarBody = document.getElementById('sidebarBody');
                 const pageNum = inv.page_num || '?';
                 const invNo = (inv.seri || '') + (inv.sira_no || '');
@@ -977,8 +1028,9 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
                         <strong>VKN:</strong> ${{inv.satici_vkn || '-'}}<br>
                         <strong>KDV:</strong> ${{formatNumber(inv.kdv)}} ₺
                         <div style="margin-top: 5px; color: #666; font-size: 11px;">💡 Büyütmek için resme tıklayın</div>
+                        ${{inv.page_image_url ? `<a href="${{inv.page_image_url}}?dpi=200" target="_blank" style="font-size: 11px;">Yüksek çözünürlükte aç</a>` : ''}}
                     </div>
-                    <img src="data:image/png;base64,${{inv.page_image}}" alt="Fatura Sayfası" 
+                    <img src="${{inv.page_image_url || 'data:image/png;base64,' + inv.page_image}}" alt="Fatura Sayfası" 
                          onclick="zoomImage(this.src)" 
                          style="cursor: zoom-in;">
                 `;
@@ -1171,7 +1223,7 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
             document.getElementById('addInvoiceForm').reset();
         }}
         
-        function addNewInvoice(event) {{
+        async function addNewInvoice(event) {{
             event.preventDefault();
             
             const faturaNo = document.getElementById('newFaturaNo').value.trim();
@@ -1201,12 +1253,15 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
                 source_type: 'Manuel Giriş'
             }};
             
-            // Add to invoices array
-            invoices.push(newInvoice);
+            try {{
+                await store.add(newInvoice);
+            }} catch (e) {{
+                alert('Fatura eklenemedi: ' + e.message);
+                return;
+            }}
             
-            // Re-render and update stats
+            // Re-render (istatistikler de yenilenir)
             renderTable();
-            updateStats();
             
             // Close modal
             document.getElementById('addInvoiceModal').classList.remove('show');
@@ -1214,8 +1269,18 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
             alert('Fatura başarıyla eklendi!');
         }}
         
-        function exportToExcel() {{
-            const active = invoices.filter(i => !i._deleted);
+        async function exportToExcel() {{
+            // Web'de liste sunucuda, Excel de sunucuda üretilir; henüz
+            // kaydedilmemiş değişiklikler fark olarak gönderilir
+            if (store.remote) {{
+                try {{
+                    await downloadPost(store.apiUrl + '/excel', store.exportPayload(), 'Indirilecek_KDV_Listesi.xlsx');
+                }} catch (error) {{
+                    alert('Export hatası: ' + error.message);
+                }}
+                return;
+            }}
+            const active = store.activeInvoices();
             
             if (active.length === 0) {{
                 alert('Dışa aktarılacak fatura yok!');
@@ -1286,9 +1351,9 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
         
         // GİB Özet Liste Export
         async function exportGibOzet() {{
-            const active = invoices.filter(i => !i._deleted);
+            const payload = store.exportPayload();
             
-            if (active.length === 0) {{
+            if (payload.invoices && payload.invoices.length === 0) {{
                 alert('Dışa aktarılacak fatura yok!');
                 return;
             }}
@@ -1302,7 +1367,7 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
                     headers: {{
                         'Content-Type': 'application/json',
                     }},
-                    body: JSON.stringify({{ invoices: active }})
+                    body: JSON.stringify(payload)
                 }});
                 
                 if (!response.ok) {{
@@ -1328,9 +1393,9 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
         
         // GİB Kalem Bazlı Export
         async function exportGibKalemli() {{
-            const active = invoices.filter(i => !i._deleted);
+            const payload = store.exportPayload();
             
-            if (active.length === 0) {{
+            if (payload.invoices && payload.invoices.length === 0) {{
                 alert('Dışa aktarılacak fatura yok!');
                 return;
             }}
@@ -1344,7 +1409,7 @@ def generate_kdv_web_report(invoices, output_path, gib_html_dir=None):
                     headers: {{
                         'Content-Type': 'application/json',
                     }},
-                    body: JSON.stringify({{ invoices: active }})
+                    body: JSON.stringify(payload)
                 }});
                 
                 if (!response.ok) {{
@@ -6,9 +6,11 @@ Bu modül kebir ve fatura verilerinden KKEG olabilecek giderleri tespit eder.
 """
 
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 from enum import Enum
 
+from metin_arama import FaturaNoIndeksi, AnahtarKelimeTarayici
+
 
 class KKEGType(Enum):
     """KKEG Türleri"""
@@ -92,6 +94,12 @@ KKEG_KEYWORDS = {
     ]
 }
 
+# Binek araç kira/kiralama anahtar kelimeleri (limit kontrolü için)
+BINEK_KIRA_KEYWORDS = ["binek", "rent a car", "araç kiralama", "oto kiralama", "taşıt kirası"]
+
+# Tüm KKEG kelimeleri için tek geçişli tarayıcı (binek kira listesi ayrı grup)
+KKEG_KEYWORD_SCANNER = AnahtarKelimeTarayici({**KKEG_KEYWORDS, "binek_kira": BINEK_KIRA_KEYWORDS})
+
 # Hesap kodu bazlı KKEG riski
 KKEG_RISK_ACCOUNTS = {
     # Yüksek riskli hesaplar
@@ -125,8 +133,33 @@ class KKEGDetector:
     
     def __init__(self, year: int = 2024):
         self.year = year
-        self.findings: List[KKEGFinding] = []
         self.binek_limits = BINEK_LIMITS.get(year, BINEK_LIMITS[2024])
+        self._last_scan: Tuple[Optional[str], Dict] = (None, {})
+        self._reset_findings()
+    
+    def _reset_findings(self):
+        """Bulgu listesini, mükerrer indeksini ve özet sayaçlarını sıfırla"""
+        self.findings: List[KKEGFinding] = []
+        # (hesap kodu, belge no) -> eklenmiş KKEG türleri
+        self._finding_index: Dict[Tuple[str, str], Set[KKEGType]] = {}
+        self._summary_totals = {"total_amount": 0.0, "total_kkeg": 0.0}
+        self._summary_by_type: Dict[str, Dict[str, float]] = {}
+    
+    def _add_finding(self, finding: KKEGFinding):
+        """Bulguyu ekle; indeks ve özet sayaçlarını güncelle"""
+        self.findings.append(finding)
+        self._finding_index.setdefault(
+            (finding.account_code, finding.document_no), set()
+        ).add(finding.kkeg_type)
+        
+        self._summary_totals["total_amount"] += finding.amount
+        self._summary_totals["total_kkeg"] += finding.kkeg_amount
+        type_name = finding.kkeg_type.value
+        if type_name not in self._summary_by_type:
+            self._summary_by_type[type_name] = {"count": 0, "amount": 0, "kkeg": 0}
+        self._summary_by_type[type_name]["count"] += 1
+        self._summary_by_type[type_name]["amount"] += finding.amount
+        self._summary_by_type[type_name]["kkeg"] += finding.kkeg_amount
     
     def detect_from_kebir(self, kebir_data: dict, invoice_data: list = None, employee_names: list = None) -> List[KKEGFinding]:
         """
@@ -137,16 +170,16 @@ class KKEGDetector:
             invoice_data: Fatura listesi (parse edilmiş XML'ler)
             employee_names: Muhtasardan çekilen çalışan isimleri
         """
-        self.findings = []  # Her çağrıda sıfırla
+        self._reset_findings()  # Her çağrıda sıfırla
         self.invoice_data = invoice_data or []
         self.employee_names = [n.upper() for n in (employee_names or [])]
         
         # Fatura indeksi oluştur (hızlı arama için)
-        self.invoice_index = {}
+        self.invoice_index = FaturaNoIndeksi()
         for inv in self.invoice_data:
             inv_no = inv.get('No', '')
             if inv_no:
-                self.invoice_index[inv_no] = inv
+                self.invoice_index.add(inv_no, inv)
         
         # İşlenmiş belgeler - her belge için tek risk
         processed_docs = set()
@@ -216,18 +249,18 @@ class KKEGDetector:
         if doc_no in self.invoice_index:
             return self.invoice_index[doc_no]
         
-        # Açıklamadaki fatura numarası ara
-        for inv_no, inv in self.invoice_index.items():
-            if inv_no in desc or inv_no in doc_no:
-                return inv
-        
-        return None
+        # Açıklamadaki fatura numarası ara (GİB no/ETTN ayıklama + Aho-Corasick)
+        return self.invoice_index.find_in_text(desc, doc_no)
+    
+    def _scan_keywords(self, desc: str) -> Dict:
+        """Açıklamadaki anahtar kelimeleri tek geçişte bul (aynı açıklama için tekrar taramaz)"""
+        if self._last_scan[0] != desc:
+            self._last_scan = (desc, KKEG_KEYWORD_SCANNER.tara(desc))
+        return self._last_scan[1]
     
     def _is_travel_expense(self, desc: str) -> bool:
         """Seyahat/konaklama gideri mi kontrol et"""
-        travel_keywords = KKEG_KEYWORDS.get(KKEGType.SEYAHAT_KONAKLAMA, [])
-        desc_lower = desc.lower()
-        return any(kw in desc_lower for kw in travel_keywords)
+        return KKEGType.SEYAHAT_KONAKLAMA in self._scan_keywords(desc)
     
     def _check_employee_match(self, invoice: dict, desc: str) -> bool:
         """
@@ -289,7 +322,7 @@ class KKEGDetector:
             else:  # MEDIUM
                 kkeg_rate = 0.25  # Orta riskli: %25 potansiyel KKEG
             
-            self.findings.append(KKEGFinding(
+            self._add_finding(KKEGFinding(
                 kkeg_type=risk_info["type"],
                 account_code=acc_code,
                 description=f"{risk_info['desc']}: {desc[:50]}",
@@ -303,59 +336,52 @@ class KKEGDetector:
     
     def _check_keywords(self, acc_code: str, desc: str, amt: float, doc_no: str):
         """Anahtar kelime taraması"""
-        desc_lower = desc.lower()
-        
-        for kkeg_type, keywords in KKEG_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword.lower() in desc_lower:
-                    # Mükerrer kayıt kontrolü
-                    if not self._is_duplicate(acc_code, doc_no, kkeg_type):
-                        finding = self._create_finding(kkeg_type, acc_code, desc, amt, doc_no, keyword)
-                        if finding:
-                            self.findings.append(finding)
-                    break
+        hits = self._scan_keywords(desc)
+        
+        for kkeg_type in KKEG_KEYWORDS:
+            keyword = hits.get(kkeg_type)
+            if keyword:
+                # Mükerrer kayıt kontrolü
+                if not self._is_duplicate(acc_code, doc_no, kkeg_type):
+                    finding = self._create_finding(kkeg_type, acc_code, desc, amt, doc_no, keyword)
+                    if finding:
+                        self._add_finding(finding)
     
     def _check_binek_arac(self, acc_code: str, desc: str, amt: float, doc_no: str):
         """Binek araç gider kısıtlaması kontrolü"""
-        desc_lower = desc.lower()
-        
         # Binek araç kirası kontrolü
-        binek_keywords = ["binek", "rent a car", "araç kiralama", "oto kiralama", "taşıt kirası"]
-        
-        for keyword in binek_keywords:
-            if keyword in desc_lower:
-                monthly_limit = self.binek_limits["monthly_rent"]
+        if "binek_kira" in self._scan_keywords(desc):
+            monthly_limit = self.binek_limits["monthly_rent"]
+            
+            if amt > monthly_limit:
+                excess = amt - monthly_limit
+                kkeg_amt = excess * self.binek_limits["kkeg_rate"]
                 
-                if amt > monthly_limit:
-                    excess = amt - monthly_limit
-                    kkeg_amt = excess * self.binek_limits["kkeg_rate"]
-                    
-                    self.findings.append(KKEGFinding(
-                        kkeg_type=KKEGType.BINEK_ARAC,
-                        account_code=acc_code,
-                        description=f"Binek araç kirası limit aşımı: {desc[:40]}",
-                        amount=amt,
-                        kkeg_amount=kkeg_amt,
-                        kkeg_rate=self.binek_limits["kkeg_rate"],
-                        legal_reference=f"GVK 40/5 - Aylık limit: {monthly_limit:,.0f} TL",
-                        document_no=doc_no,
-                        recommendation=f"Limit aşan {excess:,.2f} TL'nin %30'u = {kkeg_amt:,.2f} TL KKEG"
-                    ))
-                else:
-                    # Limit altında ama yine de %30 KKEG
-                    kkeg_amt = amt * self.binek_limits["kkeg_rate"]
-                    self.findings.append(KKEGFinding(
-                        kkeg_type=KKEGType.BINEK_ARAC,
-                        account_code=acc_code,
-                        description=f"Binek araç gideri (KKEG): {desc[:40]}",
-                        amount=amt,
-                        kkeg_amount=kkeg_amt,
-                        kkeg_rate=self.binek_limits["kkeg_rate"],
-                        legal_reference="GVK 40/5 - Binek giderlerinin %30'u KKEG",
-                        document_no=doc_no,
-                        recommendation=f"Tutarın %30'u = {kkeg_amt:,.2f} TL KKEG yazılmalı"
-                    ))
-                break
+                self._add_finding(KKEGFinding(
+                    kkeg_type=KKEGType.BINEK_ARAC,
+                    account_code=acc_code,
+                    description=f"Binek araç kirası limit aşımı: {desc[:40]}",
+                    amount=amt,
+                    kkeg_amount=kkeg_amt,
+                    kkeg_rate=self.binek_limits["kkeg_rate"],
+                    legal_reference=f"GVK 40/5 - Aylık limit: {monthly_limit:,.0f} TL",
+                    document_no=doc_no,
+                    recommendation=f"Limit aşan {excess:,.2f} TL'nin %30'u = {kkeg_amt:,.2f} TL KKEG"
+                ))
+            else:
+                # Limit altında ama yine de %30 KKEG
+                kkeg_amt = amt * self.binek_limits["kkeg_rate"]
+                self._add_finding(KKEGFinding(
+                    kkeg_type=KKEGType.BINEK_ARAC,
+                    account_code=acc_code,
+                    description=f"Binek araç gideri (KKEG): {desc[:40]}",
+                    amount=amt,
+                    kkeg_amount=kkeg_amt,
+                    kkeg_rate=self.binek_limits["kkeg_rate"],
+                    legal_reference="GVK 40/5 - Binek giderlerinin %30'u KKEG",
+                    document_no=doc_no,
+                    recommendation=f"Tutarın %30'u = {kkeg_amt:,.2f} TL KKEG yazılmalı"
+                ))
     
     def _create_finding(self, kkeg_type: KKEGType, acc_code: str, desc: str, 
                         amt: float, doc_no: str, matched_keyword: str) -> Optional[KKEGFinding]:
@@ -413,30 +439,24 @@ class KKEGDetector:
     
     def _is_duplicate(self, acc_code: str, doc_no: str, kkeg_type: KKEGType = None) -> bool:
         """Mükerrer kayıt kontrolü - Aynı belge+hesap birden fazla eklenmemeli"""
-        for f in self.findings:
-            # Aynı belge numarası ve hesap kodu varsa mükerrer
-            if f.account_code == acc_code and f.document_no == doc_no:
-                return True
-        return False
+        # Aynı belge numarası ve hesap kodu varsa mükerrer (tür fark etmez)
+        return (acc_code, doc_no) in self._finding_index
     
     def get_summary(self) -> Dict[str, float]:
-        """KKEG özeti"""
-        summary = {
-            "total_amount": sum(f.amount for f in self.findings),
-            "total_kkeg": sum(f.kkeg_amount for f in self.findings),
+        """KKEG özeti (bulgular eklenirken artımlı tutulan sayaçlardan)"""
+        if sum(t["count"] for t in self._summary_by_type.values()) != len(self.findings):
+            # findings listesi dışarıdan değiştirilmiş - sayaçları yeniden kur
+            findings = self.findings
+            self._reset_findings()
+            for f in findings:
+                self._add_finding(f)
+        
+        return {
+            "total_amount": self._summary_totals["total_amount"],
+            "total_kkeg": self._summary_totals["total_kkeg"],
             "finding_count": len(self.findings),
-            "by_type": {}
+            "by_type": {name: dict(values) for name, values in self._summary_by_type.items()}
         }
-        
-        for f in self.findings:
-            type_name = f.kkeg_type.value
-            if type_name not in summary["by_type"]:
-                summary["by_type"][type_name] = {"count": 0, "amount": 0, "kkeg": 0}
-            summary["by_type"][type_name]["count"] += 1
-            summary["by_type"][type_name]["amount"] += f.amount
-            summary["by_type"][type_name]["kkeg"] += f.kkeg_amount
-        
-        return summary
 
 
 def generate_kkeg_report_html(findings: List[KKEGFinding], kebir_data: dict = None) -> str:
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Metin Arama Modülü
+Kebir açıklamalarında fatura numarası ve anahtar kelime aramaları için
+doğrusal zamanlı yardımcı yapılar (Aho-Corasick otomatı, fatura no indeksi,
+anahtar kelime tarayıcı)
+"""
+
+import re
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+
+
+# GİB fatura numarası: 3 karakter seri + 4 hane yıl + 9 hane sıra (örn: ABC2024000000123)
+GIB_FATURA_NO_PATTERN = re.compile(r'[A-Z0-9]{3}20\d{2}\d{9}')
+
+# ETTN (UUID) formatı
+ETTN_PATTERN = re.compile(
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+)
+
+
+# Türkçe büyük/küçük harf katlama: İ/I/ı hepsi "i" olur.
+# str.lower() "İ" harfini "i̇" (noktalı birleşik) yapar ve eşleşmeyi bozar;
+# ASCII yazılmış kebir açıklamaları (KIDEM, TAKSI) da bu sayede yakalanır.
+_TR_CASEFOLD_MAP = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+
+
+def tr_casefold(text: str) -> str:
+    """Türkçe harflere duyarlı küçük harfe çevirme (arama için)"""
+    return text.translate(_TR_CASEFOLD_MAP).lower()
+
+
+class AhoCorasick:
+    """
+    Çoklu kalıp arama otomatı
+
+    Kalıplar eklenme sırasına göre numaralanır (0, 1, 2...). Metin tek geçişte
+    taranır; eşleşen tüm kalıplar (bitiş konumu, kalıp no) olarak döner.
+
+    dense=True ise hata bağlantıları geçiş tablosuna gömülür (DFA); tarama
+    karakter başına tek sözlük araması yapar. Az sayıda kısa kalıp
+    (anahtar kelimeler) için uygundur, büyük kalıp kümelerinde bellek artar.
+    """
+
+    def __init__(self, patterns: List[str] = None, dense: bool = False):
+        self.patterns: List[str] = []
+        self.dense = dense
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._min_out: List[int] = [-1]
+        self._delta: Optional[List[Dict[str, int]]] = None
+        self._built = False
+        for pattern in patterns or []:
+            self.add(pattern)
+
+    def add(self, pattern: str) -> int:
+        """Kalıp ekle, kalıp numarasını döndür"""
+        pattern_id = len(self.patterns)
+        self.patterns.append(pattern)
+        if not pattern:
+            return pattern_id
+
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._min_out.append(-1)
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].append(pattern_id)
+        self._built = False
+        return pattern_id
+
+    def build(self):
+        """Hata bağlantılarını kur (BFS)"""
+        queue = deque()
+        bfs_order = []
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+
+        while queue:
+            state = queue.popleft()
+            bfs_order.append(state)
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        for state, outs in enumerate(self._out):
+            self._min_out[state] = min(outs) if outs else -1
+
+        if self.dense:
+            # Kök dışı hedefler saklanır; tabloda olmayan karakter köke döner
+            delta: List[Dict[str, int]] = [dict()] * len(self._goto)
+            delta[0] = dict(self._goto[0])
+            for state in bfs_order:
+                table = dict(delta[self._fail[state]])
+                table.update(self._goto[state])
+                delta[state] = table
+            self._delta = delta
+        self._built = True
+
+    def _step(self, state: int, ch: str) -> int:
+        goto = self._goto
+        while state and ch not in goto[state]:
+            state = self._fail[state]
+        return goto[state].get(ch, 0)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Metindeki tüm eşleşmeleri (bitiş_konumu, kalıp_no) olarak üret"""
+        if not self._built:
+            self.build()
+        state = 0
+        out = self._out
+        delta = self._delta
+        if delta is not None:
+            for pos, ch in enumerate(text):
+                state = delta[state].get(ch, 0)
+                if out[state]:
+                    for pattern_id in out[state]:
+                        yield pos, pattern_id
+            return
+        for pos, ch in enumerate(text):
+            state = self._step(state, ch)
+            for pattern_id in out[state]:
+                yield pos, pattern_id
+
+    def first_pattern(self, text: str) -> int:
+        """Metinde geçen en küçük numaralı kalıbı döndür (yoksa -1)"""
+        if not self._built:
+            self.build()
+        best = -1
+        state = 0
+        min_out = self._min_out
+        delta = self._delta
+        for ch in text:
+            state = delta[state].get(ch, 0) if delta is not None else self._step(state, ch)
+            m = min_out[state]
+            if m >= 0 and (best < 0 or m < best):
+                best = m
+                if best == 0:
+                    break
+        return best
+
+
+class FaturaNoIndeksi:
+    """
+    Fatura numarası -> değer indeksi
+
+    Arama sırası:
+    1. Tam anahtar eşleşmesi (hash)
+    2. Metinden GİB fatura no / ETTN ayıklayıp hash araması
+    3. Aho-Corasick ile metinde geçen herhangi bir fatura no
+
+    2. ve 3. adımda birden fazla aday varsa eklenme sırasına göre ilki
+    seçilir. Metinde ayrı bir GİB no / ETTN olarak geçen anahtar, başka bir
+    anahtarın metnin bir parçasında geçmesinden önce gelir; eski döngü
+    yalnızca eklenme sırasına bakıyordu.
+    """
+
+    def __init__(self, items: Dict[str, Any] = None):
+        self._values: Dict[str, Any] = {}
+        self._keys: List[str] = []
+        self._sira: Dict[str, int] = {}
+        self._automaton: Optional[AhoCorasick] = None
+        self._joined: Optional[str] = None
+        self._offsets: List[int] = []
+        for key, value in (items or {}).items():
+            self.add(key, value)
+
+    def add(self, key: str, value: Any):
+        if not key:
+            return
+        if key not in self._values:
+            self._sira[key] = len(self._keys)
+            self._keys.append(key)
+            self._automaton = None
+            self._joined = None
+        self._values[key] = value
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def _get_automaton(self) -> AhoCorasick:
+        if self._automaton is None:
+            self._automaton = AhoCorasick(self._keys)
+            self._automaton.build()
+        return self._automaton
+
+    def extract_numbers(self, text: str) -> List[str]:
+        """Metindeki GİB fatura numaralarını ve ETTN'leri ayıkla"""
+        if not text:
+            return []
+        tokens = GIB_FATURA_NO_PATTERN.findall(text)
+        tokens.extend(ETTN_PATTERN.findall(text))
+        return tokens
+
+    def find_in_text(self, *texts: str) -> Any:
+        """Verilen metinlerden herhangi birinde geçen fatura numarasının değerini bul"""
+        if not self._values:
+            return None
+
+        best = -1
+        for text in texts:
+            for token in self.extract_numbers(text):
+                for key in (token, token.upper()):
+                    idx = self._sira.get(key, -1)
+                    if idx >= 0 and (best < 0 or idx < best):
+                        best = idx
+        if best >= 0:
+            return self._values[self._keys[best]]
+
+        automaton = self._get_automaton()
+        for text in texts:
+            if not text:
+                continue
+            idx = automaton.first_pattern(text)
+            if idx >= 0 and (best < 0 or idx < best):
+                best = idx
+        return self._values[self._keys[best]] if best >= 0 else None
+
+    def find_containing(self, fragment: str) -> int:
+        """Parçayı içeren ilk anahtarın sırasını döndür (yoksa -1)"""
+        if self._joined is None:
+            # Anahtarları ayırıcı ile tek metinde birleştir, str.find ile C hızında ara
+            self._offsets = []
+            pos = 0
+            for key in self._keys:
+                self._offsets.append(pos)
+                pos += len(key) + 1
+            self._joined = "\x00".join(self._keys)
+        if "\x00" in fragment:
+            return -1
+        pos = self._joined.find(fragment)
+        if pos < 0:
+            return -1
+        return bisect_right(self._offsets, pos) - 1
+
+    def find_related(self, text: str) -> Any:
+        """
+        Metni içeren VEYA metnin içinde geçen ilk fatura numarasının değeri
+        (kebir'de fatura no farklı formatta yazılmış olabilir)
+        """
+        if not self._values:
+            return None
+        if text in self._values:
+            return self._values[text]
+
+        containing = self.find_containing(text)
+        contained = self._get_automaton().first_pattern(text) if text else -1
+        candidates = [i for i in (containing, contained) if i >= 0]
+        if not candidates:
+            return None
+        return self._values[self._keys[min(candidates)]]
+
+
+class AnahtarKelimeTarayici:
+    """
+    Gruplanmış anahtar kelime listeleri için tek geçişli tarayıcı
+
+    Tüm gruplardaki kelimeler tek bir Aho-Corasick otomatında derlenir.
+    tara() her grup için, listede ilk sırada olan ve metinde geçen kelimeyi
+    döndürür (eski "for kw in liste: if kw in metin: break" davranışı).
+    Karşılaştırma tr_casefold ile yapılır.
+    """
+
+    def __init__(self, gruplar: Dict[Any, List[str]]):
+        self.gruplar = gruplar
+        self._automaton = AhoCorasick(dense=True)
+        # kalıp no -> [(grup, listedeki sıra, orijinal kelime)]
+        self._hedefler: List[List[Tuple[Any, int, str]]] = []
+        kalip_no: Dict[str, int] = {}
+
+        for grup, kelimeler in gruplar.items():
+            for sira, kelime in enumerate(kelimeler):
+                katli = tr_casefold(kelime)
+                if not katli:
+                    continue
+                if katli not in kalip_no:
+                    kalip_no[katli] = self._automaton.add(katli)
+                    self._hedefler.append([])
+                self._hedefler[kalip_no[katli]].append((grup, sira, kelime))
+        self._automaton.build()
+
+    def tara(self, *metinler: str) -> Dict[Any, str]:
+        """Metin(ler)de geçen kelimeleri grup -> ilk kelime olarak döndür"""
+        metin = " ".join(m for m in metinler if m)
+        if not metin:
+            return {}
+
+        en_iyi: Dict[Any, Tuple[int, str]] = {}
+        hedefler = self._hedefler
+        for _, kalip in self._automaton.iter_matches(tr_casefold(metin)):
+            for grup, sira, kelime in hedefler[kalip]:
+                mevcut = en_iyi.get(grup)
+                if mevcut is None or sira < mevcut[0]:
+                    en_iyi[grup] = (sira, kelime)
+        return {grup: kelime for grup, (_, kelime) in en_iyi.items()}
@@ -4,8 +4,13 @@ PDF formatındaki faturaları okuyup KDV listesi için veri çıkarır.
 QR kod okuma desteği ile E-Arşiv faturalardan otomatik veri çıkarır.
 """
 
+import io
 import os
 import re
+import struct
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
 try:
@@ -23,7 +28,7 @@ except ImportError:
 
 
 try:
-    from PIL import Image
+    from PIL import Image, ImageOps
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
@@ -35,6 +40,110 @@ try:
 except ImportError:
     QR_MODULE_AVAILABLE = False
 
+import pdf_tarama_onbellegi
+
+# Sayfa paralel tarama: worker süreç sayısı (EMP_PDF_WORKERS ile sınırlanabilir)
+PDF_WORKERS = int(os.environ.get('EMP_PDF_WORKERS', '0')) or (os.cpu_count() or 1)
+
+# Bundan az sayfalı PDF'ler tek süreçte taranır (süreç başlatma maliyeti)
+PARALEL_MIN_SAYFA = 16
+
+# Bir worker'a tek seferde verilen en fazla sayfa (ilerleme bildirimi sıklığı)
+MAX_PARCA_SAYFA = 25
+
+# Gömülü görüntülerden QR okuma: bundan küçük görüntüler (logo, ikon) atlanır
+QR_MIN_PIKSEL = 40
+# Küçük QR görüntüleri bu kenar uzunluğuna büyütülür (zbar 1-2 piksellik modülleri okuyamaz)
+QR_HEDEF_KENAR = 400
+# Sayfa başına denenen en fazla gömülü görüntü
+MAX_GOMULU_GORUNTU = 8
+# Tam sayfa render çözünürlükleri (gömülü görüntüden okunamazsa)
+QR_COZUNURLUKLER = (150, 200, 300)
+
+# Sayfa tarama sürümü: QR çözme veya metin çıkarma sonucunu değiştiren her
+# değişiklikte artırılmalı (önbellekteki eski sayfa sonuçları kullanılmaz)
+TARAMA_SURUMU = 2
+
+# Bundan az (boşluk dışı) karakterli sayfa görüntü sayfası sayılır
+SAYFA_METIN_MIN_KARAKTER = 50
+# Görüntüsü olmayan metin sayfasında bu kadar kare varsa vektör QR olabilir
+QR_VEKTOR_MIN_KARE = 50
+
+
+# ================== METİN KALIPLARI ==================
+# Modül yüklenirken bir kez derlenir. Her alanın kalıpları öncelik
+# sırasıyla denenir: ilk eşleşen kalıp kazanır (metindeki konuma bakılmaz).
+
+# Fatura No
+_FATURA_NO_KALIPLARI = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'Fatura\s*No\s*[:\s]*([A-Z]{2,4}\d{10,})',
+    r'FATURA\s*NO\s*[:\s]*([A-Z]{2,4}\d{10,})',
+    r'Belge\s*No\s*[:\s]*([A-Z]{2,4}\d{10,})',
+    r'e-Fatura\s*No\s*[:\s]*([A-Z]{2,4}\d{10,})',
+    r'([A-Z]{3}\d{13,16})',  # ZGM2025000001473 formatı
+))
+_SERI_SIRA = re.compile(r'^([A-Za-z]+)(.+)$')
+
+# Tarih
+_TARIH_KALIPLARI = tuple(re.compile(p) for p in (
+    r'Fatura\s*Tarihi\s*[:\s]*(\d{2}[./]\d{2}[./]\d{4})',
+    r'Tarih\s*[:\s]*(\d{2}[./]\d{2}[./]\d{4})',
+    r'(\d{2}[./]\d{2}[./]\d{4})',
+))
+
+# VKN (10 haneli)
+_VKN_KALIPLARI = tuple(re.compile(p) for p in (
+    r'VKN\s*[:\s]*(\d{10})',
+    r'Vergi\s*Kimlik\s*No\s*[:\s]*(\d{10})',
+    r'V\.K\.N\.\s*[:\s]*(\d{10})',
+    r'(\d{10})',  # Fallback - ilk 10 haneli sayı
+))
+
+# Firma adı - genellikle VKN'den önce veya sonra
+_UNVAN_KALIPLARI = tuple(re.compile(p) for p in (
+    r'Satıcı\s*[:\s]*([A-ZÇĞİÖŞÜa-zçğıöşü\s\.]+(?:LTD|A\.Ş\.|ŞTİ|SAN\.|TİC\.)[\w\s\.]*)',
+    r'Ünvanı?\s*[:\s]*([A-ZÇĞİÖŞÜa-zçğıöşü\s\.]+(?:LTD|A\.Ş\.|ŞTİ|SAN\.|TİC\.)[\w\s\.]*)',
+    r'([A-ZÇĞİÖŞÜ][A-ZÇĞİÖŞÜa-zçğıöşü\s\.]+(?:LTD|A\.Ş\.|ŞTİ|SAN\.|TİC\.)[\w\s\.]*)',
+))
+
+# KDV Hariç / Matrah
+_MATRAH_KALIPLARI = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'Matrah\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
+    r'KDV\s*Hariç\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
+    r'Ara\s*Toplam\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
+))
+
+# KDV Tutarı
+_KDV_KALIPLARI = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'KDV\s*Tutarı\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
+    r'Hesaplanan\s*KDV\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
+    r'KDV\s*%\s*\d+\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
+    r'Toplam\s*KDV\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
+))
+
+# Genel Toplam (fallback hesaplama için)
+_TOPLAM_KALIPLARI = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'Genel\s*Toplam\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
+    r'Toplam\s*Tutar\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
+    r'Ödenecek\s*Tutar\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
+))
+
+# Ürün satırı (miktar + birim); tek aramada metnin ilk ürün satırı bulunur
+_URUN_SATIRI = re.compile(r'\d+[^\S\n]*(AD|KG|LT|MT|M2|KWH|TON)', re.IGNORECASE)
+_MIKTAR = re.compile(r'(\d+(?:[.,]\d+)?)\s*(AD|KG|LT|MT|M2|KWH|TON)', re.IGNORECASE)
+
+# Fatura başlangıç işaretleri (tek alternation, sayfa başına tek arama)
+_FATURA_BASLANGIC_KALIPLARI = (
+    r'Fatura\s*No\s*[:\s]*[A-Z]{2,4}\d{10,}',
+    r'e-Fatura\s*No',
+    r'FATURA\s*NO',
+    r'Belge\s*No\s*[:\s]*[A-Z]{2,4}\d{10,}',
+    r'[A-Z]{3}20\d{2}\d{10,}',  # ZGM2025... formatı
+)
+_FATURA_BASLANGIC = re.compile('|'.join(_FATURA_BASLANGIC_KALIPLARI), re.IGNORECASE)
+# QR destekli taramada e-Arşiv başlığı da yeni fatura sayılır
+_FATURA_BASLANGIC_QR = re.compile('|'.join(_FATURA_BASLANGIC_KALIPLARI + (r'e-Arşiv\s*Fatura',)), re.IGNORECASE)
+
 
 def extract_invoice_from_pdf(pdf_path):
     """
@@ -53,11 +162,9 @@ def extract_invoice_from_pdf(pdf_path):
     try:
         with pdfplumber.open(pdf_path) as pdf:
             # Tüm sayfaların metnini birleştir
-            full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text += text + "\n"
+            full_text = "".join(
+                text + "\n" for text in (page.extract_text() for page in pdf.pages) if text
+            )
             
             if not full_text:
                 print(f"PDF'den metin çıkarılamadı: {pdf_path}")
@@ -96,21 +203,13 @@ def parse_invoice_text(text, pdf_path):
         'source_path': pdf_path
     }
     
-    # Fatura No patterns
-    inv_patterns = [
-        r'Fatura\s*No\s*[:\s]*([A-Z]{2,4}\d{10,})',
-        r'FATURA\s*NO\s*[:\s]*([A-Z]{2,4}\d{10,})',
-        r'Belge\s*No\s*[:\s]*([A-Z]{2,4}\d{10,})',
-        r'e-Fatura\s*No\s*[:\s]*([A-Z]{2,4}\d{10,})',
-        r'([A-Z]{3}\d{13,16})',  # ZGM2025000001473 formatı
-    ]
-    
-    for pattern in inv_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    # Fatura No
+    for pattern in _FATURA_NO_KALIPLARI:
+        match = pattern.search(text)
         if match:
             inv_no = match.group(1)
             # Seri ve sıra no ayır
-            seri_match = re.match(r'^([A-Za-z]+)(.+)$', inv_no)
+            seri_match = _SERI_SIRA.match(inv_no)
             if seri_match:
                 data['seri'] = seri_match.group(1).upper()
                 data['sira_no'] = seri_match.group(2)
@@ -118,15 +217,9 @@ def parse_invoice_text(text, pdf_path):
                 data['sira_no'] = inv_no
             break
     
-    # Tarih patterns
-    date_patterns = [
-        r'Fatura\s*Tarihi\s*[:\s]*(\d{2}[./]\d{2}[./]\d{4})',
-        r'Tarih\s*[:\s]*(\d{2}[./]\d{2}[./]\d{4})',
-        r'(\d{2}[./]\d{2}[./]\d{4})',
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, text)
+    # Tarih
+    for pattern in _TARIH_KALIPLARI:
+        match = pattern.search(text)
         if match:
             date_str = match.group(1).replace('/', '.')
             data['tarih'] = date_str
@@ -138,16 +231,9 @@ def parse_invoice_text(text, pdf_path):
                 pass
             break
     
-    # VKN patterns (10 haneli)
-    vkn_patterns = [
-        r'VKN\s*[:\s]*(\d{10})',
-        r'Vergi\s*Kimlik\s*No\s*[:\s]*(\d{10})',
-        r'V\.K\.N\.\s*[:\s]*(\d{10})',
-        r'(\d{10})',  # Fallback - ilk 10 haneli sayı
-    ]
-    
-    for pattern in vkn_patterns:
-        match = re.search(pattern, text)
+    # VKN
+    for pattern in _VKN_KALIPLARI:
+        match = pattern.search(text)
         if match:
             vkn = match.group(1)
             # Telefon numarası olmamasını kontrol et
@@ -155,31 +241,18 @@ def parse_invoice_text(text, pdf_path):
                 data['satici_vkn'] = vkn
                 break
     
-    # Firma adı - genellikle VKN'den önce veya sonra
-    unvan_patterns = [
-        r'Satıcı\s*[:\s]*([A-ZÇĞİÖŞÜa-zçğıöşü\s\.]+(?:LTD|A\.Ş\.|ŞTİ|SAN\.|TİC\.)[\w\s\.]*)',
-        r'Ünvanı?\s*[:\s]*([A-ZÇĞİÖŞÜa-zçğıöşü\s\.]+(?:LTD|A\.Ş\.|ŞTİ|SAN\.|TİC\.)[\w\s\.]*)',
-        r'([A-ZÇĞİÖŞÜ][A-ZÇĞİÖŞÜa-zçğıöşü\s\.]+(?:LTD|A\.Ş\.|ŞTİ|SAN\.|TİC\.)[\w\s\.]*)',
-    ]
-    
-    for pattern in unvan_patterns:
-        match = re.search(pattern, text)
+    # Firma adı
+    for pattern in _UNVAN_KALIPLARI:
+        match = pattern.search(text)
         if match:
             unvan = match.group(1).strip()
             if len(unvan) > 5:  # En az 5 karakter
                 data['satici_unvan'] = unvan[:100]  # Max 100 karakter
                 break
     
-    # Tutar patterns
     # KDV Hariç / Matrah
-    matrah_patterns = [
-        r'Matrah\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
-        r'KDV\s*Hariç\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
-        r'Ara\s*Toplam\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
-    ]
-    
-    for pattern in matrah_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _MATRAH_KALIPLARI:
+        match = pattern.search(text)
         if match:
             amount = parse_amount(match.group(1))
             if amount > 0:
@@ -187,15 +260,8 @@ def parse_invoice_text(text, pdf_path):
                 break
     
     # KDV Tutarı
-    kdv_patterns = [
-        r'KDV\s*Tutarı\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
-        r'Hesaplanan\s*KDV\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
-        r'KDV\s*%\s*\d+\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
-        r'Toplam\s*KDV\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
-    ]
-    
-    for pattern in kdv_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _KDV_KALIPLARI:
+        match = pattern.search(text)
         if match:
             amount = parse_amount(match.group(1))
             if amount > 0:
@@ -205,14 +271,8 @@ def parse_invoice_text(text, pdf_path):
     
     # Genel Toplam (fallback hesaplama için)
     if data['kdv_haric_tutar'] == 0 and data['kdv'] == 0:
-        toplam_patterns = [
-            r'Genel\s*Toplam\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
-            r'Toplam\s*Tutar\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
-            r'Ödenecek\s*Tutar\s*[:\s]*([\d.,]+)\s*(?:TL|₺)?',
-        ]
-        
-        for pattern in toplam_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _TOPLAM_KALIPLARI:
+            match = pattern.search(text)
             if match:
                 total = parse_amount(match.group(1))
                 if total > 0:
@@ -222,21 +282,20 @@ def parse_invoice_text(text, pdf_path):
                     data['toplam_indirilen_kdv'] = data['kdv']
                     break
     
-    # Mal/Hizmet cinsi - ilk ürün satırını bul
-    # Genellikle tablo formatında olur
-    lines = text.split('\n')
-    for line in lines:
-        # Ürün satırı genellikle miktar ve fiyat içerir
-        if re.search(r'\d+\s*(AD|KG|LT|MT|M2|KWH|TON)', line, re.IGNORECASE):
-            # İlk kelime muhtemelen ürün adı
-            words = line.split()
-            if words:
-                data['mal_cinsi'] = ' '.join(words[:5])[:100]  # İlk 5 kelime max 100 karakter
-                # Miktarı bul
-                qty_match = re.search(r'(\d+(?:[.,]\d+)?)\s*(AD|KG|LT|MT|M2|KWH|TON)', line, re.IGNORECASE)
-                if qty_match:
-                    data['miktar'] = f"{qty_match.group(1)}{qty_match.group(2).upper()}"
-                break
+    # Mal/Hizmet cinsi - ilk ürün satırı (miktar ve birim içeren satır)
+    match = _URUN_SATIRI.search(text)
+    if match:
+        line_start = text.rfind('\n', 0, match.start()) + 1
+        line_end = text.find('\n', match.end())
+        line = text[line_start:line_end if line_end >= 0 else len(text)]
+        # İlk kelime muhtemelen ürün adı
+        words = line.split()
+        if words:
+            data['mal_cinsi'] = ' '.join(words[:5])[:100]  # İlk 5 kelime max 100 karakter
+            # Miktarı bul
+            qty_match = _MIKTAR.search(line)
+            if qty_match:
+                data['miktar'] = f"{qty_match.group(1)}{qty_match.group(2).upper()}"
     
     # Varsayılan değerler
     if not data['mal_cinsi']:
@@ -282,6 +341,20 @@ def parse_amount(amount_str):
         return 0.0
 
 
+def _parse_invoice_pages(page_texts, pdf_path, start_page):
+    """
+    Bir faturaya ait sayfa metinlerini birleştirip ayrıştır.
+    
+    Returns:
+        dict: Fatura no veya KDV bulunduysa fatura verisi, yoksa None
+    """
+    text = "\n".join(page_texts) + "\n"
+    inv_data = parse_invoice_text(text, f"{pdf_path}#page{start_page}")
+    if inv_data and (inv_data.get('sira_no') or inv_data.get('kdv', 0) > 0):
+        return inv_data
+    return None
+
+
 def load_invoices_from_pdf_folder(folder_path):
     """
     Klasördeki tüm PDF faturalarını yükle.
@@ -328,7 +401,8 @@ def extract_invoices_from_bulk_pdf(pdf_path, progress_callback=None):
             total_pages = len(pdf.pages)
             print(f"Toplam sayfa: {total_pages}")
             
-            current_invoice_text = ""
+            # Sayfa metinleri listede biriktirilir (+= uzun faturalarda karesel)
+            current_invoice_parts = []
             current_invoice_start_page = 1
             
             for page_num, page in enumerate(pdf.pages, 1):
@@ -339,42 +413,28 @@ def extract_invoices_from_bulk_pdf(pdf_path, progress_callback=None):
                     progress_callback(page_num, total_pages)
                 
                 # Yeni fatura başlangıcı kontrolü
-                is_new_invoice = False
-                
-                # Fatura başlangıç işaretleri
-                new_invoice_patterns = [
-                    r'Fatura\s*No\s*[:\s]*[A-Z]{2,4}\d{10,}',
-                    r'e-Fatura\s*No',
-                    r'FATURA\s*NO',
-                    r'Belge\s*No\s*[:\s]*[A-Z]{2,4}\d{10,}',
-                    r'[A-Z]{3}20\d{2}\d{10,}',  # ZGM2025... formatı
-                ]
+                is_new_invoice = _FATURA_BASLANGIC.search(text) is not None
                 
-                for pattern in new_invoice_patterns:
-                    if re.search(pattern, text, re.IGNORECASE):
-                        is_new_invoice = True
-                        break
-                
-                if is_new_invoice and current_invoice_text:
+                if is_new_invoice and current_invoice_parts:
                     # Önceki faturayı işle
-                    inv_data = parse_invoice_text(current_invoice_text, f"{pdf_path}#page{current_invoice_start_page}")
-                    if inv_data and (inv_data.get('sira_no') or inv_data.get('kdv', 0) > 0):
+                    inv_data = _parse_invoice_pages(current_invoice_parts, pdf_path, current_invoice_start_page)
+                    if inv_data:
                         invoices.append(inv_data)
                     
                     # Yeni fatura başlat
-                    current_invoice_text = text + "\n"
+                    current_invoice_parts = [text]
                     current_invoice_start_page = page_num
                 else:
-                    current_invoice_text += text + "\n"
+                    current_invoice_parts.append(text)
                 
                 # Her 20 sayfada bir log
                 if page_num % 20 == 0:
                     print(f"  İşleniyor: {page_num}/{total_pages} sayfa, {len(invoices)} fatura bulundu")
             
             # Son faturayı işle
-            if current_invoice_text:
-                inv_data = parse_invoice_text(current_invoice_text, f"{pdf_path}#page{current_invoice_start_page}")
-                if inv_data and (inv_data.get('sira_no') or inv_data.get('kdv', 0) > 0):
+            if current_invoice_parts:
+                inv_data = _parse_invoice_pages(current_invoice_parts, pdf_path, current_invoice_start_page)
+                if inv_data:
                     invoices.append(inv_data)
             
             print(f"Toplam {len(invoices)} fatura bulundu")
@@ -385,14 +445,151 @@ def extract_invoices_from_bulk_pdf(pdf_path, progress_callback=None):
     return invoices
 
 
-def extract_qr_from_pdf_page(page, resolution=200):
+def _decode_qr(pil_image):
+    """
+    Görüntüdeki QR kodlardan ilk geçerli e-Arşiv faturasını bul
+
+    Returns: (fatura, QR dikdörtgeni (left, top, width, height) piksel) veya (None, None)
+    """
+    # QR kodları bul (sadece QR kod, barcode değil)
+    if ZBarSymbol:
+        qr_codes = decode_qr(pil_image, symbols=[ZBarSymbol.QRCODE])
+    else:
+        qr_codes = decode_qr(pil_image)
+    
+    for qr in qr_codes:
+        try:
+            qr_data = qr.data.decode('utf-8').strip()
+            # JSON olup olmadığını kontrol et; { karakterini bul ve oradan başla
+            start_idx = qr_data.find('{')
+            if start_idx >= 0:
+                invoice = parse_e_arsiv_qr_json(qr_data[start_idx:])
+                if invoice:
+                    return invoice, tuple(qr.rect)
+        except:
+            pass
+    return None, None
+
+
+def _decode_qr_invoice(pil_image):
+    """Görüntüdeki QR kodlardan ilk geçerli e-Arşiv faturasını döndür"""
+    return _decode_qr(pil_image)[0]
+
+
+def _ccitt_image(data, width, height, params):
+    """CCITT (faks) akışını TIFF başlığıyla sarıp PIL ile aç"""
+    k = params.get('K', 0)
+    compression = 4 if k < 0 else 3
+    # BlackIs1: kodlanmış siyah akışlar 1 bitine yazılır (TIFF'te BlackIsZero)
+    photometric = 1 if params.get('BlackIs1', False) else 0
+    entries = [(256, 4, width), (257, 4, height), (258, 3, 1), (259, 3, compression),
+               (262, 3, photometric), (273, 4, 0), (277, 3, 1), (278, 4, height), (279, 4, len(data))]
+    if compression == 3:
+        entries.append((292, 4, 1 if k > 0 else 0))  # T4Options: 2D kodlama
+    
+    data_offset = 8 + 2 + 12 * len(entries) + 4
+    header = bytearray(b'II*\x00' + struct.pack('<IH', 8, len(entries)))
+    for tag, field_type, value in entries:
+        if tag == 273:
+            value = data_offset
+        header += struct.pack('<HHI', tag, field_type, 1)
+        header += struct.pack('<I', value) if field_type == 4 else struct.pack('<HH', value, 0)
+    header += struct.pack('<I', 0)
+    return Image.open(io.BytesIO(bytes(header) + data))
+
+
+def _embedded_image(img):
+    """
+    pdfplumber görüntü nesnesini ham akışından, sayfayı render etmeden
+    kendi çözünürlüğünde PIL görüntüsüne çevir.
+    
+    Returns: PIL.Image veya None (desteklenmeyen format)
+    """
+    stream = img['stream']
+    width, height = (int(v) for v in img['srcsize'])
+    filters = stream.get_filters()
+    last_filter = getattr(filters[-1][0], 'name', '') if filters else ''
+    
+    if last_filter in ('DCTDecode', 'JPXDecode', 'CCITTFaxDecode'):
+        if len(filters) > 1:
+            return None
+        raw = stream.get_rawdata()
+        if last_filter == 'CCITTFaxDecode':
+            image = _ccitt_image(raw, width, height, filters[-1][1] or {})
+        else:
+            image = Image.open(io.BytesIO(raw))
+        image.load()
+    else:
+        data = stream.get_data()
+        colorspace = img.get('colorspace') or []
+        name = getattr(colorspace[0], 'name', '') if colorspace else ''
+        bits = img.get('bits') or 8
+        if bits == 1:
+            mode = '1'
+        elif bits == 8 and name in ('DeviceGray', 'CalGray', ''):
+            mode = 'L'
+        elif bits == 8 and name in ('DeviceRGB', 'CalRGB'):
+            mode = 'RGB'
+        else:
+            return None
+        image = Image.frombytes(mode, (width, height), data)
+    
+    decode = stream.attrs.get('Decode')
+    if decode and list(decode[:2]) == [1, 0]:
+        image = ImageOps.invert(image.convert('L'))
+    return image
+
+
+def _prepare_qr_image(image):
+    """Küçük QR görüntüsünü büyüt ve sessiz bölge (beyaz kenar) ekle"""
+    image = image.convert('L')
+    side = min(image.size)
+    if side < QR_HEDEF_KENAR:
+        scale = -(-QR_HEDEF_KENAR // side)
+        image = image.resize((image.width * scale, image.height * scale), Image.NEAREST)
+    return ImageOps.expand(image, border=max(16, min(image.size) // 10), fill=255)
+
+
+def extract_qr_from_embedded_images(page):
+    """
+    QR kodu sayfadaki gömülü görüntü nesnelerinden (render etmeden) oku.
+    Kareye yakın görüntüler önce denenir.
+    
+    Returns:
+        (fatura, görüntünün sayfadaki kutusu) veya (None, None)
+    """
+    images = [
+        img for img in page.images
+        if min(img['srcsize']) >= QR_MIN_PIKSEL
+    ]
+    # Kareye yakın görüntüler (QR) önce, tam sayfa taramalar sonra
+    images.sort(key=lambda img: abs(1 - img['srcsize'][0] / max(img['srcsize'][1], 1)))
+    
+    for img in images[:MAX_GOMULU_GORUNTU]:
+        try:
+            image = _embedded_image(img)
+        except Exception:
+            continue
+        if image is None:
+            continue
+        invoice = _decode_qr_invoice(_prepare_qr_image(image))
+        if invoice:
+            return invoice, (img['x0'], img['top'], img['x1'], img['bottom'])
+    return None, None
+
+
+def extract_qr_from_pdf_page(page, resolution=200, qr_bbox=None):
     """
     PDF sayfasından QR kod oku ve fatura verisine dönüştür.
-    Birden fazla çözünürlük dener.
+    
+    1. Gömülü görüntü nesneleri kendi çözünürlüklerinde çözülür (render yok)
+    2. QR konumu biliniyorsa (qr_bbox) sadece o bölge render edilir
+    3. Son çare: tam sayfa, birden fazla çözünürlükte
     
     Args:
         page: pdfplumber page nesnesi
         resolution: Başlangıç görüntü çözünürlüğü (dpi)
+        qr_bbox: Opsiyonel QR bölgesi (x0, top, x1, bottom), PDF noktası
         
     Returns:
         dict: Fatura verisi veya None
@@ -403,42 +600,549 @@ def extract_qr_from_pdf_page(page, resolution=200):
     if not QR_MODULE_AVAILABLE:
         return None
     
+    try:
+        invoice, _ = extract_qr_from_embedded_images(page)
+        if invoice:
+            return invoice
+    except Exception:
+        pass
+    
     # Farklı çözünürlükleri dene
-    resolutions = [150, 200, 300]
+    resolutions = sorted(set(QR_COZUNURLUKLER) | {resolution})
+    
+    if qr_bbox:
+        try:
+            region = page.crop(qr_bbox, strict=False)
+            for res in resolutions:
+                invoice = _decode_qr_invoice(_prepare_qr_image(region.to_image(resolution=res).original))
+                if invoice:
+                    return invoice
+        except Exception:
+            pass
     
     for res in resolutions:
         try:
             # Sayfayı görüntüye çevir
             page_image = page.to_image(resolution=res)
-            pil_image = page_image.original
-            
-            # QR kodları bul (sadece QR kod, barcode değil)
-            if ZBarSymbol:
-                qr_codes = decode_qr(pil_image, symbols=[ZBarSymbol.QRCODE])
-            else:
-                qr_codes = decode_qr(pil_image)
-            
-            for qr in qr_codes:
-                try:
-                    qr_data = qr.data.decode('utf-8').strip()
-                    # JSON olup olmadığını kontrol et
-                    if qr_data.startswith('{') or '{' in qr_data:
-                        # { karakterini bul ve oradan başla
-                        start_idx = qr_data.find('{')
-                        if start_idx >= 0:
-                            json_data = qr_data[start_idx:]
-                            invoice = parse_e_arsiv_qr_json(json_data)
-                            if invoice:
-                                return invoice
-                except:
-                    pass
+            invoice = _decode_qr_invoice(page_image.original)
+            if invoice:
+                return invoice
         except Exception as e:
             pass
     
     return None
 
 
-def extract_invoices_from_bulk_pdf_with_qr(pdf_path, progress_callback=None, use_qr=True):
+# QR konum deseni (finder pattern) satır taraması: koyu/açık akışları 1:1:3:1:1
+_FINDER_AKIS = re.compile(rb'(?=W(B+)(W+)(B+)(W+)(B+)W)')
+
+# Konum deseni ön kontrolünün render çözünürlüğü (küçük QR'lar da seçilebilsin)
+QR_ON_KONTROL_DPI = 100
+
+# Öğrenilen QR bölgesine eklenen kenar payı (bölge boyutunun oranı)
+QR_BOLGE_PAYI = 0.3
+
+
+def _finder_runs(line):
+    """Satır/sütun baytlarında 1:1:3:1:1 oranlı akışlar: [(merkez, birim)]"""
+    found = []
+    for match in _FINDER_AKIS.finditer(line):
+        runs = [len(group) for group in match.groups()]
+        unit = sum(runs) / 7
+        if unit < 1:
+            continue
+        if all(abs(run - unit) <= max(1, unit * 0.6) for run in (runs[0], runs[1], runs[3], runs[4])) \
+                and abs(runs[2] - 3 * unit) <= max(1.5, unit * 1.5):
+            found.append((match.start() + 1 + runs[0] + runs[1] + runs[2] // 2, unit))
+    return found
+
+
+def has_qr_finder_pattern(pil_image, min_rows=2):
+    """
+    Düşük çözünürlüklü görüntüde QR konum deseni var mı (ucuz ön kontrol)
+
+    Satırlarda 1:1:3:1:1 oranlı koyu/açık akış dizisi aranır; aday merkezin
+    sütununda da aynı oran görülürse (yazı karakterleri bunu sağlamaz) ve
+    en az min_rows satırda doğrulanırsa True döner.
+    """
+    gray = pil_image.convert('L')
+    width, height = gray.size
+    data = gray.point(lambda v: 66 if v < 128 else 87).tobytes()   # B / W
+    hits = {}
+    for y in range(height):
+        row = data[y * width:(y + 1) * width]
+        if b'B' not in row:
+            continue
+        for center, unit in _finder_runs(row):
+            reach = int(unit * 5) + 2
+            top = max(0, y - reach)
+            column = data[top * width + center:min(height, y + reach + 1) * width:width]
+            if not any(abs(top + c - y) <= unit * 1.5 and 0.5 <= u / unit <= 2
+                       for c, u in _finder_runs(column)):
+                continue
+            rows = hits.setdefault(center // 3, set())
+            rows.add(y)
+            if len(rows) >= min_rows:
+                return True
+    return False
+
+
+class QRTarayici:
+    """
+    Belge içinde öğrenen QR tarayıcı
+
+    İlk başarılı sayfalardan çalışan yöntemi, çözünürlüğü ve QR bölgesini
+    öğrenir; sonraki sayfalarda önce onları dener. Düşük çözünürlükte konum
+    deseni görülmeyen sayfalar (QR'sız sayfalar, çok sayfalı faturaların
+    devam sayfaları) çözünürlük merdivenine girmeden atlanır.
+    """
+
+    def __init__(self):
+        self.dpi = None         # Son başarılı tam sayfa / bölge çözünürlüğü
+        self.bbox = None        # QR bölgesi (x0, top, x1, bottom), PDF noktası
+        self.gomulu = None      # Gömülü görüntüden okuma çalışıyor mu
+        self.istatistik = []    # Sayfa başına {'sayfa', 'yontem', 'dpi', 'sure'}
+
+    def _learn_bbox(self, x0, top, x1, bottom):
+        pad_x = (x1 - x0) * QR_BOLGE_PAYI
+        pad_y = (bottom - top) * QR_BOLGE_PAYI
+        self.bbox = (x0 - pad_x, top - pad_y, x1 + pad_x, bottom + pad_y)
+
+    def _render_decode(self, page, res, bbox=None):
+        """Sayfayı (veya bölgeyi) render et ve çöz; başarılıysa bölgeyi öğren"""
+        target = page.crop(bbox, strict=False) if bbox else page
+        image = target.to_image(resolution=res).original
+        if bbox:
+            image = _prepare_qr_image(image)
+        invoice, rect = _decode_qr(image)
+        if invoice and not bbox and rect:
+            scale = 72 / res
+            left, top, width, height = rect
+            self._learn_bbox(left * scale, top * scale, (left + width) * scale, (top + height) * scale)
+        return invoice
+
+    def tara(self, page, page_num=None):
+        """Sayfadaki QR faturasını döndür (yoksa None), istatistiği kaydet"""
+        baslangic = time.perf_counter()
+        invoice, yontem, dpi = None, 'yok', None
+        try:
+            invoice, yontem, dpi = self._tara(page)
+        except Exception:
+            pass
+        self.istatistik.append({
+            'sayfa': page_num,
+            'yontem': yontem,
+            'dpi': dpi,
+            'sure': round(time.perf_counter() - baslangic, 4)
+        })
+        return invoice
+
+    def _tara(self, page):
+        if not PYZBAR_AVAILABLE or not PIL_AVAILABLE or not QR_MODULE_AVAILABLE:
+            return None, 'yok', None
+
+        # 1. Gömülü görüntüler (render yok); belgede işe yaramadıysa tekrar denenmez
+        if self.gomulu is not False and page.images:
+            invoice, box = extract_qr_from_embedded_images(page)
+            if invoice:
+                self.gomulu = True
+                self._learn_bbox(*box)
+                return invoice, 'gomulu', None
+            if self.gomulu is None and self.dpi:
+                self.gomulu = False
+
+        # 2. Düşük çözünürlükte konum deseni görülmeyen sayfayı render etmeden atla
+        if not has_qr_finder_pattern(page.to_image(resolution=QR_ON_KONTROL_DPI).original):
+            return None, 'atlandi', QR_ON_KONTROL_DPI
+
+        # 3. Öğrenilen bölge ve çözünürlük
+        if self.bbox and self.dpi:
+            invoice = self._render_decode(page, self.dpi, self.bbox)
+            if invoice:
+                return invoice, 'bolge', self.dpi
+
+        # 4. Tam sayfa: önce öğrenilen çözünürlük, sonra merdiven
+        resolutions = list(QR_COZUNURLUKLER)
+        if self.dpi:
+            resolutions.remove(self.dpi)
+            resolutions.insert(0, self.dpi)
+        for res in resolutions:
+            invoice = self._render_decode(page, res)
+            if invoice:
+                self.dpi = res
+                return invoice, 'sayfa', res
+        return None, 'yok', None
+
+
+def qr_istatistik_ozeti(istatistik):
+    """Sayfa istatistiklerinden yöntem başına sayfa sayısı ve toplam süre"""
+    ozet = {}
+    for kayit in istatistik:
+        adet, sure = ozet.get(kayit['yontem'], (0, 0.0))
+        ozet[kayit['yontem']] = (adet + 1, sure + kayit['sure'])
+    return ', '.join(f"{yontem}: {adet} sayfa {sure:.1f} sn" for yontem, (adet, sure) in sorted(ozet.items()))
+
+
+class PDFOturumu:
+    """
+    Tek açılışlık PDF tarama oturumu
+
+    Belge bir kez açılır; sayfa metni ve sayfa tipi önbellekte tutulur.
+    Tip belirleme (örnekleme) ile tarama aynı oturumu kullanınca sayfalar
+    yeniden açılıp yeniden ayrıştırılmaz.
+
+    Sayfa tipleri:
+        metin   - metin var, görüntü / vektör QR adayı yok: QR aranmaz
+        goruntu - (neredeyse) metin yok: sadece QR
+        hibrit  - metin ve görüntü (veya çok sayıda kare) var: QR, olmazsa metin
+    """
+
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+        self.pdf = pdfplumber.open(pdf_path)
+        self.total_pages = len(self.pdf.pages)
+        self._metin = {}
+        self._tip = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pdf.close()
+
+    def page(self, page_num):
+        return self.pdf.pages[page_num - 1]
+
+    def metin(self, page_num):
+        """Sayfa metni (bir kez çıkarılır)"""
+        if page_num not in self._metin:
+            self._metin[page_num] = self.page(page_num).extract_text() or ""
+        return self._metin[page_num]
+
+    def sayfa_tipi(self, page_num):
+        """'metin', 'goruntu' veya 'hibrit' (karakter / görüntü nesnelerinden, metin çıkarmadan)"""
+        if page_num not in self._tip:
+            page = self.page(page_num)
+            karakter = sum(1 for char in page.chars if not char['text'].isspace())
+            if karakter <= SAYFA_METIN_MIN_KARAKTER:
+                tip = 'goruntu'
+            elif page.images or len(page.rects) >= QR_VEKTOR_MIN_KARE:
+                tip = 'hibrit'
+            else:
+                tip = 'metin'
+            self._tip[page_num] = tip
+        return self._tip[page_num]
+
+    def birak(self, page_num):
+        """Sayfanın pdfplumber önbelleğini bırak (metin ve tip korunur)"""
+        self.page(page_num).close()
+
+
+def _iter_page_range(oturum, start, end, use_qr, read_text, tarayici):
+    """
+    [start, end) sayfalarını sırayla tara, her sayfanın sonucunu hemen döndür
+
+    Metin okunurken her sayfa tipine göre taranır: metin sayfasında QR
+    aranmaz, QR okunan sayfanın metni çıkarılmaz.
+    """
+    for page_num in range(start, end):
+        qr_invoice = None
+        if use_qr:
+            if read_text and oturum.sayfa_tipi(page_num) == 'metin':
+                tarayici.istatistik.append({'sayfa': page_num, 'yontem': 'metin_sayfasi', 'dpi': None, 'sure': 0.0})
+            else:
+                qr_invoice = tarayici.tara(oturum.page(page_num), page_num)
+        text = oturum.metin(page_num) if read_text and not qr_invoice else ""
+        # Sayfa önbelleğini bırak (uzun PDF'lerde bellek)
+        oturum.birak(page_num)
+        yield page_num, qr_invoice, text
+
+
+def _scan_page_range(pdf_path, start, end, use_qr, read_text):
+    """
+    [start, end) sayfalarını tara (worker sürecinde çalışır, kendi oturumu ile)
+
+    Returns: ([(sayfa no, QR faturası veya None, sayfa metni)], QR sayfa istatistikleri)
+    """
+    # Çözünürlük / QR bölgesi aralık içinde öğrenilir
+    tarayici = QRTarayici()
+    with PDFOturumu(pdf_path) as oturum:
+        results = list(_iter_page_range(oturum, start, end, use_qr, read_text, tarayici))
+    return results, tarayici.istatistik
+
+
+def _shard_size(page_count, workers):
+    """Worker başına ~4 parça düşecek aralık boyu (en fazla MAX_PARCA_SAYFA)"""
+    return max(1, min(MAX_PARCA_SAYFA, -(-page_count // (workers * 4))))
+
+
+def _page_shards(pages, workers, size=None):
+    """Taranacak sayfaları (artan sırada) worker'lara dağıtılacak [start, end) aralıklarına böl"""
+    size = size or _shard_size(len(pages), workers)
+    shards = []
+    for page_num in pages:
+        # Ardışık sayfalar aynı aralıkta (QR tarayıcı aralık içinde öğrenir)
+        if shards and shards[-1][1] == page_num and page_num - shards[-1][0] < size:
+            shards[-1][1] = page_num + 1
+        else:
+            shards.append([page_num, page_num + 1])
+    return [tuple(shard) for shard in shards]
+
+
+def _tarama_surumu(use_qr, read_text):
+    """Önbellek anahtarındaki tarama sürümü (tarayıcı sürümü + tarama kipi)"""
+    return f"{TARAMA_SURUMU}:{'qr' if use_qr else '-'}:{'metin' if read_text else '-'}"
+
+
+def _onbellek_oku(pdf_path, total_pages, surum):
+    """
+    Önbellekteki sayfa sonuçlarını bul
+
+    Returns: (dosya özeti, sayfa izleri, {sayfa no: (QR faturası veya None, metin)});
+             önbellek kapalıysa / okunamazsa (None, None, {})
+    """
+    if not pdf_tarama_onbellegi.ENABLED or not pdf_tarama_onbellegi.PDFMINER_AVAILABLE:
+        return None, None, {}
+    try:
+        ozet = pdf_tarama_onbellegi.dosya_ozeti(pdf_path)
+        # Birebir aynı dosya: sayfa izi hesaplamaya gerek yok
+        cached = pdf_tarama_onbellegi.get_document(ozet, surum)
+        if len(cached) == total_pages:
+            return ozet, None, cached
+
+        izler = pdf_tarama_onbellegi.sayfa_izleri(pdf_path)
+        if len(izler) != total_pages:
+            return None, None, {}
+        found = pdf_tarama_onbellegi.get_pages(izler, surum)
+        cached = {page_num: found[iz] for page_num, iz in enumerate(izler, 1) if iz in found}
+        return ozet, izler, cached
+    except Exception as e:
+        print(f"PDF önbelleği okunamadı ({pdf_path}): {e}")
+        return None, None, {}
+
+
+def _scan_results(pdf_path, pages, total_pages, done, use_qr, read_text, progress_callback, workers,
+                  qr_stats, oturum):
+    """
+    Verilen sayfaları tara; sonuçları tamamlandıkça (sayfa no, (QR faturası, metin)) olarak döndür
+
+    Tek süreçte sayfa sayfa, paralelde sayfa aralığı bittikçe döndürülür
+    (sıra garanti değil).
+    """
+    workers = max(1, workers or PDF_WORKERS)
+    shards = _page_shards(pages, workers)
+    workers = min(workers, len(shards))
+
+    if workers <= 1 or len(pages) < PARALEL_MIN_SAYFA:
+        if not shards:
+            return
+        own = oturum is None
+        if own:
+            oturum = PDFOturumu(pdf_path)
+        try:
+            for start, end in shards:
+                # Çözünürlük / QR bölgesi aralık içinde öğrenilir
+                tarayici = QRTarayici()
+                for page_num, qr_invoice, text in _iter_page_range(oturum, start, end, use_qr, read_text, tarayici):
+                    yield page_num, (qr_invoice, text)
+                done += end - start
+                if qr_stats is not None:
+                    qr_stats.extend(tarayici.istatistik)
+                if progress_callback:
+                    progress_callback(done, total_pages)
+        finally:
+            if own:
+                oturum.close()
+        return
+
+    # spawn: web_app'in çok thread'li süreçlerinde fork güvenli değil
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        futures = [
+            executor.submit(_scan_page_range, pdf_path, start, end, use_qr, read_text)
+            for start, end in shards
+        ]
+        for future in as_completed(futures):
+            part, stats = future.result()
+            done += len(part)
+            if qr_stats is not None:
+                qr_stats.extend(stats)
+            if progress_callback:
+                progress_callback(done, total_pages)
+            for page_num, qr_invoice, text in part:
+                yield page_num, (qr_invoice, text)
+    finally:
+        # Hata, iptal veya okuyucunun bırakması durumunda bekleyen parçaları başlatma
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _onbellek_istatistigi(cached):
+    """Önbellekten gelen sayfalar için QR istatistik kayıtları"""
+    return [{'sayfa': page_num, 'yontem': 'onbellek', 'dpi': None, 'sure': 0.0} for page_num in sorted(cached)]
+
+
+def iter_pdf_pages(pdf_path, total_pages, use_qr=True, read_text=True, progress_callback=None, workers=None,
+                   qr_stats=None, oturum=None):
+    """
+    PDF sayfalarını QR/metin için tara; sonuçları sayfa sırasıyla, sırası
+    gelen sayfa hazır olur olmaz döndür (akışlı yanıtlar için).
+
+    Büyük PDF'lerde sayfa aralıkları süreçlere dağıtılır. Daha önce taranmış
+    sayfalar (aynı içerik, aynı tarama sürümü) önbellekten alınır, sadece
+    yeni / değişen sayfalar taranır.
+
+    Args:
+        total_pages: Sayfa sayısı
+        progress_callback: İlerleme callback fonksiyonu (tamamlanan sayfa, toplam)
+        workers: Süreç sayısı (None: PDF_WORKERS)
+        qr_stats: Verilirse sayfa başına QR okuma istatistikleri bu listeye eklenir
+        oturum: Açık PDFOturumu; tek süreçli taramada yeniden açmadan kullanılır
+
+    Yields:
+        (sayfa no, QR faturası veya None, sayfa metni)
+    """
+    surum = _tarama_surumu(use_qr, read_text)
+    ozet, izler, cached = _onbellek_oku(pdf_path, total_pages, surum)
+    if cached:
+        print(f"Önbellekten: {len(cached)}/{total_pages} sayfa")
+        if qr_stats is not None and use_qr:
+            qr_stats.extend(_onbellek_istatistigi(cached))
+        if progress_callback:
+            progress_callback(len(cached), total_pages)
+
+    pages = [page_num for page_num in range(1, total_pages + 1) if page_num not in cached]
+    results = _scan_results(pdf_path, pages, total_pages, len(cached), use_qr, read_text, progress_callback,
+                            workers, qr_stats, oturum)
+    ready = dict(cached)    # Sırası henüz gelmemiş sonuçlar
+    scanned = {}
+    next_page = 1
+    try:
+        while True:
+            while next_page in ready:
+                qr_invoice, text = ready.pop(next_page)
+                yield next_page, qr_invoice, text
+                next_page += 1
+            item = next(results, None)
+            if item is None:
+                break
+            page_num, result = item
+            scanned[page_num] = ready[page_num] = result
+    finally:
+        results.close()
+        # Taranan sayfa sonuçlarını ve dosyanın sayfa eşlemesini kaydet (yarıda kalsa da)
+        if ozet and izler:
+            try:
+                pdf_tarama_onbellegi.save_document(ozet, surum, izler, scanned)
+            except Exception as e:
+                print(f"PDF önbelleğine yazılamadı ({pdf_path}): {e}")
+
+
+def scan_pdf_pages(pdf_path, total_pages, use_qr=True, read_text=True, progress_callback=None, workers=None,
+                   qr_stats=None, oturum=None):
+    """
+    PDF sayfalarını QR/metin için tara (bkz. iter_pdf_pages)
+
+    Returns:
+        list: Sayfa sırasıyla (sayfa no, QR faturası veya None, sayfa metni)
+    """
+    return list(iter_pdf_pages(pdf_path, total_pages, use_qr, read_text, progress_callback, workers,
+                               qr_stats, oturum))
+
+
+def _page_count(pdf_path, oturum=None):
+    """Sayfa sayısı (açık oturum varsa belgeyi yeniden açmadan)"""
+    if oturum is not None:
+        return oturum.total_pages
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def iter_invoices_from_bulk_pdf_with_qr(pdf_path, progress_callback=None, use_qr=True, oturum=None):
+    """
+    Çok sayfalı PDF'teki faturaları bulundukça döndür (bkz. extract_invoices_from_bulk_pdf_with_qr)
+
+    QR'dan okunan fatura sayfası taranınca, metinden okunan fatura bir
+    sonraki faturanın başladığı sayfada (veya belge sonunda) döndürülür.
+    Hatalar çağırana iletilir.
+    """
+    total_pages = _page_count(pdf_path, oturum)
+    print(f"Toplam sayfa: {total_pages}")
+    print(f"QR okuma: {'Aktif' if use_qr and PYZBAR_AVAILABLE else 'Pasif'}")
+    
+    # Sayfalar paralel taranır; fatura gruplama sayfa sırasıyla burada yapılır
+    qr_stats = []
+    pages = iter_pdf_pages(pdf_path, total_pages, use_qr=use_qr and PYZBAR_AVAILABLE,
+                           read_text=True, progress_callback=progress_callback, qr_stats=qr_stats,
+                           oturum=oturum)
+    yield from _group_invoices_with_qr(pdf_path, pages, total_pages, qr_stats)
+
+
+def _group_invoices_with_qr(pdf_path, pages, total_pages, qr_stats):
+    """
+    Sayfa sonuçlarından (sayfa sırasıyla) faturaları bulundukça döndür
+
+    QR okunan sayfa tek fatura; diğer sayfalar fatura başlangıcına göre
+    gruplanıp metinden ayrıştırılır.
+    """
+    count = 0
+    qr_success_count = 0
+    text_success_count = 0
+    
+    # Sayfa metinleri listede biriktirilir (+= uzun faturalarda karesel)
+    current_invoice_parts = []
+    current_invoice_start_page = 1
+    
+    for page_num, qr_invoice, text in pages:
+        # Önce QR koddan okumayı dene
+        if qr_invoice:
+            qr_invoice['source_path'] = f"{pdf_path}#page{page_num}"
+            count += 1
+            qr_success_count += 1
+            yield qr_invoice
+            continue  # QR başarılı, metne gerek yok
+        
+        # QR yoksa veya okunamazsa metin analizi
+        # Yeni fatura başlangıcı kontrolü
+        is_new_invoice = _FATURA_BASLANGIC_QR.search(text) is not None
+        
+        if is_new_invoice and current_invoice_parts:
+            # Önceki faturayı işle
+            inv_data = _parse_invoice_pages(current_invoice_parts, pdf_path, current_invoice_start_page)
+            
+            current_invoice_parts = [text]
+            current_invoice_start_page = page_num
+            
+            if inv_data:
+                count += 1
+                text_success_count += 1
+                yield inv_data
+        else:
+            current_invoice_parts.append(text)
+        
+        # Her 20 sayfada bir log
+        if page_num % 20 == 0:
+            print(f"  İşleniyor: {page_num}/{total_pages} sayfa, {count} fatura (QR: {qr_success_count}, Metin: {text_success_count})")
+    
+    # Son faturayı işle
+    if current_invoice_parts:
+        inv_data = _parse_invoice_pages(current_invoice_parts, pdf_path, current_invoice_start_page)
+        if inv_data:
+            count += 1
+            text_success_count += 1
+            yield inv_data
+    
+    print(f"\n=== Sonuç ===")
+    print(f"Toplam fatura: {count}")
+    print(f"  QR'dan okunan: {qr_success_count}")
+    print(f"  Metinden okunan: {text_success_count}")
+    if qr_stats:
+        print(f"  QR tarama: {qr_istatistik_ozeti(qr_stats)}")
+
+
+def extract_invoices_from_bulk_pdf_with_qr(pdf_path, progress_callback=None, use_qr=True, oturum=None):
     """
     Çok sayfalı PDF dosyasından faturaları çıkar.
     QR kod varsa QR'dan, yoksa metin analizinden veri çıkarır.
@@ -447,6 +1151,7 @@ def extract_invoices_from_bulk_pdf_with_qr(pdf_path, progress_callback=None, use
         pdf_path: PDF dosya yolu
         progress_callback: İlerleme callback fonksiyonu (current, total)
         use_qr: QR kod okuma aktif mi
+        oturum: Açık PDFOturumu (smart_extract_invoices_from_pdf'ten)
         
     Returns:
         list: Fatura verileri listesi
@@ -459,80 +1164,10 @@ def extract_invoices_from_bulk_pdf_with_qr(pdf_path, progress_callback=None, use
         return []
     
     invoices = []
-    qr_success_count = 0
-    text_success_count = 0
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            total_pages = len(pdf.pages)
-            print(f"Toplam sayfa: {total_pages}")
-            print(f"QR okuma: {'Aktif' if use_qr and PYZBAR_AVAILABLE else 'Pasif'}")
-            
-            current_invoice_text = ""
-            current_invoice_start_page = 1
-            
-            for page_num, page in enumerate(pdf.pages, 1):
-                text = page.extract_text() or ""
-                
-                # İlerleme bildirimi
-                if progress_callback:
-                    progress_callback(page_num, total_pages)
-                
-                # Önce QR koddan okumayı dene
-                qr_invoice = None
-                if use_qr and PYZBAR_AVAILABLE:
-                    qr_invoice = extract_qr_from_pdf_page(page)
-                    if qr_invoice:
-                        qr_invoice['source_path'] = f"{pdf_path}#page{page_num}"
-                        invoices.append(qr_invoice)
-                        qr_success_count += 1
-                        continue  # QR başarılı, metne gerek yok
-                
-                # QR yoksa veya okunamazsa metin analizi
-                # Yeni fatura başlangıcı kontrolü
-                is_new_invoice = False
-                
-                new_invoice_patterns = [
-                    r'Fatura\s*No\s*[:\s]*[A-Z]{2,4}\d{10,}',
-                    r'e-Fatura\s*No',
-                    r'FATURA\s*NO',
-                    r'e-Arşiv\s*Fatura',
-                    r'Belge\s*No\s*[:\s]*[A-Z]{2,4}\d{10,}',
-                    r'[A-Z]{3}20\d{2}\d{10,}',
-                ]
-                
-                for pattern in new_invoice_patterns:
-                    if re.search(pattern, text, re.IGNORECASE):
-                        is_new_invoice = True
-                        break
-                
-                if is_new_invoice and current_invoice_text:
-                    # Önceki faturayı işle
-                    inv_data = parse_invoice_text(current_invoice_text, f"{pdf_path}#page{current_invoice_start_page}")
-                    if inv_data and (inv_data.get('sira_no') or inv_data.get('kdv', 0) > 0):
-                        invoices.append(inv_data)
-                        text_success_count += 1
-                    
-                    current_invoice_text = text + "\n"
-                    current_invoice_start_page = page_num
-                else:
-                    current_invoice_text += text + "\n"
-                
-                # Her 20 sayfada bir log
-                if page_num % 20 == 0:
-                    print(f"  İşleniyor: {page_num}/{total_pages} sayfa, {len(invoices)} fatura (QR: {qr_success_count}, Metin: {text_success_count})")
-            
-            # Son faturayı işle
-            if current_invoice_text:
-                inv_data = parse_invoice_text(current_invoice_text, f"{pdf_path}#page{current_invoice_start_page}")
-                if inv_data and (inv_data.get('sira_no') or inv_data.get('kdv', 0) > 0):
-                    invoices.append(inv_data)
-                    text_success_count += 1
-            
-            print(f"\n=== Sonuç ===")
-            print(f"Toplam fatura: {len(invoices)}")
-            print(f"  QR'dan okunan: {qr_success_count}")
-            print(f"  Metinden okunan: {text_success_count}")
+        for invoice in iter_invoices_from_bulk_pdf_with_qr(pdf_path, progress_callback, use_qr, oturum):
+            invoices.append(invoice)
     
     except Exception as e:
         print(f"PDF okuma hatası ({pdf_path}): {e}")
@@ -542,7 +1177,7 @@ def extract_invoices_from_bulk_pdf_with_qr(pdf_path, progress_callback=None, use
     return invoices
 
 
-def extract_invoices_from_image_pdf(pdf_path, progress_callback=None):
+def extract_invoices_from_image_pdf(pdf_path, progress_callback=None, oturum=None):
     """
     Görüntü tabanlı PDF dosyasından QR kodları tarayarak faturaları çıkar.
     E-Arşiv fatura PDF'leri için (metin içermeyen, sadece görüntü).
@@ -551,6 +1186,7 @@ def extract_invoices_from_image_pdf(pdf_path, progress_callback=None):
     Args:
         pdf_path: PDF dosya yolu
         progress_callback: İlerleme callback fonksiyonu (current, total)
+        oturum: Açık PDFOturumu (smart_extract_invoices_from_pdf'ten)
         
     Returns:
         list: Fatura verileri listesi
@@ -569,55 +1205,15 @@ def extract_invoices_from_image_pdf(pdf_path, progress_callback=None):
     seen_invoice_nos = set()  # Tekrar eden faturaları önle
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            total_pages = len(pdf.pages)
-            print(f"Görüntü PDF tarama başladı: {total_pages} sayfa")
-            
-            for page_num, page in enumerate(pdf.pages, 1):
-                # İlerleme bildirimi
-                if progress_callback:
-                    progress_callback(page_num, total_pages)
-                
-                # Sayfayı görüntüye çevir ve QR tara
-                qr_invoice = extract_qr_from_pdf_page(page, resolution=200)
-                
-                if qr_invoice:
-                    # Sayfa numarasını ekle
-                    qr_invoice['source_path'] = f"{pdf_path}#page{page_num}"
-                    qr_invoice['page_num'] = page_num
-                    invoices.append(qr_invoice)
-                    inv_no = f"{qr_invoice.get('seri', '')}{qr_invoice.get('sira_no', '')}"
-                    print(f"  Sayfa {page_num}: Fatura {inv_no} bulundu")
-                else:
-                    # QR okunamayan sayfalar için placeholder ekle
-                    placeholder = {
-                        'tarih': '',
-                        'seri': '',
-                        'sira_no': f'SAYFA {page_num} - OKUNAMADI',
-                        'satici_vkn': '',
-                        'satici_unvan': 'QR Kod Okunamadı',
-                        'mal_cinsi': 'PDF sayfasını görüntülemek için Fatura butonuna tıklayın',
-                        'miktar': '',
-                        'kdv_haric_tutar': 0.0,
-                        'kdv': 0.0,
-                        'tevkifat_kdv': 0.0,
-                        'iki_nolu_kdv': 0.0,
-                        'toplam_indirilen_kdv': 0.0,
-                        'ggb_tescil_no': '',
-                        'kdv_donemi': '',
-                        'source_type': 'PDF-OKUNAMADI',
-                        'source_path': f"{pdf_path}#page{page_num}",
-                        'page_num': page_num
-                    }
-                    invoices.append(placeholder)
-                    print(f"  Sayfa {page_num}: QR okunamadı - placeholder eklendi")
-                
-                # Her 5 sayfada bir log
-                if page_num % 5 == 0:
-                    print(f"  İşleniyor: {page_num}/{total_pages} sayfa, {len(invoices)} fatura bulundu")
-            
-            print(f"\n=== Sonuç ===")
-            print(f"Toplam fatura: {len(invoices)}")
+        total_pages = _page_count(pdf_path, oturum)
+        print(f"Görüntü PDF tarama başladı: {total_pages} sayfa")
+        
+        # Sayfaları görüntüye çevir ve QR tara (paralel, sonuçlar sayfa sırasıyla)
+        qr_stats = []
+        pages = scan_pdf_pages(pdf_path, total_pages, use_qr=True, read_text=False,
+                               progress_callback=progress_callback, qr_stats=qr_stats, oturum=oturum)
+        
+        invoices = _image_pages_to_invoices(pdf_path, pages, qr_stats)
     
     except Exception as e:
         print(f"PDF okuma hatası ({pdf_path}): {e}")
@@ -627,10 +1223,63 @@ def extract_invoices_from_image_pdf(pdf_path, progress_callback=None):
     return invoices
 
 
+def _image_pages_to_invoices(pdf_path, pages, qr_stats):
+    """Görüntü PDF'inin sayfa sonuçlarından fatura listesi (QR okunamayan sayfaya yer tutucu)"""
+    invoices = []
+    total_pages = len(pages)
+    
+    for page_num, qr_invoice, _ in pages:
+        if qr_invoice:
+            # Sayfa numarasını ekle
+            qr_invoice['source_path'] = f"{pdf_path}#page{page_num}"
+            qr_invoice['page_num'] = page_num
+            invoices.append(qr_invoice)
+            inv_no = f"{qr_invoice.get('seri', '')}{qr_invoice.get('sira_no', '')}"
+            print(f"  Sayfa {page_num}: Fatura {inv_no} bulundu")
+        else:
+            # QR okunamayan sayfalar için placeholder ekle
+            placeholder = {
+                'tarih': '',
+                'seri': '',
+                'sira_no': f'SAYFA {page_num} - OKUNAMADI',
+                'satici_vkn': '',
+                'satici_unvan': 'QR Kod Okunamadı',
+                'mal_cinsi': 'PDF sayfasını görüntülemek için Fatura butonuna tıklayın',
+                'miktar': '',
+                'kdv_haric_tutar': 0.0,
+                'kdv': 0.0,
+                'tevkifat_kdv': 0.0,
+                'iki_nolu_kdv': 0.0,
+                'toplam_indirilen_kdv': 0.0,
+                'ggb_tescil_no': '',
+                'kdv_donemi': '',
+                'source_type': 'PDF-OKUNAMADI',
+                'source_path': f"{pdf_path}#page{page_num}",
+                'page_num': page_num
+            }
+            invoices.append(placeholder)
+            print(f"  Sayfa {page_num}: QR okunamadı - placeholder eklendi")
+        
+        # Her 5 sayfada bir log
+        if page_num % 5 == 0:
+            print(f"  İşleniyor: {page_num}/{total_pages} sayfa, {len(invoices)} fatura bulundu")
+    
+    print(f"\n=== Sonuç ===")
+    print(f"Toplam fatura: {len(invoices)}")
+    print(f"  QR tarama: {qr_istatistik_ozeti(qr_stats)}")
+    
+    return invoices
+
+
+def _metin_tabanli_mi(oturum):
+    """İlk 3 sayfadan biri metin / hibrit sayfa mı (smart_extract belge tipi)"""
+    return any(oturum.sayfa_tipi(page_num) != 'goruntu' for page_num in range(1, min(3, oturum.total_pages) + 1))
+
+
 def smart_extract_invoices_from_pdf(pdf_path, progress_callback=None):
     """
     PDF tipini otomatik algılayıp uygun yöntemi kullanır.
-    - Metin içeriyorsa: metin + QR analizi
+    - Metin içeriyorsa: sayfa bazında metin / QR analizi (PDFOturumu.sayfa_tipi)
     - Sadece görüntüyse: QR tarama
     
     Args:
@@ -647,24 +1296,230 @@ def smart_extract_invoices_from_pdf(pdf_path, progress_callback=None):
         print(f"PDF dosyası bulunamadı: {pdf_path}")
         return []
     
-    # İlk birkaç sayfadan metin çıkarmayı dene
-    has_text = False
+    # Belge bir kez açılır; örneklenen sayfalar taramada yeniden ayrıştırılmaz
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages[:3]:
-                text = page.extract_text()
-                if text and len(text.strip()) > 50:
-                    has_text = True
-                    break
-    except:
-        pass
+        oturum = PDFOturumu(pdf_path)
+    except Exception:
+        oturum = None
     
-    if has_text:
-        print("Metin tabanlı PDF algılandı - Hibrit tarama (metin + QR)")
-        return extract_invoices_from_bulk_pdf_with_qr(pdf_path, progress_callback, use_qr=True)
+    try:
+        # İlk birkaç sayfanın tipine bak; metin sayfası varsa sayfa bazında hibrit tarama
+        has_text = False
+        if oturum is not None:
+            try:
+                has_text = _metin_tabanli_mi(oturum)
+            except Exception:
+                pass
+        
+        if has_text:
+            print("Metin tabanlı PDF algılandı - Hibrit tarama (sayfa bazında metin / QR)")
+            return extract_invoices_from_bulk_pdf_with_qr(pdf_path, progress_callback, use_qr=True, oturum=oturum)
+        else:
+            print("Görüntü tabanlı PDF algılandı - QR tarama")
+            return extract_invoices_from_image_pdf(pdf_path, progress_callback, oturum=oturum)
+    finally:
+        if oturum is not None:
+            oturum.close()
+
+
+class _TopluPDF:
+    """Toplu taramada tek PDF'in durumu"""
+
+    def __init__(self, pdf_path):
+        self.path = pdf_path
+        self.size = os.path.getsize(pdf_path)
+        self.total_pages = 0
+        self.has_text = False
+        self.use_qr = False
+        self.read_text = False
+        self.surum = None
+        self.ozet = None
+        self.izler = None
+        self.cached = {}
+        self.scanned = {}
+        self.pages = []         # Taranacak sayfalar
+        self.shards = []
+        self.kalan = 0          # Bitmemiş sayfa aralığı
+        self.qr_stats = []
+        self.hata = None
+
+    def hazirla(self):
+        """Belge tipi (smart_extract ile aynı örnekleme), tarama kipi ve önbellek"""
+        with PDFOturumu(self.path) as oturum:
+            self.total_pages = oturum.total_pages
+            self.has_text = _metin_tabanli_mi(oturum)
+        if self.has_text:
+            self.use_qr, self.read_text = PYZBAR_AVAILABLE, True
+        elif not PYZBAR_AVAILABLE:
+            raise ImportError("pyzbar kütüphanesi gerekli: pip install pyzbar")
+        else:
+            self.use_qr, self.read_text = True, False
+
+        self.surum = _tarama_surumu(self.use_qr, self.read_text)
+        self.ozet, self.izler, self.cached = _onbellek_oku(self.path, self.total_pages, self.surum)
+        if self.use_qr:
+            self.qr_stats.extend(_onbellek_istatistigi(self.cached))
+        self.pages = [page_num for page_num in range(1, self.total_pages + 1) if page_num not in self.cached]
+
+    def faturalar(self):
+        """Tüm sayfalar bitince: önbelleğe yaz, faturaları grupla"""
+        if self.ozet and self.izler:
+            try:
+                pdf_tarama_onbellegi.save_document(self.ozet, self.surum, self.izler, self.scanned)
+            except Exception as e:
+                print(f"PDF önbelleğine yazılamadı ({self.path}): {e}")
+
+        pages = []
+        for page_num in range(1, self.total_pages + 1):
+            qr_invoice, text = self.cached[page_num] if page_num in self.cached else self.scanned[page_num]
+            pages.append((page_num, qr_invoice, text))
+        if self.has_text:
+            return list(_group_invoices_with_qr(self.path, pages, self.total_pages, self.qr_stats))
+        return _image_pages_to_invoices(self.path, pages, self.qr_stats)
+
+
+def smart_extract_invoices_from_pdfs(pdf_paths, progress_callback=None, on_result=None, workers=None,
+                                     istatistik=None):
+    """
+    Birden fazla PDF'i tek worker havuzunda tara (toplu yükleme / klasör)
+
+    Her PDF smart_extract_invoices_from_pdf gibi işlenir; ancak tüm PDF'lerin
+    sayfa aralıkları tek süreç havuzuna verilir, havuz toplam süreç
+    bütçesiyle (workers) sınırlıdır. Küçük dosyalar önce sıraya girer; her
+    PDF'in sonucu bitince on_result ile bildirilir.
+
+    Args:
+        pdf_paths: PDF dosya yolları
+        progress_callback: Toplam ilerleme (taranan sayfa, toplam sayfa)
+        on_result: Her PDF bitince on_result(pdf yolu, faturalar, hata mesajı veya None)
+        workers: Toplam süreç bütçesi (None: PDF_WORKERS)
+        istatistik: Verilirse toplam dosya / sayfa / süre / hız bilgisi bu sözlüğe yazılır
+
+    Returns:
+        dict: {pdf yolu: fatura listesi} verilen sırayla (okunamayan PDF için boş liste)
+    """
+    if not PDFPLUMBER_AVAILABLE:
+        raise ImportError("pdfplumber kütüphanesi gerekli")
+
+    baslangic = time.perf_counter()
+    workers = max(1, workers or PDF_WORKERS)
+    results = {}
+
+    def bitir(pdf_path, invoices, hata=None):
+        if hata:
+            print(f"PDF okuma hatası ({pdf_path}): {hata}")
+        results[pdf_path] = invoices
+        if on_result:
+            on_result(pdf_path, invoices, hata)
+
+    def tamamla(doc):
+        try:
+            invoices = [] if doc.hata else doc.faturalar()
+        except Exception as e:
+            doc.hata = str(e)
+            invoices = []
+        bitir(doc.path, invoices, doc.hata)
+
+    # Küçük dosyalar önce: ilk sonuçlar hızlı gelir
+    docs = []
+    for pdf_path in dict.fromkeys(pdf_paths):
+        if not os.path.exists(pdf_path):
+            bitir(pdf_path, [], 'PDF dosyası bulunamadı')
+        else:
+            docs.append(_TopluPDF(pdf_path))
+    docs.sort(key=lambda doc: doc.size)
+
+    hazir = []
+    for doc in docs:
+        try:
+            doc.hazirla()
+            hazir.append(doc)
+        except Exception as e:
+            bitir(doc.path, [], str(e))
+
+    total_pages = sum(doc.total_pages for doc in hazir)
+    taranacak = sum(len(doc.pages) for doc in hazir)
+    done = total_pages - taranacak
+    print(f"Toplu PDF tarama: {len(hazir)} dosya, {total_pages} sayfa "
+          f"({done} önbellekten), {workers} süreç")
+    if progress_callback:
+        progress_callback(done, total_pages)
+
+    # Aralık boyu tüm dosyaların toplamına göre: küçük PDF'ler tek parça kalır
+    size = _shard_size(taranacak, workers)
+    for doc in hazir:
+        doc.shards = _page_shards(doc.pages, workers, size)
+        doc.kalan = len(doc.shards)
+
+    # Tamamı önbellekten gelenler hemen biter
+    for doc in hazir:
+        if not doc.shards:
+            tamamla(doc)
+
+    if workers <= 1 or taranacak < PARALEL_MIN_SAYFA:
+        # Tek süreç: PDF başına tek oturum
+        for doc in hazir:
+            if not doc.shards:
+                continue
+            with PDFOturumu(doc.path) as oturum:
+                for start, end in doc.shards:
+                    tarayici = QRTarayici()
+                    try:
+                        for page_num, qr_invoice, text in _iter_page_range(oturum, start, end, doc.use_qr,
+                                                                           doc.read_text, tarayici):
+                            doc.scanned[page_num] = (qr_invoice, text)
+                    except Exception as e:
+                        doc.hata = str(e)
+                    doc.qr_stats.extend(tarayici.istatistik)
+                    done += end - start
+                    if progress_callback:
+                        progress_callback(done, total_pages)
+                    if doc.hata:
+                        break
+            tamamla(doc)
     else:
-        print("Görüntü tabanlı PDF algılandı - QR tarama")
-        return extract_invoices_from_image_pdf(pdf_path, progress_callback)
+        # spawn: web_app'in çok thread'li süreçlerinde fork güvenli değil
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            # Havuz işleri sırayla alır: küçük dosyaların aralıkları önce
+            futures = {}
+            for doc in hazir:
+                for start, end in doc.shards:
+                    future = executor.submit(_scan_page_range, doc.path, start, end, doc.use_qr, doc.read_text)
+                    futures[future] = (doc, end - start)
+            for future in as_completed(futures):
+                doc, count = futures[future]
+                try:
+                    part, stats = future.result()
+                    for page_num, qr_invoice, text in part:
+                        doc.scanned[page_num] = (qr_invoice, text)
+                    doc.qr_stats.extend(stats)
+                except Exception as e:
+                    doc.hata = doc.hata or str(e)
+                done += count
+                if progress_callback:
+                    progress_callback(done, total_pages)
+                doc.kalan -= 1
+                if doc.kalan == 0:
+                    tamamla(doc)
+        finally:
+            # Hata veya iptal durumunda bekleyen parçaları başlatma
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    sure = time.perf_counter() - baslangic
+    hiz = taranacak / sure if sure > 0 else 0.0
+    print(f"Toplu PDF tarama bitti: {len(results)} dosya, {sum(map(len, results.values()))} fatura, "
+          f"{total_pages} sayfa, {sure:.1f} sn ({hiz:.1f} sayfa/sn)")
+    if istatistik is not None:
+        istatistik.update({
+            'dosya': len(results),
+            'sayfa': total_pages,
+            'taranan_sayfa': taranacak,
+            'sure': round(sure, 2),
+            'sayfa_per_sn': round(hiz, 2),
+        })
+    # Verilen sırayla
+    return {pdf_path: results[pdf_path] for pdf_path in dict.fromkeys(pdf_paths)}
 
 
 # Test
@@ -2,19 +2,30 @@
 PDF Fatura Tarama Sunucusu
 PDF dosyalarını yükleyip fatura verisi çıkarmak için Flask sunucusu.
 Fatura görüntüleme özelliği ile.
+
+/scan sonuçları NDJSON olarak akıtır: ilk satır tarama id'sini verir,
+faturalar sayfalar çözüldükçe gelir. Sayfa görüntüleri tarama id'si ile
+istenir; birden fazla kullanıcı aynı anda tarama yapabilir.
 """
 
 import os
 import json
+import queue
+import time
+import uuid
+import threading
+import traceback
 import webbrowser
 import base64
 import io
-from flask import Flask, request, jsonify, send_from_directory, render_template_string, send_file
+from flask import Flask, Response, request, jsonify, send_from_directory, render_template_string, send_file
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
 # PDF okuyucuyu import et
-from pdf_invoice_reader import extract_invoices_from_bulk_pdf_with_qr, PDFPLUMBER_AVAILABLE, PYZBAR_AVAILABLE
+from pdf_invoice_reader import (
+    iter_invoices_from_bulk_pdf_with_qr, PDFOturumu, PDFPLUMBER_AVAILABLE, PYZBAR_AVAILABLE
+)
 
 try:
     import pdfplumber
@@ -35,14 +46,48 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['PAGE_IMAGES_FOLDER'] = PAGE_IMAGES_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50 MB max
 
-# Global: Son taranan PDF yolu
-last_scanned_pdf = None
+# Taramalar: tarama id -> {'path', 'filename', 'created'} (sayfa görüntüleri için PDF yolu)
+SCAN_RETENTION_SECONDS = 6 * 3600
+_scans = {}
+_scans_lock = threading.Lock()
+
+# Tarama thread'i ile yanıt akışı arasında bekleyen en fazla satır (geri basınç)
+TARAMA_KUYRUGU = 64
 
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _register_scan(filename):
+    """Yeni tarama kaydı aç; süresi dolan taramaların PDF'lerini sil"""
+    scan_id = uuid.uuid4().hex
+    path = os.path.join(app.config['UPLOAD_FOLDER'], f'{scan_id}.pdf')
+    now = time.time()
+    with _scans_lock:
+        for old_id in [sid for sid, scan in _scans.items() if now - scan['created'] > SCAN_RETENTION_SECONDS]:
+            try:
+                os.remove(_scans.pop(old_id)['path'])
+            except OSError:
+                pass
+        _scans[scan_id] = {'path': path, 'filename': filename, 'created': now}
+    return scan_id, path
+
+
+def _scan_path(scan_id):
+    with _scans_lock:
+        scan = _scans.get(scan_id)
+    return scan['path'] if scan else None
+
+
+def _ndjson(event):
+    return json.dumps(event, ensure_ascii=False) + '\n'
+
+
+def _scan_error(message):
+    return Response(_ndjson({'type': 'error', 'error': message}), mimetype='application/x-ndjson')
+
+
 @app.route('/')
 def index():
     """Ana sayfa - PDF Fatura Tarayıcı arayüzü"""
@@ -257,7 +302,9 @@ def index():
     
     <script>
         let scannedInvoices = [];
+        let scanTotals = { qr: 0, text: 0, kdv: 0 };
         let currentPdfFile = null;
+        let currentScanId = null;
         
         const dropZone = document.getElementById('dropZone');
         
@@ -282,70 +329,107 @@ def index():
             const progressText = document.getElementById('progressText');
             
             currentPdfFile = file.name;
+            currentScanId = null;
+            resetResults();
             progressContainer.style.display = 'block';
-            progressFill.style.width = '10%';
+            progressFill.style.background = '';
+            progressFill.style.width = '5%';
             progressText.textContent = 'Dosya yükleniyor...';
             
             const formData = new FormData();
             formData.append('file', file);
             
             try {
-                progressFill.style.width = '30%';
-                progressText.textContent = 'PDF taranıyor (bu birkaç dakika sürebilir)...';
-                
+                // Sonuçlar NDJSON satırları olarak, sayfalar çözüldükçe gelir
                 const response = await fetch('/scan', { method: 'POST', body: formData });
+                const contentType = response.headers.get('Content-Type') || '';
+                if (!contentType.startsWith('application/x-ndjson')) {
+                    throw new Error('Sunucu hatası (' + response.status + ')');
+                }
                 
-                progressFill.style.width = '90%';
-                progressText.textContent = 'Sonuçlar işleniyor...';
-                
-                const data = await response.json();
-                
-                if (data.success) {
-                    progressFill.style.width = '100%';
-                    progressText.textContent = 'Tamamlandı!';
-                    scannedInvoices = data.invoices;
-                    displayResults(data);
-                    setTimeout(() => { progressContainer.style.display = 'none'; }, 1000);
-                } else {
-                    progressText.textContent = 'Hata: ' + data.error;
-                    progressFill.style.background = '#e74c3c';
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                let finished = false;
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    let newline;
+                    while ((newline = buffer.indexOf('\\n')) >= 0) {
+                        const line = buffer.slice(0, newline).trim();
+                        buffer = buffer.slice(newline + 1);
+                        if (line && handleScanEvent(JSON.parse(line))) finished = true;
+                    }
                 }
+                if (!finished) throw new Error('Tarama yarıda kesildi');
             } catch (error) {
                 progressText.textContent = 'Hata: ' + error.message;
                 progressFill.style.background = '#e74c3c';
             }
         }
         
-        function displayResults(data) {
-            document.getElementById('resultsSection').style.display = 'block';
-            document.getElementById('totalInvoices').textContent = data.invoices.length;
-            document.getElementById('qrCount').textContent = data.qr_count;
-            document.getElementById('textCount').textContent = data.text_count;
+        function handleScanEvent(event) {
+            const progressContainer = document.getElementById('progressContainer');
+            const progressFill = document.getElementById('progressFill');
+            const progressText = document.getElementById('progressText');
             
-            let totalKDV = 0;
-            data.invoices.forEach(inv => totalKDV += (inv.kdv || 0));
-            document.getElementById('totalKDV').textContent = formatNumber(totalKDV) + ' ₺';
+            if (event.type === 'scan') {
+                currentScanId = event.scan_id;
+                progressFill.style.width = '10%';
+                progressText.textContent = 'PDF taranıyor: ' + event.total_pages + ' sayfa';
+            } else if (event.type === 'progress') {
+                progressFill.style.width = (10 + 90 * event.done / event.total) + '%';
+                progressText.textContent = 'Taranan sayfa: ' + event.done + ' / ' + event.total;
+            } else if (event.type === 'invoice') {
+                appendInvoice(event.invoice);
+            } else if (event.type === 'done') {
+                progressFill.style.width = '100%';
+                progressText.textContent = 'Tamamlandı!';
+                setTimeout(() => { progressContainer.style.display = 'none'; }, 1000);
+                return true;
+            } else if (event.type === 'error') {
+                throw new Error(event.error);
+            }
+            return false;
+        }
+        
+        function resetResults() {
+            scannedInvoices = [];
+            scanTotals = { qr: 0, text: 0, kdv: 0 };
+            document.getElementById('invoiceTableBody').innerHTML = '';
+            updateSummary();
+        }
+        
+        function updateSummary() {
+            document.getElementById('totalInvoices').textContent = scannedInvoices.length;
+            document.getElementById('qrCount').textContent = scanTotals.qr;
+            document.getElementById('textCount').textContent = scanTotals.text;
+            document.getElementById('totalKDV').textContent = formatNumber(scanTotals.kdv) + ' ₺';
+        }
+        
+        function appendInvoice(inv) {
+            scannedInvoices.push(inv);
+            if (inv.source_type === 'QR') scanTotals.qr++; else scanTotals.text++;
+            scanTotals.kdv += (inv.kdv || 0);
+            document.getElementById('resultsSection').style.display = 'block';
+            updateSummary();
             
-            const tbody = document.getElementById('invoiceTableBody');
-            tbody.innerHTML = '';
+            const tr = document.createElement('tr');
+            const sourceClass = inv.source_type === 'QR' ? 'source-qr' : 'source-text';
+            const pageNum = extractPageNum(inv.source_path);
             
-            data.invoices.forEach((inv, idx) => {
-                const tr = document.createElement('tr');
-                const sourceClass = inv.source_type === 'QR' ? 'source-qr' : 'source-text';
-                const pageNum = extractPageNum(inv.source_path);
-                
-                tr.innerHTML = `
-                    <td>${idx + 1}</td>
-                    <td><span class="source-badge ${sourceClass}">${inv.source_type || 'PDF'}</span></td>
-                    <td><strong>${inv.seri || ''}${inv.sira_no || ''}</strong></td>
-                    <td>${inv.tarih || '-'}</td>
-                    <td>${inv.satici_vkn || '-'}</td>
-                    <td class="num">${formatNumber(inv.kdv_haric_tutar || 0)}</td>
-                    <td class="num">${formatNumber(inv.kdv || 0)}</td>
-                    <td><button class="btn btn-info" onclick="showInvoice(${pageNum}, '${inv.seri || ''}${inv.sira_no || ''}')">👁 Görüntüle</button></td>
-                `;
-                tbody.appendChild(tr);
-            });
+            tr.innerHTML = `
+                <td>${scannedInvoices.length}</td>
+                <td><span class="source-badge ${sourceClass}">${inv.source_type || 'PDF'}</span></td>
+                <td><strong>${inv.seri || ''}${inv.sira_no || ''}</strong></td>
+                <td>${inv.tarih || '-'}</td>
+                <td>${inv.satici_vkn || '-'}</td>
+                <td class="num">${formatNumber(inv.kdv_haric_tutar || 0)}</td>
+                <td class="num">${formatNumber(inv.kdv || 0)}</td>
+                <td><button class="btn btn-info" onclick="showInvoice(${pageNum}, '${inv.seri || ''}${inv.sira_no || ''}')">👁 Görüntüle</button></td>
+            `;
+            document.getElementById('invoiceTableBody').appendChild(tr);
         }
         
         function extractPageNum(sourcePath) {
@@ -364,7 +448,7 @@ def index():
             modal.classList.add('show');
             
             // Sayfa görüntüsünü yükle
-            fetch('/page-image/' + pageNum)
+            fetch('/page-image/' + currentScanId + '/' + pageNum)
                 .then(response => {
                     if (response.ok) return response.blob();
                     throw new Error('Sayfa yüklenemedi');
@@ -430,62 +514,104 @@ def index():
 
 @app.route('/scan', methods=['POST'])
 def scan_pdf():
-    """PDF dosyasını tara ve fatura verilerini döndür"""
-    global last_scanned_pdf
-    
+    """
+    PDF dosyasını tara, sonuçları NDJSON olarak akıt
+
+    Satırlar:
+        {"type": "scan", "scan_id", "total_pages"}
+        {"type": "progress", "done", "total"} / {"type": "invoice", "invoice"} ...
+        {"type": "done", "total_count", "qr_count", "text_count"} veya {"type": "error", "error"}
+    """
     if 'file' not in request.files:
-        return jsonify({'success': False, 'error': 'Dosya bulunamadı'})
+        return _scan_error('Dosya bulunamadı')
     
     file = request.files['file']
     if file.filename == '':
-        return jsonify({'success': False, 'error': 'Dosya seçilmedi'})
+        return _scan_error('Dosya seçilmedi')
     
     if not allowed_file(file.filename):
-        return jsonify({'success': False, 'error': 'Sadece PDF dosyaları kabul edilir'})
+        return _scan_error('Sadece PDF dosyaları kabul edilir')
     
-    try:
-        # Dosyayı kaydet (silmeyeceğiz, sayfa görüntüsü için lazım)
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Son taranan PDF'i sakla
-        last_scanned_pdf = filepath
-        
-        # PDF'i tara
-        invoices = extract_invoices_from_bulk_pdf_with_qr(filepath, use_qr=True)
-        
-        # QR ve metin sayılarını hesapla
-        qr_count = sum(1 for inv in invoices if inv.get('source_type') == 'QR')
-        text_count = len(invoices) - qr_count
-        
-        return jsonify({
-            'success': True,
-            'invoices': invoices,
-            'total_count': len(invoices),
-            'qr_count': qr_count,
-            'text_count': text_count
-        })
+    # Dosyayı tarama id'si ile kaydet (sayfa görüntüsü için lazım)
+    scan_id, filepath = _register_scan(secure_filename(file.filename))
+    file.save(filepath)
     
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)})
+    # Tarama ayrı thread'de yapılır; satırlar kuyruktan okundukça gönderilir,
+    # böylece ilerleme bir sonraki faturayı beklemeden istemciye ulaşır
+    events = queue.Queue(maxsize=TARAMA_KUYRUGU)
+    closed = threading.Event()
+    
+    def put(event):
+        # İstemci bağlantıyı kapattıysa taramayı durdur
+        while True:
+            if closed.is_set():
+                raise OSError('Tarama akışı istemci tarafından kapatıldı')
+            try:
+                events.put(event, timeout=1)
+                return
+            except queue.Full:
+                continue
+    
+    def on_progress(done, total):
+        put({'type': 'progress', 'done': done, 'total': total})
+    
+    def run():
+        qr_count = 0
+        text_count = 0
+        try:
+            with PDFOturumu(filepath) as oturum:
+                put({'type': 'scan', 'scan_id': scan_id, 'total_pages': oturum.total_pages})
+                
+                for invoice in iter_invoices_from_bulk_pdf_with_qr(filepath, on_progress, use_qr=True, oturum=oturum):
+                    if invoice.get('source_type') == 'QR':
+                        qr_count += 1
+                    else:
+                        text_count += 1
+                    put({'type': 'invoice', 'invoice': invoice})
+            
+            put({
+                'type': 'done',
+                'total_count': qr_count + text_count,
+                'qr_count': qr_count,
+                'text_count': text_count
+            })
+        except Exception as e:
+            if closed.is_set():
+                return
+            traceback.print_exc()
+            try:
+                put({'type': 'error', 'error': str(e)})
+            except OSError:
+                pass
+    
+    def generate():
+        threading.Thread(target=run, name='emp-pdf-scan', daemon=True).start()
+        try:
+            while True:
+                event = events.get()
+                yield _ndjson(event)
+                if event['type'] in ('done', 'error'):
+                    return
+        finally:
+            closed.set()
+    
+    # Bağlantı kapanırsa üreteç kapanır, tarama durur
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'X-Scan-Id': scan_id, 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
-@app.route('/page-image/<int:page_num>')
-def page_image(page_num):
-    """PDF sayfasının görüntüsünü döndür"""
-    global last_scanned_pdf
-    
-    if not last_scanned_pdf or not os.path.exists(last_scanned_pdf):
+@app.route('/page-image/<scan_id>/<int:page_num>')
+def page_image(scan_id, page_num):
+    """Taranan PDF'in sayfa görüntüsünü döndür"""
+    pdf_path = _scan_path(scan_id)
+    if not pdf_path or not os.path.exists(pdf_path):
         return jsonify({'error': 'PDF dosyası bulunamadı'}), 404
     
     if not pdfplumber:
         return jsonify({'error': 'pdfplumber yüklü değil'}), 500
     
     try:
-        with pdfplumber.open(last_scanned_pdf) as pdf:
+        with pdfplumber.open(pdf_path) as pdf:
             if page_num < 1 or page_num > len(pdf.pages):
                 return jsonify({'error': 'Geçersiz sayfa numarası'}), 400
             
@@ -518,7 +644,7 @@ def status():
         'status': 'running',
         'pdfplumber': PDFPLUMBER_AVAILABLE,
         'pyzbar': PYZBAR_AVAILABLE,
-        'last_pdf': last_scanned_pdf
+        'active_scans': len(_scans)
     })
 
 
@@ -0,0 +1,265 @@
+"""
+e-Mutabakat Pro - PDF Tarama Önbelleği
+Aynı PDF tekrar yüklendiğinde sayfaları yeniden taramamak için kalıcı
+sayfa sonucu önbelleği (pdf_cache.db)
+
+- Sayfa sonucu (QR faturası veya sayfa metni) sayfa içeriğinin izi ve
+  tarayıcı sürümü ile saklanır; değişmeyen sayfa başka bir PDF'te de
+  yeniden kullanılır
+- Dosya özeti → sayfa izi eşlemesi ayrıca tutulur; birebir aynı dosya
+  sayfa izleri hesaplanmadan tek sorguyla bulunur
+- Sayfa izi içerik akışlarının, görüntü/form nesnelerinin ve fontların
+  ham baytlarından hesaplanır (nesne numaraları dahil edilmez); düzenlenen
+  PDF'te yalnızca değişen sayfalar yeniden taranır
+- Beyanname (KDV 1, KDV 2, Muhtasar) ayrıştırma sonuçları dosya özetiyle
+  dataclass JSON'u olarak saklanır; aynı beyanname tekrar okunmaz
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from threading import Lock
+
+try:
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdftypes import PDFStream, resolve1
+    from pdfminer.psparser import PSLiteral
+    PDFMINER_AVAILABLE = True
+except ImportError:
+    PDFMINER_AVAILABLE = False
+
+# Veritabanı dosyası
+PDF_CACHE_DB_PATH = os.path.join(os.path.dirname(__file__), 'pdf_cache.db')
+
+# EMP_PDF_CACHE=0 ile kapatılır
+ENABLED = os.environ.get('EMP_PDF_CACHE', '1') != '0'
+
+# Bu süreden eski kayıtlar açılışta silinir
+RETENTION_SECONDS = 90 * 24 * 3600
+
+# Form XObject içinde en fazla bu derinliğe kadar inilir
+MAX_FORM_DERINLIK = 4
+
+_init_lock = Lock()
+_initialized_path = None
+
+
+def _connect():
+    conn = sqlite3.connect(PDF_CACHE_DB_PATH, timeout=30)
+    conn.execute('PRAGMA busy_timeout = 30000')
+    return conn
+
+
+def init_cache_db():
+    """Tabloları oluştur, süresi dolan kayıtları sil (süreç başına bir kez)"""
+    global _initialized_path
+    with _init_lock:
+        if _initialized_path == PDF_CACHE_DB_PATH:
+            return
+        conn = _connect()
+        try:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS pdf_sayfa_sonuc (
+                    sayfa_izi TEXT NOT NULL,
+                    surum TEXT NOT NULL,
+                    qr TEXT,
+                    metin TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (sayfa_izi, surum)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS pdf_belge_sayfa (
+                    dosya_ozeti TEXT NOT NULL,
+                    sayfa INTEGER NOT NULL,
+                    sayfa_izi TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (dosya_ozeti, sayfa)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS beyanname_sonuc (
+                    dosya_ozeti TEXT NOT NULL,
+                    tur TEXT NOT NULL,
+                    surum TEXT NOT NULL,
+                    veri TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (dosya_ozeti, tur, surum)
+                )
+            ''')
+            cutoff = time.time() - RETENTION_SECONDS
+            conn.execute('DELETE FROM pdf_sayfa_sonuc WHERE created_at < ?', (cutoff,))
+            conn.execute('DELETE FROM pdf_belge_sayfa WHERE created_at < ?', (cutoff,))
+            conn.execute('DELETE FROM beyanname_sonuc WHERE created_at < ?', (cutoff,))
+            conn.commit()
+        finally:
+            conn.close()
+        _initialized_path = PDF_CACHE_DB_PATH
+
+
+def dosya_ozeti(pdf_path):
+    """PDF dosyasının SHA-256 özeti"""
+    h = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _ham_veri(stream):
+    """Akışın çözülmemiş baytları (çözülmüşse çözülmüş hali)"""
+    data = stream.get_rawdata()
+    return data if data is not None else stream.get_data()
+
+
+def _kaynaklari_isle(h, resources, derinlik):
+    """Sayfa / form kaynaklarındaki XObject ve fontları ize ekle"""
+    resources = resolve1(resources)
+    if not isinstance(resources, dict):
+        return
+
+    xobjects = resolve1(resources.get('XObject'))
+    if isinstance(xobjects, dict):
+        for name in sorted(xobjects, key=str):
+            xobj = resolve1(xobjects[name])
+            if not isinstance(xobj, PDFStream):
+                continue
+            h.update(f'X{name}'.encode())
+            h.update(_ham_veri(xobj))
+            subtype = resolve1(xobj.get('Subtype'))
+            if isinstance(subtype, PSLiteral) and subtype.name == 'Form' and derinlik < MAX_FORM_DERINLIK:
+                _kaynaklari_isle(h, xobj.get('Resources'), derinlik + 1)
+
+    fonts = resolve1(resources.get('Font'))
+    if isinstance(fonts, dict):
+        for name in sorted(fonts, key=str):
+            font = resolve1(fonts[name])
+            if not isinstance(font, dict):
+                continue
+            h.update(f'F{name}{resolve1(font.get("BaseFont"))}'.encode())
+            to_unicode = resolve1(font.get('ToUnicode'))
+            if isinstance(to_unicode, PDFStream):
+                h.update(_ham_veri(to_unicode))
+
+
+def sayfa_izleri(pdf_path):
+    """
+    Her sayfanın içerik izi (sayfa sırasıyla)
+
+    Nesne önbelleği kapalı açılır; büyük görüntü PDF'lerinde okunan akışlar
+    bellekte birikmez.
+    """
+    izler = []
+    with open(pdf_path, 'rb') as f:
+        doc = PDFDocument(PDFParser(f), caching=False)
+        for page in PDFPage.create_pages(doc):
+            h = hashlib.blake2b(digest_size=16)
+            h.update(repr((page.mediabox, page.cropbox, page.rotate)).encode())
+            for stream in page.contents:
+                stream = resolve1(stream)
+                if isinstance(stream, PDFStream):
+                    h.update(_ham_veri(stream))
+            _kaynaklari_isle(h, page.resources, 0)
+            izler.append(h.hexdigest())
+    return izler
+
+
+def _satir_sonucu(qr, metin):
+    return (json.loads(qr) if qr else None), metin
+
+
+def get_document(ozet, surum):
+    """Dosya özeti ile kayıtlı sayfa sonuçları: {sayfa no: (QR faturası veya None, metin)}"""
+    init_cache_db()
+    conn = _connect()
+    try:
+        rows = conn.execute('''
+            SELECT b.sayfa, s.qr, s.metin
+            FROM pdf_belge_sayfa b
+            JOIN pdf_sayfa_sonuc s ON s.sayfa_izi = b.sayfa_izi AND s.surum = ?
+            WHERE b.dosya_ozeti = ?
+        ''', (surum, ozet)).fetchall()
+    finally:
+        conn.close()
+    return {sayfa: _satir_sonucu(qr, metin) for sayfa, qr, metin in rows}
+
+
+def get_pages(izler, surum):
+    """Sayfa izleri ile kayıtlı sonuçlar: {sayfa izi: (QR faturası veya None, metin)}"""
+    init_cache_db()
+    izler = list(set(izler))
+    found = {}
+    conn = _connect()
+    try:
+        # SQLite parametre sınırı için parça parça sorgula
+        for i in range(0, len(izler), 500):
+            part = izler[i:i + 500]
+            rows = conn.execute(
+                f'SELECT sayfa_izi, qr, metin FROM pdf_sayfa_sonuc '
+                f'WHERE surum = ? AND sayfa_izi IN ({",".join("?" * len(part))})',
+                [surum] + part
+            ).fetchall()
+            for iz, qr, metin in rows:
+                found[iz] = _satir_sonucu(qr, metin)
+    finally:
+        conn.close()
+    return found
+
+
+def save_document(ozet, surum, izler, sonuclar):
+    """
+    Dosyanın sayfa izlerini ve yeni taranan sayfa sonuçlarını kaydet
+
+    Args:
+        izler: Sayfa sırasıyla sayfa izleri
+        sonuclar: {sayfa no: (QR faturası veya None, metin)} (yeni taranan sayfalar)
+    """
+    init_cache_db()
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.executemany(
+            'INSERT OR REPLACE INTO pdf_sayfa_sonuc (sayfa_izi, surum, qr, metin, created_at) VALUES (?, ?, ?, ?, ?)',
+            [(izler[sayfa - 1], surum, json.dumps(qr, ensure_ascii=False) if qr else None, metin, now)
+             for sayfa, (qr, metin) in sonuclar.items()]
+        )
+        conn.executemany(
+            'INSERT OR REPLACE INTO pdf_belge_sayfa (dosya_ozeti, sayfa, sayfa_izi, created_at) VALUES (?, ?, ?, ?)',
+            [(ozet, sayfa, iz, now) for sayfa, iz in enumerate(izler, 1)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_beyanname(ozet, tur, surum):
+    """Kayıtlı beyanname ayrıştırma sonucu (dataclass alanları sözlüğü) veya None"""
+    init_cache_db()
+    conn = _connect()
+    try:
+        row = conn.execute(
+            'SELECT veri FROM beyanname_sonuc WHERE dosya_ozeti = ? AND tur = ? AND surum = ?',
+            (ozet, tur, surum)
+        ).fetchone()
+    finally:
+        conn.close()
+    return json.loads(row[0]) if row else None
+
+
+def save_beyanname(ozet, tur, surum, veri):
+    """Beyanname ayrıştırma sonucunu kaydet (veri: dataclasses.asdict çıktısı)"""
+    init_cache_db()
+    conn = _connect()
+    try:
+        conn.execute(
+            'INSERT OR REPLACE INTO beyanname_sonuc (dosya_ozeti, tur, surum, veri, created_at) VALUES (?, ?, ?, ?, ?)',
+            (ozet, tur, surum, json.dumps(veri, ensure_ascii=False), time.time())
+        )
+        conn.commit()
+    finally:
+        conn.close()
@@ -18,12 +18,13 @@ except ImportError:
     GIB_VIEWER_AVAILABLE = False
 
 try:
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+    from openpyxl.styles import Font, Alignment, PatternFill
     OPENPYXL_AVAILABLE = True
 except ImportError:
     OPENPYXL_AVAILABLE = False
 
+import excel_akis
+
 # XML Namespaces
 NS = {
     'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
@@ -340,14 +341,13 @@ def load_sales_invoices_from_zip(zip_path, own_vkn=None, period_filter=None):
 def generate_sales_listesi_excel(invoices, output_path):
     """
     Satış Fatura Listesi Excel dosyası oluştur.
+    
+    Satırlar write-only çalışma kitabına akıtılır; invoices tek geçişte okunur,
+    output_path dosya yolu veya yazılabilir stream olabilir.
     """
     if not OPENPYXL_AVAILABLE:
         raise ImportError("openpyxl kütüphanesi gerekli")
     
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Satış Fatura Listesi"
-    
     # Başlıklar
     headers = [
         "Sıra No",
@@ -364,71 +364,68 @@ def generate_sales_listesi_excel(invoices, output_path):
         "KDV Dönemi"
     ]
     
-    # Stil tanımları
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="2E74B5", end_color="2E74B5", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    # Stil tanımları (çalışma kitabına bir kez eklenir)
+    thin_border = excel_akis.thin_border()
     number_format = '#,##0.00'
+    wb = excel_akis.new_workbook({
+        'satis_kolon': {
+            'font': Font(bold=True, color="FFFFFF"),
+            'fill': PatternFill(start_color="2E74B5", end_color="2E74B5", fill_type="solid"),
+            'alignment': Alignment(horizontal="center", vertical="center", wrap_text=True),
+            'border': thin_border
+        },
+        'satis_hucre': {'border': thin_border},
+        'satis_tutar': {
+            'border': thin_border,
+            'number_format': number_format,
+            'alignment': Alignment(horizontal="right")
+        },
+        'satis_toplam': {'font': Font(bold=True), 'border': thin_border},
+        'satis_toplam_tutar': {'font': Font(bold=True), 'border': thin_border, 'number_format': number_format}
+    })
+    ws = wb.create_sheet("Satış Fatura Listesi")
+    cell = excel_akis.cell
+    
+    # Sütun genişlikleri
+    col_widths = [8, 15, 10, 22, 40, 15, 50, 20, 18, 10, 18, 12]
+    excel_akis.set_column_widths(ws, col_widths)
     
     # Başlık satırı
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
+    ws.append([cell(ws, header, 'satis_kolon') for header in headers])
     
     # Veri satırları
-    for row_idx, inv in enumerate(invoices, 2):
-        sira = row_idx - 1
+    total_kdv_haric = 0
+    total_kdv = 0
+    
+    for sira, inv in enumerate(invoices, 1):
         fatura_no = (inv.get('seri', '') or '') + (inv.get('sira_no', '') or '')
+        kdv_haric = inv.get('kdv_haric_tutar', 0)
+        kdv = inv.get('kdv', 0)
         
-        row_data = [
-            sira,
-            inv.get('tarih', ''),
-            '',  # Seri boş
-            fatura_no,  # Tam fatura numarası
-            inv.get('alici_unvan', '')[:CHAR_LIMIT],
-            inv.get('alici_vkn', ''),
-            inv.get('mal_cinsi', '')[:CHAR_LIMIT],
-            inv.get('miktar', ''),
-            inv.get('kdv_haric_tutar', 0),
-            inv.get('kdv_orani', 20),
-            inv.get('kdv', 0),
-            inv.get('kdv_donemi', '')
-        ]
+        ws.append([
+            cell(ws, sira, 'satis_hucre'),
+            cell(ws, inv.get('tarih', ''), 'satis_hucre'),
+            cell(ws, '', 'satis_hucre'),  # Seri boş
+            cell(ws, fatura_no, 'satis_hucre'),  # Tam fatura numarası
+            cell(ws, inv.get('alici_unvan', '')[:CHAR_LIMIT], 'satis_hucre'),
+            cell(ws, inv.get('alici_vkn', ''), 'satis_hucre'),
+            cell(ws, inv.get('mal_cinsi', '')[:CHAR_LIMIT], 'satis_hucre'),
+            cell(ws, inv.get('miktar', ''), 'satis_hucre'),
+            cell(ws, kdv_haric, 'satis_tutar'),  # Tutar sütunları
+            cell(ws, inv.get('kdv_orani', 20), 'satis_hucre'),
+            cell(ws, kdv, 'satis_tutar'),
+            cell(ws, inv.get('kdv_donemi', ''), 'satis_hucre')
+        ])
         
-        for col, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.border = thin_border
-            if col in [9, 11]:  # Tutar sütunları
-                cell.number_format = number_format
-                cell.alignment = Alignment(horizontal="right")
+        total_kdv_haric += kdv_haric
+        total_kdv += kdv
     
     # Toplam satırı
-    total_row = len(invoices) + 2
-    ws.cell(row=total_row, column=7, value="TOPLAM").font = Font(bold=True)
-    
-    total_kdv_haric = sum(inv.get('kdv_haric_tutar', 0) for inv in invoices)
-    total_kdv = sum(inv.get('kdv', 0) for inv in invoices)
-    
-    ws.cell(row=total_row, column=9, value=total_kdv_haric).number_format = number_format
-    ws.cell(row=total_row, column=11, value=total_kdv).number_format = number_format
-    
-    for col in range(1, 13):
-        ws.cell(row=total_row, column=col).border = thin_border
-        ws.cell(row=total_row, column=col).font = Font(bold=True)
-    
-    # Sütun genişlikleri
-    col_widths = [8, 15, 10, 22, 40, 15, 50, 20, 18, 10, 18, 12]
-    for i, width in enumerate(col_widths, 1):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(i)].width = width
+    total_values = {7: "TOPLAM", 9: total_kdv_haric, 11: total_kdv}
+    ws.append([
+        cell(ws, total_values.get(col), 'satis_toplam_tutar' if col in (9, 11) else 'satis_toplam')
+        for col in range(1, 13)
+    ])
     
     wb.save(output_path)
     return output_path
@@ -3,16 +3,23 @@ Satış Fatura Listesi Web Raporu Oluşturucu
 İnteraktif düzenleme, GIB önizleme ve Excel export özellikli HTML rapor.
 """
 
-import json
 import os
 from datetime import datetime
 
-def generate_satis_web_report(invoices, output_path):
+from web_editor_store import INVOICE_STORE_JS, PAGER_CSS, store_init_js
+from fatura_sorgu import VARSAYILAN_SAYFA_BOYUTU as PAGE_SIZE
+
+def generate_satis_web_report(invoices, output_path, api_url=None):
     """
     Satış fatura listesi için interaktif web raporu oluştur.
+    
+    api_url verilirse faturalar HTML'e gömülmez, sayfa sayfa API'den okunur.
     """
     
-    invoice_data = json.dumps(invoices, ensure_ascii=False, indent=2)
+    if api_url:
+        store_js = store_init_js(api_url=api_url, dataset=os.path.basename(api_url))
+    else:
+        store_js = store_init_js(invoices)
     
     html_content = f'''<!DOCTYPE html>
 <html lang="tr">
@@ -163,6 +170,7 @@ def generate_satis_web_report(invoices, output_path):
             border-radius: 5px;
             width: 300px;
         }}
+{PAGER_CSS}
     </style>
 </head>
 <body>
@@ -204,16 +212,16 @@ def generate_satis_web_report(invoices, output_path):
                     <tr>
                         <th><input type="checkbox" id="selectAll" onclick="toggleSelectAll()"></th>
                         <th>Sıra</th>
-                        <th>Tarih</th>
+                        <th data-sort="tarih">Tarih</th>
                         <th>Seri</th>
-                        <th>Fatura No</th>
-                        <th>Alıcı Ünvanı</th>
-                        <th>VKN/TCKN</th>
-                        <th>Mal/Hizmet Cinsi</th>
-                        <th class="num">KDV Hariç</th>
+                        <th data-sort="fatura_no">Fatura No</th>
+                        <th data-sort="alici_unvan">Alıcı Ünvanı</th>
+                        <th data-sort="alici_vkn">VKN/TCKN</th>
+                        <th data-sort="mal_cinsi">Mal/Hizmet Cinsi</th>
+                        <th class="num" data-sort="kdv_haric_tutar">KDV Hariç</th>
                         <th class="num">KDV %</th>
-                        <th class="num">Hesaplanan KDV</th>
-                        <th>Dönem</th>
+                        <th class="num" data-sort="kdv">Hesaplanan KDV</th>
+                        <th data-sort="kdv_donemi">Dönem</th>
                         <th>İşlemler</th>
                     </tr>
                 </thead>
@@ -221,6 +229,7 @@ def generate_satis_web_report(invoices, output_path):
                 </tbody>
             </table>
         </div>
+        <div class="pager" id="pager"></div>
     </div>
     
     <!-- Invoice Preview Modal -->
@@ -236,51 +245,109 @@ def generate_satis_web_report(invoices, output_path):
     </div>
 
     <script>
-        let invoices = {invoice_data};
+{INVOICE_STORE_JS}
+        // Veri kaynağı: gömülü liste (masaüstü) veya sunucu API'si (web)
+        {store_js}
+        const view = {{ page: 1, per_page: {PAGE_SIZE}, sort: null, order: 'asc', q: '' }};
+        let pageRows = {{}};
         let deletedRows = [];
         let selectedRows = new Set();
+        let filterTimer = null;
         
         document.addEventListener('DOMContentLoaded', function() {{
+            bindSortHeaders(sortBy);
             renderTable();
-            updateStats();
         }});
         
-        function renderTable() {{
+        async function renderTable() {{
+            let result;
+            try {{
+                result = await store.query(view);
+            }} catch (e) {{
+                alert('Faturalar yüklenemedi: ' + e.message);
+                return;
+            }}
+            view.page = result.page;
+            pageRows = {{}};
+            selectedRows.clear();
+            document.getElementById('selectedCount').textContent = 0;
+            document.getElementById('selectAll').checked = false;
+            
             const tbody = document.getElementById('tableBody');
             tbody.innerHTML = '';
+            const offset = (result.page - 1) * result.per_page;
             
-            invoices.forEach((inv, idx) => {{
-                if (inv._deleted) return;
+            result.rows.forEach((inv, i) => {{
+                const id = inv.id;
+                pageRows[id] = inv;
                 
                 const tr = document.createElement('tr');
-                tr.dataset.idx = idx;
+                tr.dataset.id = id;
                 
                 tr.innerHTML = `
                     <td><input type="checkbox" class="row-select" onchange="updateSelection()"></td>
-                    <td>${{idx + 1}}</td>
-                    <td contenteditable="true" class="editable">${{inv.tarih || ''}}</td>
+                    <td>${{offset + i + 1}}</td>
+                    <td contenteditable="true" class="editable" data-field="tarih">${{inv.tarih || ''}}</td>
                     <td></td>
-                    <td contenteditable="true" class="editable">${{(inv.seri || '') + (inv.sira_no || '')}}</td>
-                    <td contenteditable="true" class="editable">${{inv.alici_unvan || ''}}</td>
-                    <td contenteditable="true" class="editable">${{inv.alici_vkn || ''}}</td>
-                    <td contenteditable="true" class="editable" title="${{inv.mal_cinsi || ''}}">${{truncate(inv.mal_cinsi, 30)}}</td>
-                    <td contenteditable="true" class="editable num">${{formatNumber(inv.kdv_haric_tutar)}}</td>
+                    <td contenteditable="true" class="editable" data-field="fatura_no">${{(inv.seri || '') + (inv.sira_no || '')}}</td>
+                    <td contenteditable="true" class="editable" data-field="alici_unvan">${{inv.alici_unvan || ''}}</td>
+                    <td contenteditable="true" class="editable" data-field="alici_vkn">${{inv.alici_vkn || ''}}</td>
+                    <td contenteditable="true" class="editable long-text" data-field="mal_cinsi">${{inv.mal_cinsi || ''}}</td>
+                    <td contenteditable="true" class="editable num" data-field="kdv_haric_tutar">${{formatNumber(inv.kdv_haric_tutar)}}</td>
                     <td class="num">%${{inv.kdv_orani || 20}}</td>
-                    <td contenteditable="true" class="editable num">${{formatNumber(inv.kdv)}}</td>
-                    <td contenteditable="true" class="editable">${{inv.kdv_donemi || ''}}</td>
+                    <td contenteditable="true" class="editable num" data-field="kdv">${{formatNumber(inv.kdv)}}</td>
+                    <td contenteditable="true" class="editable" data-field="kdv_donemi">${{inv.kdv_donemi || ''}}</td>
                     <td class="actions">
-                        <button class="btn btn-info btn-sm" onclick="showInvoice(${{idx}})">Fatura</button>
-                        <button class="btn btn-danger btn-sm" onclick="deleteRow(${{idx}})">Sil</button>
+                        <button class="btn btn-info btn-sm" onclick="showInvoice(${{id}})">Fatura</button>
+                        <button class="btn btn-danger btn-sm" onclick="deleteRow(${{id}})">Sil</button>
                     </td>
                 `;
                 
+                tr.querySelectorAll('.editable').forEach(cell => {{
+                    cell.addEventListener('focus', function() {{
+                        this.dataset.before = this.textContent.trim();
+                    }});
+                    cell.addEventListener('blur', async function() {{
+                        const field = this.dataset.field;
+                        let value = this.textContent.trim();
+                        if (value === this.dataset.before) return;
+                        
+                        if (['kdv_haric_tutar', 'kdv'].includes(field)) {{
+                            value = parseAmount(value);
+                        }}
+                        
+                        inv[field] = value;
+                        try {{
+                            await store.update(id, {{ [field]: value }});
+                            updateStats();
+                        }} catch (e) {{
+                            alert('Değişiklik kaydedilemedi: ' + e.message);
+                        }}
+                    }});
+                }});
+                
                 tbody.appendChild(tr);
             }});
+            
+            renderPager(result, goToPage);
+            markSortHeader(view.sort, view.order);
+            showStats(result.totals);
+        }}
+        
+        function goToPage(page) {{
+            view.page = page;
+            renderTable();
         }}
         
-        function truncate(str, len) {{
-            if (!str) return '';
-            return str.length > len ? str.substring(0, len) + '...' : str;
+        function sortBy(field) {{
+            if (view.sort === field) {{
+                view.order = view.order === 'asc' ? 'desc' : 'asc';
+            }} else {{
+                view.sort = field;
+                view.order = 'asc';
+            }}
+            view.page = 1;
+            renderTable();
         }}
         
         function formatNumber(num) {{
@@ -288,26 +355,28 @@ def generate_satis_web_report(invoices, output_path):
             return parseFloat(num).toLocaleString('tr-TR', {{minimumFractionDigits: 2, maximumFractionDigits: 2}});
         }}
         
-        function updateStats() {{
-            const active = invoices.filter(i => !i._deleted);
-            document.getElementById('totalCount').textContent = active.length;
-            document.getElementById('totalTaxExcl').textContent = formatNumber(active.reduce((s, i) => s + (parseFloat(i.kdv_haric_tutar) || 0), 0)) + ' ₺';
-            document.getElementById('totalTax').textContent = formatNumber(active.reduce((s, i) => s + (parseFloat(i.kdv) || 0), 0)) + ' ₺';
+        function showStats(totals) {{
+            document.getElementById('totalCount').textContent = totals.count;
+            document.getElementById('totalTaxExcl').textContent = formatNumber(totals.kdv_haric_tutar) + ' ₺';
+            document.getElementById('totalTax').textContent = formatNumber(totals.kdv) + ' ₺';
+        }}
+        
+        async function updateStats() {{
+            const result = await store.query({{ page: 1, per_page: 0 }});
+            showStats(result.totals);
         }}
         
-        function deleteRow(idx) {{
-            invoices[idx]._deleted = true;
-            deletedRows.push(idx);
+        async function deleteRow(id) {{
+            await store.setDeleted([id], true);
+            deletedRows.push(id);
             renderTable();
-            updateStats();
         }}
         
-        function undoDelete() {{
+        async function undoDelete() {{
             if (deletedRows.length > 0) {{
-                const idx = deletedRows.pop();
-                invoices[idx]._deleted = false;
+                const id = deletedRows.pop();
+                await store.setDeleted([id], false);
                 renderTable();
-                updateStats();
             }}
         }}
         
@@ -320,34 +389,34 @@ def generate_satis_web_report(invoices, output_path):
         function updateSelection() {{
             selectedRows.clear();
             document.querySelectorAll('.row-select:checked').forEach(cb => {{
-                selectedRows.add(parseInt(cb.closest('tr').dataset.idx));
+                selectedRows.add(parseInt(cb.closest('tr').dataset.id));
             }});
             document.getElementById('selectedCount').textContent = selectedRows.size;
         }}
         
-        function deleteSelected() {{
+        async function deleteSelected() {{
             if (selectedRows.size === 0) return;
             if (!confirm(selectedRows.size + ' fatura silinecek. Emin misiniz?')) return;
             
-            selectedRows.forEach(idx => {{
-                invoices[idx]._deleted = true;
-                deletedRows.push(idx);
-            }});
+            const ids = Array.from(selectedRows);
+            await store.setDeleted(ids, true);
+            ids.forEach(id => deletedRows.push(id));
             selectedRows.clear();
             renderTable();
-            updateStats();
         }}
         
+        // Arama sunucuya/veri katmanına gider; yazarken her tuşta sorgu atılmaz
         function filterTable(query) {{
-            query = query.toLowerCase();
-            document.querySelectorAll('#tableBody tr').forEach(tr => {{
-                const text = tr.textContent.toLowerCase();
-                tr.style.display = text.includes(query) ? '' : 'none';
-            }});
+            clearTimeout(filterTimer);
+            filterTimer = setTimeout(() => {{
+                view.q = query;
+                view.page = 1;
+                renderTable();
+            }}, 250);
         }}
         
-        function showInvoice(idx) {{
-            const inv = invoices[idx];
+        function showInvoice(id) {{
+            const inv = pageRows[id];
             
             if (inv.gib_html_path) {{
                 window.open(inv.gib_html_path, '_blank');
@@ -444,8 +513,18 @@ def generate_satis_web_report(invoices, output_path):
             document.getElementById('invoiceModal').classList.remove('show');
         }}
         
-        function exportToExcel() {{
-            const active = invoices.filter(i => !i._deleted);
+        async function exportToExcel() {{
+            // Web'de liste sunucuda, Excel de sunucuda üretilir; henüz
+            // kaydedilmemiş değişiklikler fark olarak gönderilir
+            if (store.remote) {{
+                try {{
+                    await downloadPost(store.apiUrl + '/excel', store.exportPayload(), 'Satis_Fatura_Listesi.xlsx');
+                }} catch (error) {{
+                    alert('Export hatası: ' + error.message);
+                }}
+                return;
+            }}
+            const active = store.activeInvoices();
             
             if (active.length === 0) {{
                 alert('Dışa aktarılacak fatura yok!');
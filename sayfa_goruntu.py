@@ -0,0 +1,233 @@
+"""
+e-Mutabakat Pro - PDF Sayfa Görüntüleri
+Fatura sayfalarını istenince, istenen boyut ve formatta render eder.
+
+- Her PDF bir kez açılır; açık belgeler küçük bir LRU'da tutulur
+- Render edilen görüntüler diskte (PDF SHA-256, sayfa, dpi, genişlik, format)
+  anahtarıyla saklanır; toplam boyut sınırı aşılınca en uzun süredir
+  kullanılmayanlar silinir
+- Anahtar içerikten türetildiği için ETag olarak da kullanılır
+"""
+
+import os
+import io
+import hashlib
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+try:
+    import pdfplumber
+    PDFPLUMBER_AVAILABLE = True
+except ImportError:
+    PDFPLUMBER_AVAILABLE = False
+
+# Önbellek klasörü ve boyut sınırı
+CACHE_DIR = os.environ.get('EMP_THUMB_CACHE') or os.path.join(tempfile.gettempdir(), 'emp_sayfa_goruntu')
+MAX_CACHE_BYTES = int(os.environ.get('EMP_THUMB_CACHE_MB', '512')) * 1024 * 1024
+
+# İzin verilen çözünürlükler (önbellek isabeti için serbest dpi kabul edilmez)
+IZINLI_DPI = (72, 100, 150, 200)
+VARSAYILAN_DPI = 150
+MAX_GENISLIK = 2000
+
+# format adı -> (PIL formatı, mimetype, kaydetme seçenekleri)
+FORMATLAR = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True}),
+    'png': ('PNG', 'image/png', {}),
+}
+
+# Açık tutulan PDF belgesi sayısı
+ACIK_BELGE_SAYISI = 4
+
+# Bu kadar yazmada bir önbellek boyutu kontrol edilir
+TEMIZLIK_ARALIGI = 50
+
+# pdfium thread-safe değil: tüm pdfium çağrıları bu kilitle yapılır
+_render_lock = Lock()
+_documents = OrderedDict()      # yol -> (mtime_ns, PdfDocument)
+
+_hash_lock = Lock()
+_hash_cache = {}                # yol -> (boyut, mtime_ns, sha256)
+
+_write_lock = Lock()
+_writes_since_cleanup = 0
+
+
+def normalize_dpi(dpi):
+    """İstenen dpi'yi izin verilen en yakın üst değere yuvarla"""
+    try:
+        dpi = int(dpi)
+    except (TypeError, ValueError):
+        return VARSAYILAN_DPI
+    for izinli in IZINLI_DPI:
+        if dpi <= izinli:
+            return izinli
+    return IZINLI_DPI[-1]
+
+
+def file_sha256(path):
+    """Dosya SHA-256 (boyut/mtime değişmedikçe tekrar hesaplanmaz)"""
+    stat = os.stat(path)
+    with _hash_lock:
+        cached = _hash_cache.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    sha256 = digest.hexdigest()
+
+    with _hash_lock:
+        _hash_cache[path] = (stat.st_size, stat.st_mtime_ns, sha256)
+    return sha256
+
+
+def _get_document(pdf_path):
+    """Açık pdfium belgesini getir (_render_lock altında çağrılır)"""
+    mtime = os.stat(pdf_path).st_mtime_ns
+    cached = _documents.get(pdf_path)
+    if cached and cached[0] == mtime:
+        _documents.move_to_end(pdf_path)
+        return cached[1]
+    if cached:
+        cached[1].close()
+
+    doc = pdfium.PdfDocument(pdf_path)
+    _documents[pdf_path] = (mtime, doc)
+    while len(_documents) > ACIK_BELGE_SAYISI:
+        _, (_, old_doc) = _documents.popitem(last=False)
+        old_doc.close()
+    return doc
+
+
+def render_page(pdf_path, page_num, dpi=VARSAYILAN_DPI):
+    """
+    PDF sayfasını PIL görüntüsü olarak render et
+
+    Args:
+        page_num: Sayfa numarası (1-indexed)
+
+    Returns: PIL.Image veya None
+    """
+    if PDFIUM_AVAILABLE:
+        with _render_lock:
+            doc = _get_document(pdf_path)
+            if page_num <= 0 or page_num > len(doc):
+                return None
+            page = doc[page_num - 1]
+            try:
+                return page.render(scale=dpi / 72).to_pil()
+            finally:
+                page.close()
+
+    if PDFPLUMBER_AVAILABLE:
+        with pdfplumber.open(pdf_path) as pdf:
+            if page_num <= 0 or page_num > len(pdf.pages):
+                return None
+            return pdf.pages[page_num - 1].to_image(resolution=dpi).original
+
+    return None
+
+
+def encode_image(image, fmt):
+    """PIL görüntüsünü verilen formatta bytes'a çevir"""
+    pil_format, _, options = FORMATLAR[fmt]
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def _cleanup():
+    """Toplam boyut sınırı aşıldıysa en eski erişilen dosyaları sil"""
+    entries = []
+    total = 0
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith('.tmp'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    except OSError:
+        return
+
+    if total <= MAX_CACHE_BYTES:
+        return
+    entries.sort()
+    # Sınırın biraz altına in; bir sonraki yazmada yeniden temizlik gerekmesin
+    target = MAX_CACHE_BYTES * 0.9
+    for _, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def get_page_image(pdf_path, page_num, dpi=VARSAYILAN_DPI, width=None, fmt='webp', sha256=None):
+    """
+    Sayfa görüntüsünü önbellekten getir, yoksa render edip kaydet
+
+    Args:
+        width: Verilirse görüntü bu genişliğe küçültülür (küçük resim)
+        sha256: PDF'in bilinen özeti (yoksa hesaplanır)
+
+    Returns: (dosya yolu, etag, mimetype) veya None
+    """
+    global _writes_since_cleanup
+
+    fmt = fmt if fmt in FORMATLAR else 'webp'
+    dpi = normalize_dpi(dpi)
+    # Negatif veya sıfır genişlik: küçültme yok
+    width = max(0, min(int(width), MAX_GENISLIK)) if width else 0
+    sha256 = sha256 or file_sha256(pdf_path)
+
+    etag = f"{sha256[:32]}-p{page_num}-d{dpi}-w{width}-{fmt}"
+    path = os.path.join(CACHE_DIR, etag)
+    mimetype = FORMATLAR[fmt][1]
+
+    if os.path.exists(path):
+        # LRU: erişim zamanı olarak mtime kullanılır (noatime disklerde de çalışır)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path, etag, mimetype
+
+    image = render_page(pdf_path, page_num, dpi)
+    if image is None:
+        return None
+    if width and image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))))
+    data = encode_image(image, fmt)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    with _write_lock:
+        _writes_since_cleanup += 1
+        cleanup = _writes_since_cleanup >= TEMIZLIK_ARALIGI
+        if cleanup:
+            _writes_since_cleanup = 0
+    if cleanup:
+        _cleanup()
+
+    return path, etag, mimetype
@@ -53,34 +53,123 @@ document.addEventListener('DOMContentLoaded', function () {
 });
 
 
-function uploadFiles(files) {
-    const formData = new FormData();
+const UPLOAD_MAX_RETRIES = 5;
 
-    for (let i = 0; i < files.length; i++) {
-        formData.append('files[]', files[i]);
+/**
+ * Dosyaları parçalı (chunked) yükle.
+ * Bağlantı koparsa parça tekrar denenir; sayfa yenilense bile aynı dosya
+ * seçildiğinde sunucunun kaydettiği yerden devam edilir.
+ */
+async function uploadFiles(files) {
+    showLoading();
+    let uploadedCount = 0;
+
+    try {
+        for (const file of Array.from(files)) {
+            try {
+                await uploadFileChunked(file);
+                uploadedCount++;
+            } catch (error) {
+                addLog(`❌ Yükleme hatası (${file.name}): ${error.message}`, 'error');
+            }
+        }
+    } finally {
+        hideLoading();
+        setJobProgress('');
     }
 
-    showLoading();
+    if (uploadedCount > 0) {
+        addLog(`✅ ${uploadedCount} dosya yüklendi`);
+    }
+    refreshFileList();
+}
 
-    fetch('/upload', {
-        method: 'POST',
-        body: formData
-    })
-        .then(response => response.json())
-        .then(data => {
-            hideLoading();
 
-            if (data.success) {
-                addLog(`✅ ${data.files.length} dosya yüklendi`);
-                refreshFileList();
-            } else {
-                addLog(`❌ Yükleme hatası: ${data.error}`, 'error');
-            }
-        })
-        .catch(error => {
-            hideLoading();
-            addLog(`❌ Hata: ${error.message}`, 'error');
+async function uploadFileChunked(file) {
+    const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+    let state = await getUploadState(localStorage.getItem(resumeKey));
+
+    if (!state) {
+        const response = await fetch('/upload/init', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ name: file.name, size: file.size })
         });
+        const data = await response.json();
+        if (!data.success) {
+            throw new Error(data.error);
+        }
+        state = { id: data.upload_id, offset: data.offset, chunkSize: data.chunk_size };
+        localStorage.setItem(resumeKey, state.id);
+    } else if (state.offset > 0) {
+        addLog(`↪️ ${file.name} kaldığı yerden devam ediyor (${formatFileSize(state.offset)})`);
+    }
+
+    let retries = 0;
+    while (state.offset < file.size) {
+        setJobProgress(`${file.name} - %${Math.floor(state.offset * 100 / file.size)}`);
+        const chunk = file.slice(state.offset, state.offset + state.chunkSize);
+
+        try {
+            const headers = {};
+            const digest = await chunkSha256(chunk);
+            if (digest) {
+                headers['X-Chunk-Sha256'] = digest;
+            }
+
+            const response = await fetch(`/upload/${state.id}?offset=${state.offset}`, {
+                method: 'PUT',
+                headers: headers,
+                body: chunk
+            });
+            const data = await response.json();
+            if (typeof data.offset === 'number') {
+                state.offset = data.offset;
+            }
+            if (!data.success) {
+                throw new Error(data.error);
+            }
+            retries = 0;
+        } catch (error) {
+            if (++retries > UPLOAD_MAX_RETRIES) {
+                throw error;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+            const resumed = await getUploadState(state.id);
+            if (resumed) {
+                state.offset = resumed.offset;
+            }
+        }
+    }
+
+    const response = await fetch(`/upload/${state.id}/finalize`, { method: 'POST' });
+    const data = await response.json();
+    localStorage.removeItem(resumeKey);
+    if (!data.success) {
+        throw new Error(data.error);
+    }
+    return data.file;
+}
+
+
+async function getUploadState(uploadId) {
+    if (!uploadId) return null;
+    try {
+        const response = await fetch(`/upload/${uploadId}`);
+        if (!response.ok) return null;
+        const data = await response.json();
+        return { id: uploadId, offset: data.offset, chunkSize: data.chunk_size };
+    } catch (error) {
+        return null;
+    }
+}
+
+
+async function chunkSha256(chunk) {
+    // crypto.subtle sadece HTTPS/localhost'ta var; yoksa parça özeti gönderilmez
+    if (!window.crypto || !window.crypto.subtle) return null;
+    const hash = await window.crypto.subtle.digest('SHA-256', await chunk.arrayBuffer());
+    return Array.from(new Uint8Array(hash)).map(b => b.toString(16).padStart(2, '0')).join('');
 }
 
 
@@ -148,15 +237,10 @@ function formatFileSize(bytes) {
 function generateKdvExcel() {
     showLoading();
 
-    fetch('/generate-kdv-excel', { method: 'POST' })
-        .then(response => response.json())
+    runJob('/generate-kdv-excel', null)
         .then(data => {
             hideLoading();
 
-            if (data.logs) {
-                data.logs.forEach(log => addLog(log));
-            }
-
             if (data.success) {
                 addLog(`\n📊 Excel dosyası hazır: ${data.invoice_count} fatura`);
 
@@ -231,19 +315,10 @@ function generateKdvWeb(vkn) {
         newWindow.document.write('<html><head><title>KDV Listesi Yükleniyor...</title></head><body style="font-family: Arial; display: flex; justify-content: center; align-items: center; height: 100vh; margin: 0; background: #f5f7fa;"><div style="text-align: center;"><h2>⏳ İşleniyor...</h2><p>Lütfen bekleyin, faturalar yükleniyor...</p></div></body></html>');
     }
 
-    fetch('/generate-kdv-web', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ vkn: vkn || '' })
-    })
-        .then(response => response.json())
+    runJob('/generate-kdv-web', { vkn: vkn || '' })
         .then(data => {
             hideLoading();
 
-            if (data.logs) {
-                data.logs.forEach(log => addLog(log));
-            }
-
             if (data.success) {
                 addLog(`\n🌐 Web düzenleyici açılıyor...`);
                 if (newWindow) {
@@ -274,19 +349,10 @@ function generateSatisWeb(vkn) {
         newWindow.document.write('<html><head><title>Satış Listesi Yükleniyor...</title></head><body style="font-family: Arial; display: flex; justify-content: center; align-items: center; height: 100vh; margin: 0; background: #f5f7fa;"><div style="text-align: center;"><h2>⏳ İşleniyor...</h2><p>Lütfen bekleyin, satış faturaları yükleniyor...</p></div></body></html>');
     }
 
-    fetch('/generate-satis-web', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ vkn: vkn })
-    })
-        .then(response => response.json())
+    runJob('/generate-satis-web', { vkn: vkn })
         .then(data => {
             hideLoading();
 
-            if (data.logs) {
-                data.logs.forEach(log => addLog(log));
-            }
-
             if (data.success) {
                 addLog(`\n💰 Satış listesi açılıyor...`);
                 if (newWindow) {
@@ -307,6 +373,93 @@ function generateSatisWeb(vkn) {
 }
 
 
+// ================== BACKGROUND JOBS ==================
+
+const JOB_POLL_INTERVAL = 1000;
+let currentJobId = null;
+
+/**
+ * İşi başlat ve bitene kadar /jobs/<id> adresini yokla.
+ * Log satırları geldikçe yazılır; sonuç { success, error, ... } olarak döner.
+ */
+function runJob(url, body) {
+    const options = { method: 'POST' };
+    if (body) {
+        options.headers = { 'Content-Type': 'application/json' };
+        options.body = JSON.stringify(body);
+    }
+
+    return fetch(url, options)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                return data;
+            }
+            currentJobId = data.job_id;
+            setJobProgress('Kuyrukta...');
+            return pollJob(data.status_url, 0);
+        })
+        .finally(() => {
+            currentJobId = null;
+            setJobProgress('');
+        });
+}
+
+
+function pollJob(statusUrl, since) {
+    return fetch(`${statusUrl}?since=${since}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                return data;
+            }
+
+            const job = data.job;
+            job.logs.forEach(log => addLog(log));
+            updateJobProgress(job);
+
+            if (job.finished) {
+                if (job.status === 'done') {
+                    return job.result;
+                }
+                if (job.status === 'cancelled') {
+                    return { success: false, error: 'İş iptal edildi' };
+                }
+                return { success: false, error: job.error || 'İş başarısız oldu' };
+            }
+
+            return new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL))
+                .then(() => pollJob(statusUrl, job.last_log_id));
+        });
+}
+
+
+function updateJobProgress(job) {
+    const progress = job.progress;
+    if (job.status === 'queued') {
+        setJobProgress('Kuyrukta...');
+    } else if (progress.total > 0) {
+        const current = progress.current ? ` - ${progress.current}` : '';
+        setJobProgress(`${progress.done}/${progress.total}${current}`);
+    }
+}
+
+
+function setJobProgress(text) {
+    const el = document.getElementById('loading-progress');
+    if (el) el.textContent = text;
+    const cancelBtn = document.getElementById('cancel-job-btn');
+    if (cancelBtn) cancelBtn.style.display = currentJobId ? '' : 'none';
+}
+
+
+function cancelCurrentJob() {
+    if (!currentJobId) return;
+    fetch(`/jobs/${currentJobId}/cancel`, { method: 'POST' })
+        .then(() => setJobProgress('İptal ediliyor...'));
+}
+
+
 // ================== LOGGING ==================
 
 function addLog(message, type = 'info') {
@@ -6,6 +6,10 @@ Flask tabanlı web arayüzü (Login sistemi ile)
 import os
 import sys
 import json
+import uuid
+import shutil
+import hashlib
+import itertools
 import tempfile
 import webbrowser
 from datetime import datetime
@@ -32,7 +36,11 @@ except ImportError:
 
 # Auth modülleri
 from auth import authenticate_user, load_user
-from database import init_db, get_all_users, create_user, delete_user
+from database import (init_db, init_uploads_table, get_all_users, create_user, delete_user,
+                      add_upload, get_user_uploads, delete_user_uploads,
+                      create_upload_session, get_upload_session, update_upload_session_received,
+                      delete_upload_sessions, get_editor_edits, update_editor_fields,
+                      add_editor_invoice, set_editor_deleted, clear_editor_edits)
 
 # Mevcut modülleri import et
 import kdv_iade_listesi
@@ -42,6 +50,11 @@ import satis_web_editor
 import pdf_invoice_reader
 import gib_viewer
 import export_gib_excel
+import job_queue
+import fatura_snapshot
+import fatura_sorgu
+import sayfa_goruntu
+import excel_akis
 
 # Audit logging
 try:
@@ -57,12 +70,19 @@ app = Flask(__name__,
 app.config['SECRET_KEY'] = 'e-mutabakat-pro-secret-key-2024'
 app.config['UPLOAD_FOLDER'] = os.path.join(os.getcwd(), 'uploads')
 app.config['OUTPUT_FOLDER'] = os.path.join(os.getcwd(), 'output')
-app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max
+app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max (tek istek)
+app.config['MAX_UPLOAD_FILE_SIZE'] = 4 * 1024 * 1024 * 1024  # 4GB max (parçalı yükleme)
 
 # Upload klasörü oluştur
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
 
+# Dosya kayıt tablosu (gunicorn worker'ları arasında paylaşılan users.db)
+init_uploads_table()
+
+# Arka plan iş kuyruğu (gunicorn worker'ları arasında paylaşılan jobs.db)
+job_queue.init_jobs_db()
+
 # Flask-Login ayarları
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -74,62 +94,61 @@ def user_loader(user_id):
 
 # İzin verilen dosya uzantıları
 ALLOWED_EXTENSIONS = {'zip', 'rar', 'xml', 'pdf', 'ZIP', 'RAR', 'XML', 'PDF'}
-
-# Geçici dosya deposu (oturum bazlı)
-uploaded_files = []
+EXCEL_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in {ext.lower() for ext in ALLOWED_EXTENSIONS}
 
 
-def clear_uploaded_files():
-    """Yüklenen dosyaları temizle (global listeyi ve disk dosyalarını)"""
-    global uploaded_files
-    
-    # Diskteki dosyaları sil
-    for f in uploaded_files:
+def get_user_upload_folder(user_id=None):
+    """Kullanıcıya ait upload klasörü (uploads/<user_id>)"""
+    if user_id is None:
+        user_id = current_user.id
+    folder = os.path.join(app.config['UPLOAD_FOLDER'], str(int(user_id)))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def get_user_output_folder():
+    """Kullanıcıya ait çıktı klasörü (output/<user_id>)"""
+    folder = os.path.join(app.config['OUTPUT_FOLDER'], str(int(current_user.id)))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def get_uploaded_files(user_id=None):
+    """Kullanıcının yüklediği dosyalar (tüm worker'lar aynı kaydı görür)"""
+    if user_id is None:
+        user_id = current_user.id
+    files = []
+    for row in get_user_uploads(user_id):
+        if not os.path.exists(row['path']):
+            continue
+        uploaded = str(row['uploaded_at'] or '')
+        files.append({
+            'name': row['name'],
+            'path': row['path'],
+            'size': row['size'],
+            'uploaded': uploaded[11:19] if len(uploaded) >= 19 else uploaded,
+            'sha256': row['sha256']
+        })
+    return files
+
+
+def clear_uploaded_files(user_id):
+    """Kullanıcının yüklediği dosyaları temizle (kayıtlar ve disk dosyaları)"""
+    for path in delete_user_uploads(user_id):
         try:
-            if os.path.exists(f['path']):
-                os.remove(f['path'])
-        except:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError:
             pass
-    
-    # Listeyi temizle
-    uploaded_files = []
-    
-    # uploads klasöründeki tüm dosyaları temizle (opsiyonel - daha kapsamlı temizlik)
-    try:
-        upload_folder = app.config.get('UPLOAD_FOLDER', '')
-        if upload_folder and os.path.exists(upload_folder):
-            for filename in os.listdir(upload_folder):
-                filepath = os.path.join(upload_folder, filename)
-                if os.path.isfile(filepath):
-                    try:
-                        os.remove(filepath)
-                    except:
-                        pass
-            # xml_files alt klasörünü de temizle
-            xml_folder = os.path.join(upload_folder, 'xml_files')
-            if os.path.exists(xml_folder):
-                for filename in os.listdir(xml_folder):
-                    filepath = os.path.join(xml_folder, filename)
-                    if os.path.isfile(filepath):
-                        try:
-                            os.remove(filepath)
-                        except:
-                            pass
-            # gib_html alt klasörünü de temizle
-            gib_folder = os.path.join(upload_folder, 'gib_html')
-            if os.path.exists(gib_folder):
-                for filename in os.listdir(gib_folder):
-                    filepath = os.path.join(gib_folder, filename)
-                    if os.path.isfile(filepath):
-                        try:
-                            os.remove(filepath)
-                        except:
-                            pass
-    except:
-        pass
+
+    delete_upload_sessions(user_id)
+
+    # xml_files, gib_html, yarım kalan parçalar dahil kullanıcı klasörünü sil
+    folder = os.path.join(app.config['UPLOAD_FOLDER'], str(int(user_id)))
+    shutil.rmtree(folder, ignore_errors=True)
 
 
 def admin_required(f):
@@ -167,8 +186,8 @@ def login():
         
         user = authenticate_user(username, password)
         if user:
-            # Giriş başarılı - önceki kullanıcının dosyalarını temizle
-            clear_uploaded_files()
+            # Giriş başarılı - kullanıcının önceki oturumdan kalan dosyalarını temizle
+            clear_uploaded_files(user.id)
             login_user(user, remember=remember)
             
             # Audit log
@@ -227,7 +246,7 @@ def logout():
     if audit_logger:
         audit_logger.log_logout(current_user.username, request.remote_addr)
     
-    clear_uploaded_files()
+    clear_uploaded_files(current_user.id)
     logout_user()
     return redirect(url_for('login'))
 
@@ -421,7 +440,7 @@ def admin_delete_user(user_id):
 @login_required
 def index():
     """Ana sayfa"""
-    return render_template('index.html', files=uploaded_files)
+    return render_template('index.html', files=get_uploaded_files())
 
 
 @app.route('/upload', methods=['POST'])
@@ -432,6 +451,7 @@ def upload_file():
         return jsonify({'success': False, 'error': 'Dosya seçilmedi'})
     
     files = request.files.getlist('files[]')
+    upload_folder = get_user_upload_folder()
     uploaded = []
     
     for file in files:
@@ -439,7 +459,7 @@ def upload_file():
             filename = secure_filename(file.filename)
             # Benzersiz isim oluştur
             unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+            filepath = os.path.join(upload_folder, unique_filename)
             file.save(filepath)
             
             file_info = {
@@ -448,13 +468,164 @@ def upload_file():
                 'size': os.path.getsize(filepath),
                 'uploaded': datetime.now().strftime('%H:%M:%S')
             }
-            uploaded_files.append(file_info)
+            add_upload(current_user.id, filename, filepath, file_info['size'], _file_sha256(filepath))
             uploaded.append(file_info)
     
     return jsonify({
         'success': True, 
         'files': uploaded,
-        'total': len(uploaded_files)
+        'total': len(get_user_uploads(current_user.id))
+    })
+
+
+# ================== CHUNKED UPLOAD ==================
+# Protokol: POST /upload/init -> PUT /upload/<id>?offset=N (parça) -> POST /upload/<id>/finalize
+# Bağlantı koparsa GET /upload/<id> ile diske yazılan bayt sayısı alınır ve oradan devam edilir.
+
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+
+def _file_sha256(path):
+    """Dosyanın SHA-256 özetini blok blok hesapla"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@app.route('/upload/init', methods=['POST'])
+@login_required
+def upload_init():
+    """Parçalı yükleme oturumu başlat"""
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('name', ''))
+    size = data.get('size')
+
+    if not filename or not allowed_file(filename):
+        return jsonify({'success': False, 'error': 'Geçersiz dosya türü'}), 400
+    if not isinstance(size, int) or size <= 0 or size > app.config['MAX_UPLOAD_FILE_SIZE']:
+        return jsonify({'success': False, 'error': 'Geçersiz dosya boyutu'}), 400
+
+    upload_id = uuid.uuid4().hex
+    part_dir = os.path.join(get_user_upload_folder(), '.partial')
+    os.makedirs(part_dir, exist_ok=True)
+    part_path = os.path.join(part_dir, f"{upload_id}.part")
+    open(part_path, 'wb').close()
+
+    create_upload_session(upload_id, current_user.id, filename, part_path, size)
+
+    return jsonify({
+        'success': True,
+        'upload_id': upload_id,
+        'chunk_size': UPLOAD_CHUNK_SIZE,
+        'offset': 0
+    })
+
+
+@app.route('/upload/<upload_id>', methods=['GET'])
+@login_required
+def upload_status(upload_id):
+    """Yükleme oturumunun kaldığı yer (devam etmek için)"""
+    upload_session = get_upload_session(upload_id, current_user.id)
+    if upload_session is None or not os.path.exists(upload_session['part_path']):
+        return jsonify({'success': False, 'error': 'Yükleme oturumu bulunamadı'}), 404
+
+    return jsonify({
+        'success': True,
+        'offset': upload_session['received'],
+        'size': upload_session['size'],
+        'chunk_size': UPLOAD_CHUNK_SIZE
+    })
+
+
+@app.route('/upload/<upload_id>', methods=['PUT'])
+@login_required
+def upload_chunk(upload_id):
+    """Parçayı doğrudan diskteki .part dosyasına yaz"""
+    upload_session = get_upload_session(upload_id, current_user.id)
+    if upload_session is None or not os.path.exists(upload_session['part_path']):
+        return jsonify({'success': False, 'error': 'Yükleme oturumu bulunamadı'}), 404
+
+    received = upload_session['received']
+    offset = request.args.get('offset', type=int)
+    length = request.content_length
+
+    # Boşluk bırakan parça kabul edilmez; istemci döndürülen offset'ten devam eder
+    if offset is None or offset < 0 or offset > received:
+        return jsonify({'success': False, 'error': 'Geçersiz offset', 'offset': received}), 409
+    if not length or offset + length > upload_session['size']:
+        return jsonify({'success': False, 'error': 'Geçersiz parça boyutu', 'offset': received}), 400
+
+    expected = request.headers.get('X-Chunk-Sha256', '').lower()
+    digest = hashlib.sha256() if expected else None
+
+    remaining = length
+    with open(upload_session['part_path'], 'r+b') as f:
+        f.seek(offset)
+        while remaining > 0:
+            block = request.stream.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            f.write(block)
+            if digest:
+                digest.update(block)
+            remaining -= len(block)
+
+    if remaining:
+        return jsonify({'success': False, 'error': 'Parça eksik alındı', 'offset': received}), 400
+    if digest and digest.hexdigest() != expected:
+        return jsonify({'success': False, 'error': 'Parça özeti uyuşmuyor', 'offset': received}), 400
+
+    received = max(received, offset + length)
+    update_upload_session_received(upload_id, received)
+
+    return jsonify({'success': True, 'offset': received})
+
+
+@app.route('/upload/<upload_id>/finalize', methods=['POST'])
+@login_required
+def upload_finalize(upload_id):
+    """Özeti doğrula, dosyayı kalıcı adına taşı ve kaydet"""
+    upload_session = get_upload_session(upload_id, current_user.id)
+    if upload_session is None or not os.path.exists(upload_session['part_path']):
+        return jsonify({'success': False, 'error': 'Yükleme oturumu bulunamadı'}), 404
+
+    if upload_session['received'] != upload_session['size']:
+        return jsonify({
+            'success': False,
+            'error': 'Yükleme tamamlanmadı',
+            'offset': upload_session['received']
+        }), 409
+
+    part_path = upload_session['part_path']
+    sha256 = _file_sha256(part_path)
+    expected = ((request.get_json(silent=True) or {}).get('sha256') or '').lower()
+    if expected and expected != sha256:
+        os.remove(part_path)
+        delete_upload_sessions(current_user.id, upload_id)
+        return jsonify({'success': False, 'error': 'Dosya özeti uyuşmuyor, yeniden yükleyin'}), 400
+
+    filename = upload_session['name']
+    # Aynı saniyede biten aynı adlı yüklemeler çakışmasın diye yükleme kimliği eklenir
+    unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{upload_id[:12]}_{filename}"
+    filepath = os.path.join(get_user_upload_folder(), unique_filename)
+    os.replace(part_path, filepath)
+
+    add_upload(current_user.id, filename, filepath, upload_session['size'], sha256)
+    delete_upload_sessions(current_user.id, upload_id)
+
+    return jsonify({
+        'success': True,
+        'file': {
+            'name': filename,
+            'path': filepath,
+            'size': upload_session['size'],
+            'sha256': sha256,
+            'uploaded': datetime.now().strftime('%H:%M:%S')
+        },
+        'total': len(get_user_uploads(current_user.id))
     })
 
 
@@ -462,17 +633,7 @@ def upload_file():
 @login_required
 def clear_files():
     """Dosya listesini temizle"""
-    global uploaded_files
-    
-    # Dosyaları sil
-    for f in uploaded_files:
-        try:
-            if os.path.exists(f['path']):
-                os.remove(f['path'])
-        except:
-            pass
-    
-    uploaded_files = []
+    clear_uploaded_files(current_user.id)
     return jsonify({'success': True})
 
 
@@ -480,74 +641,245 @@ def clear_files():
 @login_required
 def get_files():
     """Yüklü dosyaları listele"""
-    return jsonify({'files': uploaded_files})
+    return jsonify({'files': get_uploaded_files()})
+
+
+def _parse_purchase_file(ctx, file_info):
+    """
+    Tek ZIP/XML dosyasından alış faturalarını oku (PDF'ler: _scan_purchase_pdfs)
+
+    Returns: fatura listesi veya None (hata)
+    """
+    filepath = file_info['path']
+    filename = file_info['name']
+
+    if filepath.lower().endswith('.zip'):
+        ctx.log(f"📂 Yükleniyor: {filename}")
+        try:
+            invoices = kdv_iade_listesi.load_invoices_from_zip(filepath)
+            ctx.log(f"  ✅ {len(invoices)} fatura bulundu")
+            return invoices
+        except Exception as e:
+            ctx.log(f"  ❌ Hata: {str(e)}")
+            return None
+
+    if filepath.lower().endswith('.xml'):
+        ctx.log(f"📄 Yükleniyor: {filename}")
+        try:
+            inv_data = kdv_iade_listesi.load_invoice_from_xml(filepath)
+            if inv_data:
+                ctx.log(f"  ✅ 1 fatura bulundu")
+                return [inv_data]
+            return []
+        except Exception as e:
+            ctx.log(f"  ❌ Hata: {str(e)}")
+            return None
+
+    return []
+
+
+def _scan_purchase_pdfs(ctx, pdf_files):
+    """
+    PDF'leri tek worker havuzunda birlikte tara (küçük dosyalar önce)
+
+    Returns: {dosya yolu: fatura listesi veya None (hata)}
+    """
+    names = {file_info['path']: file_info['name'] for file_info in pdf_files}
+    results = {}
+
+    def on_result(filepath, invoices, error):
+        if error:
+            ctx.log(f"📑 {names[filepath]}: ❌ Hata: {error}")
+            results[filepath] = None
+        else:
+            ctx.log(f"📑 {names[filepath]}: ✅ {len(invoices)} fatura bulundu")
+            results[filepath] = invoices
+
+    ctx.log(f"📑 Yükleniyor (PDF): {len(pdf_files)} dosya birlikte taranıyor")
+    stats = {}
+    try:
+        pdf_invoice_reader.smart_extract_invoices_from_pdfs(
+            list(names), progress_callback=ctx.page_callback(f"{len(pdf_files)} PDF"),
+            on_result=on_result, istatistik=stats)
+    except job_queue.JobCancelled:
+        raise
+    except Exception as e:
+        ctx.log(f"  ❌ Hata: {str(e)}")
+        return {filepath: None for filepath in names}
+
+    ctx.log(f"  ⏱ {stats['sayfa']} sayfa, {stats['sure']} sn ({stats['sayfa_per_sn']} sayfa/sn)")
+    return results
+
+
+def _load_purchase_invoices(ctx, files):
+    """
+    Yüklü ZIP/XML/PDF dosyalarından alış faturalarını oku (iş içinde)
+
+    Her dosya bir kez ayrıştırılır; sonuç dosya özetiyle saklanır ve Excel,
+    web düzenleyici ve GİB çıktıları aynı sonucu kullanır. Önceden
+    işlenmemiş PDF'ler tek seferde birlikte taranır. Dosya bazlı ilerleme ve
+    log satırları ctx üzerinden bildirilir.
+    """
+    all_invoices = []
+    total = len(files)
+
+    snapshots = [fatura_snapshot.load_snapshot(file_info, fatura_snapshot.KIND_ALIS) for file_info in files]
+    pdf_files = [file_info for file_info, invoices in zip(files, snapshots)
+                 if invoices is None and file_info['path'].lower().endswith('.pdf')]
+    pdf_results = _scan_purchase_pdfs(ctx, pdf_files) if pdf_files else {}
+
+    for index, file_info in enumerate(files):
+        ctx.progress(index, total, file_info['name'])
+
+        invoices = snapshots[index]
+        if invoices is not None:
+            if invoices:
+                ctx.log(f"♻️ Önceden işlenmiş: {file_info['name']} ({len(invoices)} fatura)")
+        else:
+            if file_info['path'] in pdf_results:
+                invoices = pdf_results[file_info['path']]
+            else:
+                invoices = _parse_purchase_file(ctx, file_info)
+            if invoices is None:
+                continue
+            fatura_snapshot.save_snapshot(file_info, fatura_snapshot.KIND_ALIS, invoices)
+
+        all_invoices.extend(invoices)
+
+    ctx.progress(total, total, '')
+    return all_invoices
+
+
+def _kdv_excel_job(ctx, files, output_file):
+    """KDV İade Listesi Excel işi"""
+    all_invoices = _load_purchase_invoices(ctx, files)
+
+    if not all_invoices:
+        return {'success': False, 'error': 'Hiç fatura bulunamadı!'}
+
+    ctx.check_cancelled()
+    kdv_iade_listesi.generate_kdv_listesi_excel(all_invoices, output_file)
+    ctx.log(f"\n✅ Excel oluşturuldu: {len(all_invoices)} fatura")
+
+    return {
+        'success': True,
+        'file': '/download/kdv-excel',
+        'filename': 'Indirilecek_KDV_Listesi.xlsx',
+        'invoice_count': len(all_invoices)
+    }
+
+
+def _save_editor_dataset(user_id, kind, invoices, output_file):
+    """
+    Düzenleyicinin veri setini yaz, eski düzenlemeleri sil
+
+    HTML sadece kabuktur; satırlar /api/invoices/<kind> üzerinden sayfa sayfa okunur.
+    """
+    api_url = f"/api/invoices/{kind}"
+    for idx, inv in enumerate(invoices):
+        if kdv_web_editor.split_pdf_source(inv):
+            inv['page_image_url'] = f"{api_url}/{idx}/page-image"
+
+    dataset_file = os.path.join(os.path.dirname(output_file), EDITOR_DATASETS[kind])
+    fatura_sorgu.save_dataset(dataset_file, invoices)
+    clear_editor_edits(user_id, kind)
+    return api_url
+
+
+def _kdv_web_job(ctx, files, own_vkn, output_file, user_id):
+    """KDV Web Düzenleyici işi"""
+    all_invoices = _load_purchase_invoices(ctx, files)
+
+    # VKN filtresi
+    if own_vkn:
+        original_count = len(all_invoices)
+        all_invoices = [inv for inv in all_invoices if inv.get('satici_vkn', '') != own_vkn]
+        filtered = original_count - len(all_invoices)
+        if filtered > 0:
+            ctx.log(f"🔍 {filtered} satış faturası hariç tutuldu")
+
+    if not all_invoices:
+        return {'success': False, 'error': 'Hiç alış faturası bulunamadı!'}
+
+    ctx.check_cancelled()
+    api_url = _save_editor_dataset(user_id, 'kdv', all_invoices, output_file)
+    kdv_web_editor.generate_kdv_web_report(all_invoices, output_file, api_url=api_url)
+    ctx.log(f"\n✅ Web düzenleyici oluşturuldu: {len(all_invoices)} fatura")
+
+    return {
+        'success': True,
+        'url': '/view/kdv-editor',
+        'invoice_count': len(all_invoices)
+    }
+
+
+def _satis_web_job(ctx, files, own_vkn, output_file, user_id):
+    """Satış Fatura Listesi Web işi"""
+    all_invoices = []
+    total = len(files)
+
+    kind = fatura_snapshot.satis_kind(own_vkn)
+
+    for index, file_info in enumerate(files):
+        filepath = file_info['path']
+        filename = file_info['name']
+        ctx.progress(index, total, filename)
+
+        if filepath.lower().endswith('.zip'):
+            invs = fatura_snapshot.load_snapshot(file_info, kind)
+            if invs is not None:
+                ctx.log(f"♻️ Önceden işlenmiş: {filename} ({len(invs)} satış faturası)")
+                all_invoices.extend(invs)
+                continue
+
+            ctx.log(f"📂 Yükleniyor: {filename}")
+            try:
+                invs = satis_fatura_listesi.load_sales_invoices_from_zip(filepath, own_vkn=own_vkn)
+                all_invoices.extend(invs)
+                fatura_snapshot.save_snapshot(file_info, kind, invs)
+                ctx.log(f"  ✅ {len(invs)} satış faturası bulundu")
+            except Exception as e:
+                ctx.log(f"  ❌ Hata: {str(e)}")
+
+    ctx.progress(total, total, '')
+
+    if not all_invoices:
+        return {'success': False, 'error': 'Hiç satış faturası bulunamadı! VKN doğru mu?'}
+
+    ctx.check_cancelled()
+    api_url = _save_editor_dataset(user_id, 'satis', all_invoices, output_file)
+    satis_web_editor.generate_satis_web_report(all_invoices, output_file, api_url=api_url)
+    ctx.log(f"\n✅ Satış listesi oluşturuldu: {len(all_invoices)} fatura")
+
+    return {
+        'success': True,
+        'url': '/view/satis-editor',
+        'invoice_count': len(all_invoices)
+    }
+
+
+def _submit_generate_job(kind, func, files, *args):
+    """İşi kuyruğa ekle, istemciye iş numarasını döndür"""
+    job_id = job_queue.submit_job(current_user.id, kind, func, files, *args)
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': url_for('job_status', job_id=job_id)
+    })
 
 
 @app.route('/generate-kdv-excel', methods=['POST'])
 @login_required
 def generate_kdv_excel():
-    """KDV İade Listesi Excel oluştur"""
+    """KDV İade Listesi Excel oluştur (arka plan işi)"""
     try:
-        if not uploaded_files:
+        files = get_uploaded_files()
+        if not files:
             return jsonify({'success': False, 'error': 'Dosya yüklenmedi'})
-        
-        all_invoices = []
-        logs = []
-        
-        for file_info in uploaded_files:
-            filepath = file_info['path']
-            filename = file_info['name']
-            
-            if filepath.lower().endswith('.zip'):
-                logs.append(f"📂 Yükleniyor: {filename}")
-                try:
-                    invoices = kdv_iade_listesi.load_invoices_from_zip(filepath)
-                    all_invoices.extend(invoices)
-                    logs.append(f"  ✅ {len(invoices)} fatura bulundu")
-                except Exception as e:
-                    logs.append(f"  ❌ Hata: {str(e)}")
-            
-            elif filepath.lower().endswith('.xml'):
-                logs.append(f"📄 Yükleniyor: {filename}")
-                try:
-                    inv_data = kdv_iade_listesi.load_invoice_from_xml(filepath)
-                    if inv_data:
-                        all_invoices.append(inv_data)
-                        logs.append(f"  ✅ 1 fatura bulundu")
-                except Exception as e:
-                    logs.append(f"  ❌ Hata: {str(e)}")
-            
-            elif filepath.lower().endswith('.pdf'):
-                logs.append(f"📑 Yükleniyor (PDF): {filename}")
-                try:
-                    inv_list = pdf_invoice_reader.smart_extract_invoices_from_pdf(filepath)
-                    if inv_list:
-                        all_invoices.extend(inv_list)
-                        logs.append(f"  ✅ {len(inv_list)} fatura bulundu")
-                except Exception as e:
-                    logs.append(f"  ❌ Hata: {str(e)}")
-        
-        if not all_invoices:
-            return jsonify({
-                'success': False, 
-                'error': 'Hiç fatura bulunamadı!',
-                'logs': logs
-            })
-        
-        # Excel oluştur
-        output_file = os.path.join(app.config['OUTPUT_FOLDER'], 'Indirilecek_KDV_Listesi.xlsx')
-        kdv_iade_listesi.generate_kdv_listesi_excel(all_invoices, output_file)
-        
-        logs.append(f"\n✅ Excel oluşturuldu: {len(all_invoices)} fatura")
-        
-        return jsonify({
-            'success': True,
-            'file': '/download/kdv-excel',
-            'filename': 'Indirilecek_KDV_Listesi.xlsx',
-            'invoice_count': len(all_invoices),
-            'logs': logs
-        })
-        
+
+        output_file = os.path.join(get_user_output_folder(), 'Indirilecek_KDV_Listesi.xlsx')
+        return _submit_generate_job('kdv-excel', _kdv_excel_job, files, output_file)
+
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -556,33 +888,86 @@ def generate_kdv_excel():
 @login_required
 def download_kdv_excel():
     """KDV Excel dosyasını indir"""
-    filepath = os.path.join(app.config['OUTPUT_FOLDER'], 'Indirilecek_KDV_Listesi.xlsx')
+    filepath = os.path.join(get_user_output_folder(), 'Indirilecek_KDV_Listesi.xlsx')
     if os.path.exists(filepath):
         return send_file(filepath, as_attachment=True, download_name='Indirilecek_KDV_Listesi.xlsx')
     return "Dosya bulunamadı", 404
 
 
+def _client_diff(data):
+    """
+    Düzenleyicinin gönderdiği id bazlı fark:
+    {"changes": {"<id>": {alan: değer}}, "deleted": [id], "restored": [id]}
+    """
+    changes = data.get('changes') or {}
+    if not isinstance(changes, dict) or not all(isinstance(f, dict) for f in changes.values()):
+        raise ValueError('Geçersiz değişiklik listesi')
+    try:
+        return (
+            {int(inv_id): fields for inv_id, fields in changes.items()},
+            [int(i) for i in data.get('deleted') or []],
+            [int(i) for i in data.get('restored') or []]
+        )
+    except (TypeError, ValueError):
+        raise ValueError('Geçersiz fatura numarası')
+
+
+def _export_invoices():
+    """
+    Dışa aktarılacak faturalar (tek geçişte okunan iterator, liste boşsa None):
+    - {"dataset": "kdv", "changes", "deleted", "restored"}: sunucudaki veri seti
+      + kaydedilmiş düzenlemeler + istemcinin henüz kaydedilmemiş farkı;
+      faturalar veri setinden yazım sırasında tek tek üretilir
+    - {"invoices": [...]}: düzenleyicinin gönderdiği tam liste (masaüstü rapor)
+    - gövde boşsa yüklü dosyaların ayrıştırılmış hali
+    """
+    data = request.get_json(silent=True) or {}
+    if data.get('dataset'):
+        view = _editor_view(data['dataset'])
+        if view is None:
+            return None
+        invoices = view.with_diff(*_client_diff(data)).active()
+    else:
+        invoices = data.get('invoices') or []
+        if not invoices:
+            invoices = fatura_snapshot.load_upload_set(get_uploaded_files(), fatura_snapshot.KIND_ALIS) or []
+        invoices = (inv for inv in invoices if not inv.get('_deleted', False))
+
+    first = next(invoices, None)
+    if first is None:
+        return None
+    return itertools.chain((first,), invoices)
+
+
+def _excel_stream_response(generate, invoices, filename):
+    """
+    Excel dosyasını üretilirken istemciye akıt (generate(invoices, stream))
+
+    Dosya bellekte veya diskte bütün olarak tutulmaz; uzunluk önceden
+    bilinmediği için yanıt chunked gönderilir.
+    """
+    return Response(
+        excel_akis.stream_workbook(generate, invoices),
+        mimetype=EXCEL_MIMETYPE,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
 @app.route('/api/export/gib-ozet', methods=['POST'])
 @login_required
 def export_gib_ozet():
     """GİB Özet Liste Excel dosyası oluştur ve indir"""
     try:
-        data = request.get_json()
-        invoices = data.get('invoices', []) if data else []
+        invoices = _export_invoices()
         
-        if not invoices:
+        if invoices is None:
             return jsonify({'success': False, 'error': 'Fatura verisi bulunamadı'}), 400
         
-        # Excel oluştur
-        output_stream = export_gib_excel.generate_gib_ozet_excel(invoices)
-        
-        return send_file(
-            output_stream,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name='gib_indirilecek_kdv_ozet.xlsx'
-        )
+        return _excel_stream_response(export_gib_excel.generate_gib_ozet_excel, invoices,
+                                      'gib_indirilecek_kdv_ozet.xlsx')
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -592,22 +977,16 @@ def export_gib_ozet():
 def export_gib_kalemli():
     """GİB Kalem Bazlı Excel dosyası oluştur ve indir"""
     try:
-        data = request.get_json()
-        invoices = data.get('invoices', []) if data else []
+        invoices = _export_invoices()
         
-        if not invoices:
+        if invoices is None:
             return jsonify({'success': False, 'error': 'Fatura verisi bulunamadı'}), 400
         
-        # Excel oluştur
-        output_stream = export_gib_excel.generate_gib_kalemli_excel(invoices)
-        
-        return send_file(
-            output_stream,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name='gib_indirilecek_kdv_kalemli.xlsx'
-        )
+        return _excel_stream_response(export_gib_excel.generate_gib_kalemli_excel, invoices,
+                                      'gib_indirilecek_kdv_kalemli.xlsx')
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -615,77 +994,18 @@ def export_gib_kalemli():
 @app.route('/generate-kdv-web', methods=['POST'])
 @login_required
 def generate_kdv_web():
-    """KDV Web Düzenleyici oluştur"""
+    """KDV Web Düzenleyici oluştur (arka plan işi)"""
     try:
         own_vkn = request.json.get('vkn', '').strip() if request.json else ''
-        
-        if not uploaded_files:
+
+        files = get_uploaded_files()
+        if not files:
             return jsonify({'success': False, 'error': 'Dosya yüklenmedi'})
-        
-        all_invoices = []
-        logs = []
-        
-        for file_info in uploaded_files:
-            filepath = file_info['path']
-            filename = file_info['name']
-            
-            if filepath.lower().endswith('.zip'):
-                logs.append(f"📂 Yükleniyor: {filename}")
-                try:
-                    invoices = kdv_iade_listesi.load_invoices_from_zip(filepath)
-                    all_invoices.extend(invoices)
-                    logs.append(f"  ✅ {len(invoices)} fatura bulundu")
-                except Exception as e:
-                    logs.append(f"  ❌ Hata: {str(e)}")
-            
-            elif filepath.lower().endswith('.xml'):
-                logs.append(f"📄 Yükleniyor: {filename}")
-                try:
-                    inv_data = kdv_iade_listesi.load_invoice_from_xml(filepath)
-                    if inv_data:
-                        all_invoices.append(inv_data)
-                        logs.append(f"  ✅ 1 fatura bulundu")
-                except Exception as e:
-                    logs.append(f"  ❌ Hata: {str(e)}")
-            
-            elif filepath.lower().endswith('.pdf'):
-                logs.append(f"📑 Yükleniyor (PDF): {filename}")
-                try:
-                    inv_list = pdf_invoice_reader.smart_extract_invoices_from_pdf(filepath)
-                    if inv_list:
-                        all_invoices.extend(inv_list)
-                        logs.append(f"  ✅ {len(inv_list)} fatura bulundu")
-                except Exception as e:
-                    logs.append(f"  ❌ Hata: {str(e)}")
-        
-        # VKN filtresi
-        if own_vkn:
-            original_count = len(all_invoices)
-            all_invoices = [inv for inv in all_invoices if inv.get('satici_vkn', '') != own_vkn]
-            filtered = original_count - len(all_invoices)
-            if filtered > 0:
-                logs.append(f"🔍 {filtered} satış faturası hariç tutuldu")
-        
-        if not all_invoices:
-            return jsonify({
-                'success': False, 
-                'error': 'Hiç alış faturası bulunamadı!',
-                'logs': logs
-            })
-        
-        # Web editor HTML oluştur
-        output_file = os.path.join(app.config['OUTPUT_FOLDER'], 'KDV_Listesi_Editor.html')
-        kdv_web_editor.generate_kdv_web_report(all_invoices, output_file)
-        
-        logs.append(f"\n✅ Web düzenleyici oluşturuldu: {len(all_invoices)} fatura")
-        
-        return jsonify({
-            'success': True,
-            'url': '/view/kdv-editor',
-            'invoice_count': len(all_invoices),
-            'logs': logs
-        })
-        
+
+        output_file = os.path.join(get_user_output_folder(), 'KDV_Listesi_Editor.html')
+        return _submit_generate_job('kdv-web', _kdv_web_job, files, own_vkn, output_file,
+                                    current_user.id)
+
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -694,7 +1014,7 @@ def generate_kdv_web():
 @login_required
 def view_kdv_editor():
     """KDV Editor HTML'i görüntüle"""
-    filepath = os.path.join(app.config['OUTPUT_FOLDER'], 'KDV_Listesi_Editor.html')
+    filepath = os.path.join(get_user_output_folder(), 'KDV_Listesi_Editor.html')
     if os.path.exists(filepath):
         with open(filepath, 'r', encoding='utf-8') as f:
             return f.read()
@@ -704,52 +1024,21 @@ def view_kdv_editor():
 @app.route('/generate-satis-web', methods=['POST'])
 @login_required
 def generate_satis_web():
-    """Satış Fatura Listesi Web oluştur"""
+    """Satış Fatura Listesi Web oluştur (arka plan işi)"""
     try:
         own_vkn = request.json.get('vkn', '').strip() if request.json else ''
-        
+
         if not own_vkn:
             return jsonify({'success': False, 'error': 'VKN gerekli!'})
-        
-        if not uploaded_files:
+
+        files = get_uploaded_files()
+        if not files:
             return jsonify({'success': False, 'error': 'Dosya yüklenmedi'})
-        
-        all_invoices = []
-        logs = []
-        
-        for file_info in uploaded_files:
-            filepath = file_info['path']
-            filename = file_info['name']
-            
-            if filepath.lower().endswith('.zip'):
-                logs.append(f"📂 Yükleniyor: {filename}")
-                try:
-                    invs = satis_fatura_listesi.load_sales_invoices_from_zip(filepath, own_vkn=own_vkn)
-                    all_invoices.extend(invs)
-                    logs.append(f"  ✅ {len(invs)} satış faturası bulundu")
-                except Exception as e:
-                    logs.append(f"  ❌ Hata: {str(e)}")
-        
-        if not all_invoices:
-            return jsonify({
-                'success': False, 
-                'error': 'Hiç satış faturası bulunamadı! VKN doğru mu?',
-                'logs': logs
-            })
-        
-        # Web editor HTML oluştur
-        output_file = os.path.join(app.config['OUTPUT_FOLDER'], 'Satis_Listesi_Editor.html')
-        satis_web_editor.generate_satis_web_report(all_invoices, output_file)
-        
-        logs.append(f"\n✅ Satış listesi oluşturuldu: {len(all_invoices)} fatura")
-        
-        return jsonify({
-            'success': True,
-            'url': '/view/satis-editor',
-            'invoice_count': len(all_invoices),
-            'logs': logs
-        })
-        
+
+        output_file = os.path.join(get_user_output_folder(), 'Satis_Listesi_Editor.html')
+        return _submit_generate_job('satis-web', _satis_web_job, files, own_vkn, output_file,
+                                    current_user.id)
+
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -758,13 +1047,238 @@ def generate_satis_web():
 @login_required
 def view_satis_editor():
     """Satış Editor HTML'i görüntüle"""
-    filepath = os.path.join(app.config['OUTPUT_FOLDER'], 'Satis_Listesi_Editor.html')
+    filepath = os.path.join(get_user_output_folder(), 'Satis_Listesi_Editor.html')
     if os.path.exists(filepath):
         with open(filepath, 'r', encoding='utf-8') as f:
             return f.read()
     return "Dosya bulunamadı", 404
 
 
+# ================== DÜZENLEYİCİ FATURA API ==================
+
+# Düzenleyici türü -> kullanıcının çıktı klasöründeki veri seti
+EDITOR_DATASETS = {
+    'kdv': 'kdv_dataset.json',
+    'satis': 'satis_dataset.json'
+}
+
+
+def _editor_view(kind):
+    """Kullanıcının veri seti + düzenlemeleri (veri seti yoksa None)"""
+    filename = EDITOR_DATASETS.get(kind)
+    if not filename:
+        return None
+    loaded = fatura_sorgu.load_dataset(os.path.join(get_user_output_folder(), filename))
+    if loaded is None:
+        return None
+    rows, search = loaded
+    return fatura_sorgu.FaturaGorunumu(rows, search, get_editor_edits(current_user.id, kind))
+
+
+def _dataset_not_found():
+    return jsonify({'success': False, 'error': 'Fatura listesi bulunamadı, düzenleyiciyi yeniden oluşturun'}), 404
+
+
+@app.route('/api/invoices/<kind>')
+@login_required
+def list_invoices(kind):
+    """Sayfalı fatura listesi (?page, per_page, sort, order, q)"""
+    view = _editor_view(kind)
+    if view is None:
+        return _dataset_not_found()
+
+    result = view.query(
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', fatura_sorgu.VARSAYILAN_SAYFA_BOYUTU, type=int),
+        sort=request.args.get('sort') or None,
+        order=request.args.get('order', 'asc'),
+        q=request.args.get('q', '')
+    )
+    return jsonify({'success': True, **result})
+
+
+@app.route('/api/invoices/<kind>', methods=['POST'])
+@login_required
+def add_invoice(kind):
+    """Elle / QR ile fatura ekle"""
+    view = _editor_view(kind)
+    if view is None:
+        return _dataset_not_found()
+
+    data = request.get_json(silent=True) or {}
+    invoice = data.get('invoice')
+    if not isinstance(invoice, dict):
+        return jsonify({'success': False, 'error': 'Fatura verisi gerekli'}), 400
+
+    invoice.pop('id', None)
+    invoice['id'] = add_editor_invoice(current_user.id, kind, invoice, len(view.rows))
+    return jsonify({'success': True, 'invoice': invoice})
+
+
+@app.route('/api/invoices/<kind>/<int:invoice_id>', methods=['PATCH'])
+@login_required
+def update_invoice(kind, invoice_id):
+    """Faturanın değişen alanlarını kaydet"""
+    view = _editor_view(kind)
+    if view is None:
+        return _dataset_not_found()
+    if view.get(invoice_id) is None:
+        return jsonify({'success': False, 'error': 'Fatura bulunamadı'}), 404
+
+    data = request.get_json(silent=True) or {}
+    fields = data.get('fields')
+    if not isinstance(fields, dict):
+        return jsonify({'success': False, 'error': 'Değişen alanlar gerekli'}), 400
+
+    fields.pop('id', None)
+    update_editor_fields(current_user.id, kind, invoice_id, fields)
+    return jsonify({'success': True})
+
+
+def _set_invoices_deleted(kind, deleted):
+    view = _editor_view(kind)
+    if view is None:
+        return _dataset_not_found()
+
+    data = request.get_json(silent=True) or {}
+    try:
+        ids = [int(i) for i in data.get('ids', [])]
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Geçersiz fatura numarası'}), 400
+    ids = [i for i in ids if view.get(i) is not None]
+
+    set_editor_deleted(current_user.id, kind, ids, deleted)
+    return jsonify({'success': True, 'count': len(ids)})
+
+
+@app.route('/api/invoices/<kind>/delete', methods=['POST'])
+@login_required
+def delete_invoices(kind):
+    """Faturaları sil (geri alınabilir)"""
+    return _set_invoices_deleted(kind, True)
+
+
+@app.route('/api/invoices/<kind>/restore', methods=['POST'])
+@login_required
+def restore_invoices(kind):
+    """Silinen faturaları geri al"""
+    return _set_invoices_deleted(kind, False)
+
+
+@app.route('/api/invoices/<kind>/<int:invoice_id>/page-image')
+@login_required
+def invoice_page_image(kind, invoice_id):
+    """
+    PDF faturanın sayfa görüntüsü (?dpi=72|100|150|200, ?w=<genişlik>, ?format=webp|jpeg|png)
+
+    Görüntü ilk istekte render edilip diske yazılır; içerik PDF özetiyle
+    adreslendiği için tarayıcı da ETag ile önbellekler.
+    """
+    view = _editor_view(kind)
+    invoice = view.get(invoice_id) if view else None
+    pdf_source = kdv_web_editor.split_pdf_source(invoice) if invoice else None
+    if not pdf_source:
+        return "Sayfa görüntüsü bulunamadı", 404
+
+    # Sadece kullanıcının kendi yüklediği dosyalar
+    pdf_path, page_num = pdf_source
+    user_folder = os.path.realpath(get_user_upload_folder())
+    if not os.path.realpath(pdf_path).startswith(user_folder + os.sep) or not os.path.exists(pdf_path):
+        return "Erişim reddedildi", 403
+
+    fmt = request.args.get('format')
+    if fmt not in sayfa_goruntu.FORMATLAR:
+        fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+
+    # Yükleme kaydındaki özet varsa dosya yeniden okunmaz
+    sha256 = next((f['sha256'] for f in get_uploaded_files() if f['path'] == pdf_path), None)
+    image = sayfa_goruntu.get_page_image(
+        pdf_path, page_num,
+        dpi=request.args.get('dpi', sayfa_goruntu.VARSAYILAN_DPI),
+        width=request.args.get('w', 0, type=int),
+        fmt=fmt,
+        sha256=sha256
+    )
+    if image is None:
+        return "Sayfa görüntüsü oluşturulamadı", 404
+
+    path, etag, mimetype = image
+    response = send_file(path, mimetype=mimetype, etag=etag, conditional=True, max_age=7 * 24 * 3600)
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.vary.add('Accept')
+    return response
+
+
+@app.route('/api/invoices/<kind>/excel', methods=['GET', 'POST'])
+@login_required
+def export_invoices_excel(kind):
+    """
+    Düzenlenmiş listeyi standart Excel olarak indir
+
+    POST gövdesindeki {"changes", "deleted", "restored"} (istemcinin henüz
+    kaydedilmemiş farkı) kaydedilmiş düzenlemelerin üzerine uygulanır.
+    """
+    view = _editor_view(kind)
+    if view is None:
+        return _dataset_not_found()
+
+    data = request.get_json(silent=True) or {}
+    try:
+        view = view.with_diff(*_client_diff(data))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    invoices = view.active()
+    first = next(invoices, None)
+    if first is None:
+        return jsonify({'success': False, 'error': 'Dışa aktarılacak fatura yok'}), 400
+    invoices = itertools.chain((first,), invoices)
+
+    if kind == 'kdv':
+        filename = 'Indirilecek_KDV_Listesi.xlsx'
+        generate = kdv_iade_listesi.generate_kdv_listesi_excel
+    else:
+        filename = 'Satis_Fatura_Listesi.xlsx'
+        generate = satis_fatura_listesi.generate_sales_listesi_excel
+
+    return _excel_stream_response(generate, invoices, filename)
+
+
+def _get_owned_job(job_id, since=0):
+    """İşi getir; sadece sahibi veya admin görebilir"""
+    job = job_queue.get_job(job_id, since)
+    if job is None:
+        return None
+    if job['user_id'] != str(current_user.id) and not current_user.is_admin():
+        return None
+    return job
+
+
+@app.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """İş durumu, ilerleme ve ?since=<log_id> sonrasındaki log satırları"""
+    since = request.args.get('since', 0, type=int)
+    job = _get_owned_job(job_id, since)
+    if job is None:
+        return jsonify({'success': False, 'error': 'İş bulunamadı'}), 404
+    job.pop('user_id', None)
+    return jsonify({'success': True, 'job': job})
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_job(job_id):
+    """Çalışan veya kuyruktaki işi iptal et"""
+    job = _get_owned_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'İş bulunamadı'}), 404
+    if not job['finished']:
+        job_queue.cancel_job(job_id)
+    return jsonify({'success': True})
+
+
 @app.route('/gib_viewer_extracted/<path:filename>')
 def serve_xslt_file(filename):
     """XSLT dosyalarını servis et"""
@@ -775,32 +1289,49 @@ def serve_xslt_file(filename):
     return "XSLT dosyası bulunamadı", 404
 
 
+def _gib_cache_folder():
+    """Dönüştürülmüş GİB görüntüleri (kullanıcı dosyalarıyla birlikte silinir)"""
+    return os.path.join(get_user_upload_folder(), '.gib_cache')
+
+
+def _gib_response(response, etag):
+    """
+    Aynı dosya adıyla yeni XML yüklenebileceği için tarayıcı her seferinde
+    doğrular (no-cache); içerik değişmediyse 304 döner.
+    """
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @app.route('/uploads/<path:filename>')
 @login_required
 def serve_uploaded_file(filename):
     """Yüklenen dosyaları görüntüle (PDF, XML, vb.)"""
     print(f"[DEBUG] serve_uploaded_file çağrıldı - filename: {filename}")
     try:
-        # Önce uploads klasöründe ara
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        upload_folder = get_user_upload_folder()
+
+        # Önce kullanıcının uploads klasöründe ara
+        filepath = os.path.join(upload_folder, filename)
         print(f"[DEBUG] İlk deneme path: {filepath}, exists: {os.path.exists(filepath)}")
         
         # Eğer uploads'ta yoksa xml_files klasöründe ara
         if not os.path.exists(filepath):
-            xml_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'xml_files')
+            xml_dir = os.path.join(upload_folder, 'xml_files')
             filepath = os.path.join(xml_dir, filename)
             print(f"[DEBUG] İkinci deneme path: {filepath}, exists: {os.path.exists(filepath)}")
         
         # Eğer hala yoksa gib_html klasöründe ara
         if not os.path.exists(filepath):
-            gib_html_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'gib_html')
+            gib_html_dir = os.path.join(upload_folder, 'gib_html')
             filepath = os.path.join(gib_html_dir, filename)
         
         # Path traversal saldırılarını önle
         base_folders = [
-            os.path.abspath(app.config['UPLOAD_FOLDER']),
-            os.path.abspath(os.path.join(app.config['UPLOAD_FOLDER'], 'xml_files')),
-            os.path.abspath(os.path.join(app.config['UPLOAD_FOLDER'], 'gib_html'))
+            os.path.abspath(upload_folder),
+            os.path.abspath(os.path.join(upload_folder, 'xml_files')),
+            os.path.abspath(os.path.join(upload_folder, 'gib_html'))
         ]
         
         abs_filepath = os.path.abspath(filepath)
@@ -812,28 +1343,14 @@ def serve_uploaded_file(filename):
             if filepath.lower().endswith('.pdf'):
                 return send_file(filepath, mimetype='application/pdf')
             elif filepath.lower().endswith('.xml'):
-                # XML dosyalarını GIB formatında görüntüle
-                print(f"[DEBUG] XML dosyası işleniyor: {filepath}")
+                # XML dosyalarını GIB formatında görüntüle (XML özetiyle önbelleklenir)
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        xml_content = f.read()
-                    print(f"[DEBUG] XML içeriği okundu, boyut: {len(xml_content)} karakter")
-                    
-                    # Enhanced gib_viewer kullan (HTML + metadata döndürür)
-                    html_output, metadata = gib_viewer.transform_invoice_to_html(xml_content)
-                    print(f"[DEBUG] HTML'e dönüştürüldü, boyut: {len(html_output)} karakter") 
-                    
-                    # Metadata'yı log'la
-                    if metadata:
-                        print(f"[DEBUG] Fatura metadata: ETTN={metadata.get('ettn')}, "
-                              f"No={metadata.get('invoice_no')}, "
-                              f"Tutar={metadata.get('payable_amount')} {metadata.get('currency')}")
+                    etag = gib_viewer.cache_key(sayfa_goruntu.file_sha256(filepath))
+                    if etag in request.if_none_match:
+                        return _gib_response(Response(status=304), etag)
                     
-                    response = Response(html_output, mimetype='text/html; charset=utf-8')
-                    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-                    response.headers['Pragma'] = 'no-cache'
-                    response.headers['Expires'] = '0'
-                    return response
+                    html_output = gib_viewer.render_invoice_cached(filepath, _gib_cache_folder(), etag)
+                    return _gib_response(Response(html_output, mimetype='text/html; charset=utf-8'), etag)
                 except Exception as xml_error:
                     # Hata durumunda ham XML göster
                     import traceback
@@ -855,22 +1372,28 @@ def serve_uploaded_file(filename):
 def get_xml_metadata(filename):
     """XML faturasından metadata bilgilerini JSON olarak döndür"""
     try:
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        upload_folder = get_user_upload_folder()
+        filepath = os.path.join(upload_folder, filename)
         
         if not os.path.exists(filepath):
-            xml_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'xml_files')
+            xml_dir = os.path.join(upload_folder, 'xml_files')
             filepath = os.path.join(xml_dir, filename)
         
+        # Path traversal saldırılarını önle
+        if not os.path.abspath(filepath).startswith(os.path.abspath(upload_folder) + os.sep):
+            return jsonify({'error': 'Yetkisiz erişim'}), 403
+        
         if not os.path.exists(filepath) or not filepath.lower().endswith('.xml'):
             return jsonify({'error': 'XML dosyası bulunamadı'}), 404
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            xml_content = f.read()
+        etag = gib_viewer.cache_key(sayfa_goruntu.file_sha256(filepath)) + '-meta'
+        if etag in request.if_none_match:
+            return _gib_response(Response(status=304), etag)
         
-        # Enhanced gib_viewer ile metadata çıkar
-        _, metadata = gib_viewer.transform_invoice_to_html(xml_content)
+        # Sadece XML okunur, XSLT dönüşümü yapılmaz
+        metadata = gib_viewer.metadata_cached(filepath, _gib_cache_folder(), etag)
         
-        return jsonify({'success': True, 'metadata': metadata})
+        return _gib_response(jsonify({'success': True, 'metadata': metadata}), etag)
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
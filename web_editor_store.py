@@ -0,0 +1,262 @@
+"""
+Web Düzenleyici Veri Katmanı
+KDV ve satış düzenleyicilerinin ortak JavaScript/CSS parçaları.
+
+- LocalInvoiceStore: faturalar HTML'e gömülüdür (masaüstü, file://)
+- RemoteInvoiceStore: sayfalar sunucu API'sinden istenir (web_app); dışa
+  aktarımda sadece henüz kaydedilmemiş değişiklikler id bazlı fark olarak gönderilir
+
+İki katman da aynı sorgu sonucunu döndürür:
+{rows, total, page, per_page, pages, totals}
+"""
+
+import json
+
+# Düz metin (f-string değil), editörlerin <script> bloğuna olduğu gibi eklenir
+INVOICE_STORE_JS = r'''
+        // ================== VERİ KATMANI ==================
+        const SEARCH_FIELDS = ['tarih', 'seri', 'sira_no', 'fatura_no', 'satici_unvan', 'satici_vkn',
+            'alici_unvan', 'alici_vkn', 'mal_cinsi', 'miktar', 'kdv_donemi', 'ggb_tescil_no'];
+        const NUMERIC_FIELDS = ['kdv_haric_tutar', 'kdv', 'tevkifat_kdv', 'iki_nolu_kdv',
+            'toplam_indirilen_kdv', 'kdv_orani'];
+        const TOTAL_FIELDS = ['kdv_haric_tutar', 'kdv', 'tevkifat_kdv', 'iki_nolu_kdv', 'toplam_indirilen_kdv'];
+
+        function trFold(text) {
+            return String(text || '').replace(/[İIı]/g, 'i').toLowerCase();
+        }
+
+        function parseAmount(value) {
+            // fatura_sorgu.to_number ile aynı: "1.234,56" → 1234.56
+            let text = String(value ?? '').trim().replace(/[^0-9,.-]/g, '');
+            if (text.includes(',')) text = text.replace(/\./g, '').replace(',', '.');
+            return parseFloat(text) || 0;
+        }
+
+        class LocalInvoiceStore {
+            constructor(invoices) {
+                this.invoices = invoices;
+                this.invoices.forEach((inv, idx) => { inv.id = idx; });
+                this.remote = false;
+            }
+
+            async query(params) {
+                const needle = trFold((params.q || '').trim());
+                const active = this.invoices.filter(inv => !inv._deleted);
+                const totals = { count: active.length };
+                TOTAL_FIELDS.forEach(field => {
+                    totals[field] = active.reduce((s, i) => s + (parseFloat(i[field]) || 0), 0);
+                });
+
+                let rows = needle
+                    ? active.filter(inv => trFold(SEARCH_FIELDS.map(f => inv[f] || '').join(' ')).includes(needle))
+                    : active.slice();
+
+                if (params.sort) {
+                    const field = params.sort;
+                    const dir = params.order === 'desc' ? -1 : 1;
+                    const key = NUMERIC_FIELDS.includes(field)
+                        ? inv => parseFloat(inv[field]) || 0
+                        : field === 'fatura_no'
+                            ? inv => trFold((inv.seri || '') + (inv.sira_no || ''))
+                            : inv => trFold(inv[field]);
+                    rows.sort((a, b) => { const x = key(a), y = key(b); return x < y ? -dir : x > y ? dir : 0; });
+                }
+
+                const perPage = params.per_page;
+                const pages = perPage ? Math.max(1, Math.ceil(rows.length / perPage)) : 1;
+                const page = Math.min(Math.max(1, params.page || 1), pages);
+                return {
+                    rows: perPage ? rows.slice((page - 1) * perPage, page * perPage) : [],
+                    total: rows.length,
+                    page: page,
+                    per_page: perPage,
+                    pages: pages,
+                    totals: totals
+                };
+            }
+
+            async update(id, fields) {
+                Object.assign(this.invoices[id], fields);
+            }
+
+            async setDeleted(ids, deleted) {
+                ids.forEach(id => { this.invoices[id]._deleted = deleted; });
+            }
+
+            async add(invoice) {
+                invoice.id = this.invoices.length;
+                this.invoices.push(invoice);
+                return invoice;
+            }
+
+            activeInvoices() {
+                return this.invoices.filter(inv => !inv._deleted);
+            }
+
+            exportPayload() {
+                return { invoices: this.activeInvoices() };
+            }
+        }
+
+        class RemoteInvoiceStore {
+            constructor(apiUrl, dataset) {
+                this.apiUrl = apiUrl;
+                this.dataset = dataset;
+                this.remote = true;
+                // Sunucuya henüz kaydedilmemiş (yolda veya başarısız) değişiklikler
+                this.pendingChanges = {};
+                this.pendingDeleted = {};
+                this.pendingSeq = {};
+                this.seq = 0;
+            }
+
+            async request(url, options) {
+                const response = await fetch(url, options);
+                const data = await response.json();
+                if (!response.ok || data.success === false) {
+                    throw new Error(data.error || 'Sunucu hatası');
+                }
+                return data;
+            }
+
+            async track(key, pending, send) {
+                // Değişiklik kaydedilince, arada yenisi gelmediyse bekleyenlerden çıkar
+                const seq = this.pendingSeq[key] = ++this.seq;
+                const result = await send();
+                if (this.pendingSeq[key] === seq) {
+                    delete this.pendingSeq[key];
+                    pending();
+                }
+                return result;
+            }
+
+            async query(params) {
+                const search = new URLSearchParams({
+                    page: params.page || 1,
+                    per_page: params.per_page,
+                    q: params.q || ''
+                });
+                if (params.sort) {
+                    search.set('sort', params.sort);
+                    search.set('order', params.order || 'asc');
+                }
+                return this.request(`${this.apiUrl}?${search}`);
+            }
+
+            async update(id, fields) {
+                // Önceki başarısız kayıtlar da bu istekle birlikte gönderilir
+                const pending = this.pendingChanges[id] = Object.assign(this.pendingChanges[id] || {}, fields);
+                return this.track(`f${id}`, () => { delete this.pendingChanges[id]; }, () =>
+                    this.request(`${this.apiUrl}/${id}`, {
+                        method: 'PATCH',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ fields: pending })
+                    }));
+            }
+
+            async setDeleted(ids, deleted) {
+                ids.forEach(id => { this.pendingDeleted[id] = deleted; });
+                const key = `d${ids.join(',')}`;
+                return this.track(key, () => {
+                    ids.forEach(id => { if (this.pendingDeleted[id] === deleted) delete this.pendingDeleted[id]; });
+                }, () =>
+                    this.request(`${this.apiUrl}/${deleted ? 'delete' : 'restore'}`, {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ ids: ids })
+                    }));
+            }
+
+            async add(invoice) {
+                const data = await this.request(this.apiUrl, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ invoice: invoice })
+                });
+                return data.invoice;
+            }
+
+            exportPayload() {
+                // Sunucu listeyi veri seti + kaydedilmiş düzenlemelerden kendisi oluşturur;
+                // henüz kaydedilmemiş değişiklikler sadece id bazlı fark olarak gönderilir
+                const ids = Object.keys(this.pendingDeleted);
+                return {
+                    dataset: this.dataset,
+                    changes: this.pendingChanges,
+                    deleted: ids.filter(id => this.pendingDeleted[id]),
+                    restored: ids.filter(id => !this.pendingDeleted[id])
+                };
+            }
+        }
+
+        async function downloadPost(url, payload, filename) {
+            // Sunucuda üretilen dosyayı POST ile iste ve indir
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(payload)
+            });
+            if (!response.ok) {
+                const error = await response.json().catch(() => ({}));
+                throw new Error(error.error || 'Export hatası');
+            }
+            const blobUrl = window.URL.createObjectURL(await response.blob());
+            const a = document.createElement('a');
+            a.href = blobUrl;
+            a.download = filename;
+            document.body.appendChild(a);
+            a.click();
+            window.URL.revokeObjectURL(blobUrl);
+            a.remove();
+        }
+
+        function renderPager(result, onPage) {
+            const pager = document.getElementById('pager');
+            if (!pager) return;
+            const first = result.total === 0 ? 0 : (result.page - 1) * result.per_page + 1;
+            const last = Math.min(result.page * result.per_page, result.total);
+            pager.innerHTML = `
+                <span>${first}-${last} / ${result.total}</span>
+                <button class="btn btn-secondary btn-sm" ${result.page <= 1 ? 'disabled' : ''} data-page="1">«</button>
+                <button class="btn btn-secondary btn-sm" ${result.page <= 1 ? 'disabled' : ''} data-page="${result.page - 1}">‹</button>
+                <span>Sayfa ${result.page} / ${result.pages}</span>
+                <button class="btn btn-secondary btn-sm" ${result.page >= result.pages ? 'disabled' : ''} data-page="${result.page + 1}">›</button>
+                <button class="btn btn-secondary btn-sm" ${result.page >= result.pages ? 'disabled' : ''} data-page="${result.pages}">»</button>
+            `;
+            pager.querySelectorAll('button[data-page]').forEach(btn => {
+                btn.addEventListener('click', () => onPage(parseInt(btn.dataset.page)));
+            });
+        }
+
+        function bindSortHeaders(onSort) {
+            document.querySelectorAll('th[data-sort]').forEach(th => {
+                th.classList.add('sortable');
+                th.addEventListener('click', () => onSort(th.dataset.sort));
+            });
+        }
+
+        function markSortHeader(sort, order) {
+            document.querySelectorAll('th[data-sort]').forEach(th => {
+                th.classList.remove('sort-asc', 'sort-desc');
+                if (th.dataset.sort === sort) th.classList.add(order === 'desc' ? 'sort-desc' : 'sort-asc');
+            });
+        }
+'''
+
+PAGER_CSS = '''
+        .pager { display: flex; gap: 8px; align-items: center; justify-content: flex-end; padding: 10px 0; font-size: 13px; color: #555; }
+        .pager button[disabled] { opacity: 0.4; cursor: default; }
+        th.sortable { cursor: pointer; user-select: none; }
+        th.sort-asc::after { content: ' ▲'; font-size: 10px; }
+        th.sort-desc::after { content: ' ▼'; font-size: 10px; }
+        td.long-text { max-width: 220px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+        td.long-text:focus { white-space: normal; overflow: visible; }
+'''
+
+
+def store_init_js(invoices=None, api_url=None, dataset=None):
+    """Düzenleyici için veri katmanını oluşturan JS satırı"""
+    if api_url:
+        return f"const store = new RemoteInvoiceStore({json.dumps(api_url)}, {json.dumps(dataset)});"
+    invoice_data = json.dumps(invoices or [], ensure_ascii=False)
+    return f"const store = new LocalInvoiceStore({invoice_data});"
@@ -12,6 +12,8 @@ from enum import Enum
 from datetime import datetime
 import re
 
+from metin_arama import FaturaNoIndeksi
+
 
 class RiskLevel(Enum):
     """Risk seviyeleri"""
@@ -384,6 +386,7 @@ class YMMAuditEngine:
         self.purchases_by_supplier: Dict[str, float] = {}  # Satıcı bazlı alış
         self.kdv_by_supplier: Dict[str, float] = {}  # Satıcı bazlı KDV (Top 5 KDV için)
         self.invoice_to_supplier: Dict[str, str] = {}  # Fatura no -> Satıcı adı eşleme
+        self._supplier_index: Optional[FaturaNoIndeksi] = None  # invoice_to_supplier üzerinden arama indeksi
         
         # Fatura KDV toplamları (beyanname mutabakatı için)
         self.purchase_kdv_total: float = 0.0  # Alış faturalarından toplam KDV
@@ -462,6 +465,7 @@ class YMMAuditEngine:
                                 invoice_id = root.find('.//cbc:ID', ns)
                                 if invoice_id is not None and invoice_id.text:
                                     self.invoice_to_supplier[invoice_id.text] = party_name
+                                    self._supplier_index = None
                             
                             count += 1
                         except Exception:
@@ -524,6 +528,7 @@ class YMMAuditEngine:
                 invoice_id = root.find('.//cbc:ID', ns)
                 if invoice_id is not None and invoice_id.text:
                     self.invoice_to_supplier[invoice_id.text] = party_name
+                    self._supplier_index = None
             
             return 1
             
@@ -653,11 +658,9 @@ class YMMAuditEngine:
             return self.invoice_to_supplier[doc_no]
         
         # Kısmi eşleşme ara (bazen kebir'de farklı format olabiliyor)
-        for inv_id, supplier in self.invoice_to_supplier.items():
-            if doc_no in inv_id or inv_id in doc_no:
-                return supplier
-        
-        return None
+        if self._supplier_index is None:
+            self._supplier_index = FaturaNoIndeksi(self.invoice_to_supplier)
+        return self._supplier_index.find_related(doc_no)
 
     
     def load_mizan_from_kebir(self, kebir_data: dict) -> MizanData: